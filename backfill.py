@@ -0,0 +1,176 @@
+"""Re-render thumbnails, report images and videos for past dates.
+
+    python backfill.py 2026-09-01 2026-09-30 [--workers N] [--force] [--no-video] [--offline]
+
+Each date gets its own directory under output/backfill/<YYYY-MM-DD>/. Quotes
+come from Yahoo daily candles, fetched once for the whole range and kept in
+the local quote store; --offline reads them from the store instead. The inputs
+used for a date are saved as report.json and reused on later runs, along
+with any news text an earlier run stored there. A date is skipped once its
+directory has a .done marker, so an interrupted backfill picks up where it
+stopped. Videos are only rendered for dates whose directory already holds
+the narration as output_polly.mp3.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from utils.report_table import INDIAN_SYMBOLS, GLOBAL_SYMBOLS, build_table
+from utils.fetch_data import get_yahoo_history, quote_before
+from utils.image_templates import render_combined_market_image, render_thumbnail_image, render_instagram_image, warmup
+from utils.artifacts import save_image
+from utils.video_creator import render_videos
+from utils.audio_generator import get_audio_duration
+
+BACKFILL_DIR = os.getenv("BACKFILL_DIR", "output/backfill")
+DONE_MARKER = ".done"
+
+
+def parse_date(text):
+    return date.fromisoformat(text)
+
+
+def date_range(start, end, include_weekends=False):
+    day = start
+    while day <= end:
+        if include_weekends or day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def load_report(out_dir):
+    try:
+        with open(os.path.join(out_dir, "report.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_history(symbols, start, end, offline=False):
+    """Daily candles for every (symbol, label) pair, from Yahoo or the local quote store."""
+    from utils.quote_store import QUOTES
+    if offline:
+        # The same week of lead-in get_yahoo_daily_closes() fetches
+        return [QUOTES.daily_closes(symbol, start - timedelta(days=7), end) for symbol, _ in symbols]
+
+    history = get_yahoo_history(symbols, start, end)
+    for (symbol, _), candles in zip(symbols, history):
+        try:
+            QUOTES.append_closes(symbol, candles)
+        except OSError as e:
+            print(f"⚠️ Could not store closes for {symbol}: {e}")
+    return history
+
+
+def build_reports(days, out_root, offline=False):
+    """Return {day: report} for every day that has quote data."""
+    reports = {}
+    missing = []
+    for day in days:
+        report = load_report(os.path.join(out_root, day.isoformat()))
+        if report and report.get("quotes"):
+            reports[day] = report
+        else:
+            missing.append(day)
+
+    if missing:
+        symbols = INDIAN_SYMBOLS + GLOBAL_SYMBOLS
+        history = load_history(symbols, min(missing), max(missing), offline)
+        for day in missing:
+            quotes = [quote_before(candles, label, day) for candles, (_, label) in zip(history, symbols)]
+            if all(q["price"] == "❌" for q in quotes[:len(INDIAN_SYMBOLS)]):
+                print(f"⚠️ No index data for {day.isoformat()}, skipping.")
+                continue
+            previous = load_report(os.path.join(out_root, day.isoformat())) or {}
+            reports[day] = {"date": day.isoformat(), "quotes": quotes, "news": previous.get("news", "")}
+    return reports
+
+
+def render_date(report, out_dir, render_video=True):
+    """Render every artifact for one date. Runs in a worker process."""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "report.json"), "w") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    date_text = date.fromisoformat(report["date"]).strftime("%d.%m.%Y")
+    table = build_table(report["quotes"])
+    news = report.get("news", "")
+
+    thumbnail = render_thumbnail_image(date_text)
+    final_img = render_combined_market_image(date_text, table, news)
+    insta_img = render_instagram_image(date_text, table, news)
+    if thumbnail is None or final_img is None or insta_img is None:
+        raise RuntimeError(f"rendering failed for {report['date']}")
+    save_image(thumbnail, os.path.join(out_dir, "thumbnail_image.jpg"))
+    save_image(final_img, os.path.join(out_dir, "final_image.png"))
+    save_image(insta_img, os.path.join(out_dir, "insta_image.jpg"))
+
+    videos = []
+    audio_path = os.path.join(out_dir, "output_polly.mp3")
+    if render_video and os.path.exists(audio_path):
+        duration = get_audio_duration(audio_path)
+        renditions = [
+            (final_img, os.path.join(out_dir, "final_video.mp4")),
+            (insta_img, os.path.join(out_dir, "insta_video.mp4"))
+        ]
+        videos = render_videos(renditions, audio_path, duration, mode="still")
+        if len(videos) != len(renditions):
+            raise RuntimeError(f"video encoding failed for {report['date']}")
+
+    with open(os.path.join(out_dir, DONE_MARKER), "w") as f:
+        f.write(str(time.time()))
+    return report["date"], len(videos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-render report images and videos for past dates.")
+    parser.add_argument("start", type=parse_date, help="first date, YYYY-MM-DD")
+    parser.add_argument("end", type=parse_date, help="last date, YYYY-MM-DD")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--out", default=BACKFILL_DIR)
+    parser.add_argument("--force", action="store_true", help="re-render dates that are already done")
+    parser.add_argument("--no-video", action="store_true", help="only render images")
+    parser.add_argument("--include-weekends", action="store_true")
+    parser.add_argument("--offline", action="store_true", help="take quotes from the local quote store, not Yahoo")
+    args = parser.parse_args(argv)
+
+    days = list(date_range(args.start, args.end, args.include_weekends))
+    todo = [
+        day for day in days
+        if args.force or not os.path.exists(os.path.join(args.out, day.isoformat(), DONE_MARKER))
+    ]
+    print(f"📅 {len(days)} dates, {len(days) - len(todo)} already done, {len(todo)} to render")
+    if not todo:
+        return
+
+    reports = build_reports(todo, args.out, args.offline)
+    started = time.perf_counter()
+    done = failed = videos = 0
+
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=warmup) as pool:
+        futures = {
+            pool.submit(render_date, report, os.path.join(args.out, day.isoformat()), not args.no_video): day
+            for day, report in sorted(reports.items())
+        }
+        for future in as_completed(futures):
+            day = futures[future]
+            try:
+                _, count = future.result()
+                done += 1
+                videos += count
+                print(f"✅ {day.isoformat()} ({done + failed}/{len(futures)})")
+            except Exception as e:
+                failed += 1
+                print(f"❌ {day.isoformat()} failed: {e}")
+
+    elapsed = time.perf_counter() - started
+    rate = done / (elapsed / 60) if elapsed > 0 else 0.0
+    print(f"📊 Rendered {done} dates ({videos} videos), {failed} failed, "
+          f"{len(todo) - len(reports)} without data in {elapsed:.1f}s — {rate:.1f} dates/minute")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Microbenchmark: compiled headline filter vs. the old per-phrase substring scan.
+
+Run from the repo root:
+    python -m benchmarks.bench_headline_filter [num_headlines]
+"""
+import random
+import sys
+import time
+
+from utils.headline_filter import HEADLINE_FILTER, load_blocklist
+
+WORDS = (
+    "sensex nifty bank rbi fed crude oil rupee dollar inflation gdp fii dii "
+    "rally slips gains falls closes opens higher lower record policy rate cut "
+    "hike earnings quarter profit loss ipo listing shares market global asia "
+    "europe wall street bond yields gold silver metal auto pharma it sector"
+).split()
+
+
+def make_headlines(n, seed=42):
+    rng = random.Random(seed)
+    phrases = load_blocklist()
+    headlines = []
+    for _ in range(n):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(6, 14))]
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), rng.choice(phrases).rstrip("*"))
+        headlines.append(" ".join(words).capitalize())
+    return headlines
+
+
+def legacy_match(title, phrases):
+    lowered = title.lower()
+    return any(phrase in lowered for phrase in phrases)
+
+
+def bench(label, fn, headlines, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        blocked = sum(1 for title in headlines if fn(title))
+        best = min(best, time.perf_counter() - start)
+    rate = len(headlines) / best
+    print(f"{label:<10} {best * 1000:8.2f} ms  {rate:12,.0f} headlines/s  blocked={blocked}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    headlines = make_headlines(n)
+    phrases = [p.rstrip("*") for p in load_blocklist()]
+    print(f"{n} headlines, {len(phrases)} rules")
+    bench("legacy", lambda t: legacy_match(t, phrases), headlines)
+    bench("compiled", HEADLINE_FILTER.match, headlines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Startup benchmark: how long main.py takes to reach the done check and the first request.
+
+Run from the repo root:
+    python -m benchmarks.bench_startup [runs]
+
+Each measurement is a fresh interpreter. "done check" runs main.py in a
+scratch directory whose run manifest already marks today's report as done,
+which is the path cron retries take. "first request" imports main, builds the pipeline and opens
+the HTTP session, which is everything before the first quote is fetched.
+The slowest imports come from `python -X importtime`. Exits non-zero if a
+median is over its target (STARTUP_DONE_TARGET_MS, STARTUP_REQUEST_TARGET_MS).
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pytz
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DONE_TARGET_MS = float(os.getenv("STARTUP_DONE_TARGET_MS", "400"))
+REQUEST_TARGET_MS = float(os.getenv("STARTUP_REQUEST_TARGET_MS", "500"))
+
+FIRST_REQUEST = "import main; main.build_pipeline(); from utils.fetch_data import get_session; get_session()"
+
+
+def today_ist():
+    return datetime.now(pytz.timezone("Asia/Kolkata")).strftime("%d.%m.%Y")
+
+
+def wall_ms(args, cwd, runs):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(args, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def slowest_imports(top=10):
+    """Cumulative import time of main and of the modules it imports directly."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total = 0
+    children = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        cumulative_us = int(parts[1])
+        name = parts[2][1:]
+        if name == "main":
+            total = cumulative_us
+        elif name.startswith("  ") and not name.startswith("   "):
+            children.append((cumulative_us, name.strip()))
+    return total, sorted(children, reverse=True)[:top]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # Edition templates are checked relative to the working directory
+        os.symlink(os.path.join(ROOT, "templates"), os.path.join(scratch, "templates"))
+        os.makedirs(os.path.join(scratch, "output", "premarket"))
+        with open(os.path.join(scratch, "output", "premarket", "manifest.json"), "w") as f:
+            json.dump({"stages": {}, "completed": today_ist()}, f)
+        baseline = wall_ms([sys.executable, "-c", "pass"], scratch, runs)
+        done_check = wall_ms([sys.executable, os.path.join(ROOT, "main.py")], scratch, runs)
+    first_request = wall_ms([sys.executable, "-c", FIRST_REQUEST], ROOT, runs)
+
+    total_us, imports = slowest_imports()
+    print(f"import main: {total_us / 1000:.1f} ms (-X importtime cumulative)")
+    for cumulative_us, name in imports:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    print()
+    print(f"{'interpreter':<15}{baseline:8.1f} ms")
+    failed = False
+    for label, ms, target in [("done check", done_check, DONE_TARGET_MS),
+                              ("first request", first_request, REQUEST_TARGET_MS)]:
+        ok = ms <= target
+        failed |= not ok
+        print(f"{label:<15}{ms:8.1f} ms  (target {target:.0f} ms) {'✅' if ok else '❌'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
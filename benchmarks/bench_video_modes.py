@@ -0,0 +1,59 @@
+"""Wall time of each video render mode and profile on synthetic inputs.
+
+Pass a longer duration to compare how each mode scales with the
+narration length.
+
+Needs the ffmpeg binary on PATH. Run from the repo root:
+    python -m benchmarks.bench_video_modes [audio_seconds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import ffmpeg
+from PIL import Image, ImageDraw
+
+from utils.video_creator import VIDEO_MODES, VIDEO_PROFILES, render_videos
+
+
+def make_inputs(directory, seconds):
+    frames = []
+    for name, size in (("wide.jpg", (1920, 1080)), ("insta.jpg", (1080, 1350))):
+        img = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(img)
+        for y in range(0, size[1], 40):
+            draw.text((40, y), "NIFTY 50   24,512   +112   +0.46%   Bullish", fill="black")
+        path = os.path.join(directory, name)
+        img.save(path, quality=95)
+        frames.append(path)
+
+    audio_path = os.path.join(directory, "narration.mp3")
+    (
+        ffmpeg
+        .input(f"sine=frequency=220:duration={seconds}", f="lavfi")
+        .output(audio_path, acodec="libmp3lame")
+        .run(overwrite_output=True, quiet=True)
+    )
+    return frames, audio_path
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    with tempfile.TemporaryDirectory() as directory:
+        frames, audio_path = make_inputs(directory, seconds)
+        outputs = [os.path.join(directory, f"out_{i}.mp4") for i in range(len(frames))]
+        print(f"{len(frames)} renditions, {seconds:.0f}s of audio")
+        for profile in VIDEO_PROFILES:
+            for mode in VIDEO_MODES:
+                start = time.perf_counter()
+                # Still mode takes decoded images, the others read from disk
+                sources = [Image.open(f) for f in frames] if mode == "still" else frames
+                renditions = list(zip(sources, outputs))
+                written = render_videos(renditions, audio_path, seconds, mode=mode, profile=profile)
+                elapsed = time.perf_counter() - start
+                print(f"{profile:<10} {mode:<11} {elapsed:7.2f} s  written={len(written)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,222 +1,257 @@
+import argparse
 import os
-import time
-import requests
+from functools import partial
 from dotenv import load_dotenv
 
-from utils.fetch_data import get_yahoo_price_with_change, get_et_market_articles
-from utils.image_templates import create_combined_market_image, create_thumbnail_image, create_instagram_image
+from utils.fetch_data import get_market_series, get_et_market_articles
+from utils.image_templates import render_combined_market_image, render_thumbnail_image, render_instagram_image
 from utils.script_generator import generate_youtube_script_from_report as generate_script_from_report
-from utils.audio_generator import generate_audio_with_polly as generate_audio
+from utils.audio_generator import generate_audio_with_polly as generate_audio, StreamingSynthesis
 from utils.video_creator import create_video_from_images_and_audio as generate_video
-from utils.telegram_alert import send_telegram_message, send_telegram_file
+from utils.telegram_alert import (
+    send_telegram_message, send_telegram_file, send_telegram_artifact, send_telegram_media_group, LiveMessage
+)
+from utils.pipeline import Pipeline, PipelineAbort
+from utils.report_table import build_table
+from utils.telegram_bot import ApprovalBot
+from utils.speculation import SpeculativeRender, discard_all
+from utils.instrumentation import RECORDER
+from utils.checkpoint import Checkpoint, RunManifest
+from utils.editions import EDITIONS, DEFAULT_EDITION, Job
+from utils.scheduler import Scheduler
+from utils.slides import build_slides
 
 load_dotenv()
-TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
-GET_UPDATES_URL = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/getUpdates"
-OFFSET_FILE = "output/last_update.txt"
-LOCK_FILE = "output/.lock"
-
-def wait_for_telegram_reply(prompt_text=None):
-    if prompt_text:
-        send_telegram_message(prompt_text)
-
-    os.makedirs("output", exist_ok=True)
+# Produce audio and video for each candidate script while it awaits approval
+SPECULATIVE = os.getenv("SPECULATIVE", "0") == "1"
+# Compose the Instagram video from the date, report, news and thank-you slides
+SLIDE_VIDEO = os.getenv("SLIDE_VIDEO", "1") == "1"
+# Send the run report's summary to Telegram once the run is over
+RUN_SUMMARY = os.getenv("RUN_SUMMARY", "1") == "1"
+# Keep each run's bars and quotes in the local quote store
+QUOTE_HISTORY = os.getenv("QUOTE_HISTORY", "1") == "1"
+
+# One long-polling bot gates every approval prompt in this process
+APPROVAL_BOT = ApprovalBot()
+
+def wait_for_telegram_reply(prompt_text=None, job=None, stage=None):
+    return APPROVAL_BOT.wait_sync(prompt_text, job=job, stage=stage)
+
+def get_current_date_ist(job):
+    return job.today()
+
+def fetch_quotes(job, date_text):
+    # Fetch every symbol in one concurrent batch
+    series = get_market_series(job.edition.symbols)
+    if QUOTE_HISTORY:
+        record_quotes(series)
+    return series.to_quotes()
+
+def record_quotes(series):
+    from utils.quote_store import QUOTES
     try:
-        res = requests.get(GET_UPDATES_URL)
-        data = res.json()
-        if data.get("result"):
-            last_update_id = data["result"][-1]["update_id"]
-            with open(OFFSET_FILE, "w") as f:
-                f.write(str(last_update_id))
-        else:
-            with open(OFFSET_FILE, "w") as f:
-                f.write("0")
-    except Exception:
-        with open(OFFSET_FILE, "w") as f:
-            f.write("0")
+        print(f"🗄️ Stored bars for {QUOTES.record(series)} symbols")
+    except Exception as e:
+        print(f"⚠️ Could not store quote history: {e}")
 
-    while True:
-        try:
-            with open(OFFSET_FILE, "r") as f:
-                last_update_id = f.read().strip()
-            params = {"timeout": 30}
-            if last_update_id:
-                params["offset"] = int(last_update_id) + 1
-
-            res = requests.get(GET_UPDATES_URL, params=params)
-            data = res.json()
-            for result in data.get("result", []):
-                last_update_id = result["update_id"]
-                message_text = result["message"]["text"].strip().lower()
-                with open(OFFSET_FILE, "w") as f:
-                    f.write(str(last_update_id))
-
-                if message_text == "yes":
-                    return True
-                elif message_text == "no":
-                    return False
-                else:
-                    send_telegram_message("❌ Invalid reply. Type 'yes' or 'no'.")
-            time.sleep(5)
-        except Exception as e:
-            send_telegram_message(f"⚠️ Error waiting for reply: {e}")
-            time.sleep(5)
-
-def get_current_date_ist():
-    from datetime import datetime
-    import pytz
-    ist = pytz.timezone("Asia/Kolkata")
-    return datetime.now(ist).strftime("%d.%m.%Y")
+def build_market_table(job, quotes):
+    return build_table(quotes, indian_count=len(job.edition.indian_symbols))
 
-def classify_sentiment(change):
-    try:
-        change = float(change)
-    except (ValueError, TypeError):
-        return "Neutral"
-
-    if change > 0.7:
-        return "Bullish"
-    elif change > 0.3:
-        return "Slight Bullish"
-    elif change < -0.7:
-        return "Bearish"
-    elif change < -0.3:
-        return "Slight Bearish"
-    else:
-        return "Neutral"
+def fetch_news_report(date_text):
+    news_items = get_et_market_articles(limit=5)
+    return "\n\n".join([f"• {item['title']}" for item in news_items])
 
-def format_table_row(label, price, change_pts, change_pct):
-    try:
-        sentiment = classify_sentiment(change_pct)
-        formatted_price = f"{int(price):,}"
-        formatted_change_pts = f"{int(change_pts):+}"
-        formatted_change_pct = f"{float(change_pct):+.2f}%"
-    except (ValueError, TypeError):
+def build_report_text(table, news_report):
+    return table.to_text() + "\n\n" + news_report
+
+def store_image(job, name, image, default_format="PNG"):
+    # Keep rendered images in memory; each format is encoded once when needed
+    if image is None:
         return None
-    return [label, formatted_price, formatted_change_pts, formatted_change_pct, sentiment]
+    return job.artifacts.put(name, image, default_format)
 
-def main():
-    if os.path.exists(LOCK_FILE):
-        print("🛑 Script already ran. Skipping to save API usage.")
-        return
-    os.makedirs("output", exist_ok=True)
-    with open(LOCK_FILE, "w") as f:
-        f.write("locked")
-
-    # ✅ Create Thumbnail First
-    date_text = get_current_date_ist()
-    thumbnail_path = create_thumbnail_image(date_text)
-    if thumbnail_path and os.path.exists(thumbnail_path):
-        send_telegram_file(thumbnail_path, "🖼️ Thumbnail Preview")
-
-    indian_symbols = [
-        ("^NSEI", "NIFTY 50"),
-        ("^BSESN", "SENSEX"),
-        ("^NSEBANK", "BANK NIFTY")
-    ]
-    global_symbols = [
-        ("^DJI", "Dow Jones"),
-        ("^IXIC", "NASDAQ"),
-        ("^FTSE", "FTSE 100"),
-        ("^N225", "Nikkei 225")
-    ]
-
-    indian_data = [get_yahoo_price_with_change(sym, lbl) for sym, lbl in indian_symbols]
-    global_data = [get_yahoo_price_with_change(sym, lbl) for sym, lbl in global_symbols]
-
-    table_rows = []
-    table_rows.append(["Index", "Price", "Change", "%Change", "Sentiment"])
-
-    for item in indian_data:
-        if item:
-            row = format_table_row(item["label"], item["price"], item["change_pts"], item["change_pct"])
-            if row:
-                table_rows.append(row)
-
-    # Spacer rows for market report image only
-    table_rows.append(["", "", "", "", ""])
-    table_rows.append(["", "", "", "", ""])
-    table_rows.append(["", "", "", "", ""])
-    table_rows.append(["Index", "Price", "Change", "%Change", "Sentiment"])
-
-    for item in global_data:
-        if item:
-            row = format_table_row(item["label"], item["price"], item["change_pts"], item["change_pct"])
-            if row:
-                table_rows.append(row)
+def create_thumbnail(job, date_text):
+    image = render_thumbnail_image(date_text, template_path=job.edition.templates["thumbnail"])
+    return store_image(job, "thumbnail_image", image, "JPEG")
 
-    news_items = get_et_market_articles(limit=5)
-    news_report = "\n\n".join([f"• {item['title']}" for item in news_items])
+def create_market_image(job, date_text, table, news_report):
+    image = render_combined_market_image(date_text, table, news_report,
+                                         template_path=job.edition.templates["market"])
+    return store_image(job, "final_image", image)
 
-    final_img = create_combined_market_image(
-        date_text,
-        table_rows,
-        news_report
-    )
-    if final_img and os.path.exists(final_img):
-        send_telegram_file(final_img, "🖼️ Market Report")
-    else:
+def create_insta_image(job, date_text, table, news_report):
+    image = render_instagram_image(date_text, table, news_report, template_path=job.edition.templates["insta"])
+    return store_image(job, "insta_image", image, "JPEG")
+
+def create_slides(job, date_text, table, news_report):
+    # Only planned here; each slide renders while the video is encoded
+    if not SLIDE_VIDEO:
+        return None
+    return build_slides(date_text, table, news_report, job.edition.templates)
+
+def send_thumbnail(job, thumbnail):
+    # Uploads run in the background; later stages only wait where it matters
+    if thumbnail:
+        job.uploads.submit(send_telegram_artifact, thumbnail, f"🖼️ {job.edition.title} Thumbnail Preview")
+
+def send_previews(job, final_img, insta_img):
+    if not final_img:
         send_telegram_message("❌ Failed to create market image.")
-        return
+        raise PipelineAbort("market image")
+    # Both layouts go out together as one album
+    previews = [(final_img, "🖼️ Market Report"), (insta_img, "🖼️ Instagram Layout Preview")]
+    job.uploads.submit(send_telegram_media_group, [
+        (artifact.open(), artifact.filename(), caption) for artifact, caption in previews if artifact
+    ])
+
+def draft_script(job, report_text, live=False, variant=0):
+    """Generate a script, handing each sentence on as soon as it is written.
+
+    With SPECULATIVE=1 the sentences feed Polly while GPT is still writing.
+    With live=True they also appear in Telegram as one growing message.
+    Each variant of a report is cached, so reruns replay it for free.
+    Returns (script_text, synthesis).
+    """
+    edition = job.edition
+    synthesis = StreamingSynthesis(voice_id=edition.voice_id, directory=job.path("speculative")) if SPECULATIVE else None
+    message = LiveMessage("📝 Generated Script:\n\n") if live else None
+    sentences = []
+
+    def on_sentence(sentence):
+        sentences.append(sentence)
+        if synthesis:
+            synthesis.feed(sentence)
+        if message:
+            message.update(" ".join(sentences))
+
+    script_text = generate_script_from_report(report_text, on_sentence=on_sentence, variant=variant,
+                                              prompt=edition.prompt)
+    if message:
+        message.finish(script_text)
+    return script_text, synthesis
+
+def speculate(job, script_text, images, synthesis=None):
+    """Start audio and video for a candidate script before it is approved."""
+    if not SPECULATIVE:
+        return None
 
-    # ✅ Remove blank rows and second header for Instagram version
-    table_rows_cleaned = [
-        row for i, row in enumerate(table_rows)
-        if any(cell.strip() for cell in row) and not (i != 0 and row == ["Index", "Price", "Change", "%Change", "Sentiment"])
-    ]
+    def render(audio_path, output_dir, cancelled):
+        return render_final_videos(images, audio_path, output_dir, script_text, cancelled)
 
-    insta_img = create_instagram_image(
-        date_text,
-        table_rows_cleaned,
-        news_report
+    if synthesis:
+        # Audio for a streamed script is already being synthesized; rejecting it cancels the synthesis too
+        synthesize = lambda text, path, cancelled: synthesis.finish(path)
+    else:
+        synthesize = lambda text, path, cancelled: generate_audio(text, voice_id=job.edition.voice_id,
+                                                                  output_path=path, cancelled=cancelled)
+    return SpeculativeRender(script_text, synthesize, render, directory=job.path("speculative"))
+
+def video_images(final_img, insta_img, slides):
+    # Runs alongside send_previews, which reports the failed render
+    if not final_img:
+        raise PipelineAbort("market image")
+    return (final_img.image, insta_img.image if insta_img else None, slides)
+
+def render_final_videos(images, audio_path, output_dir, script_text, cancelled=None):
+    image, insta_image, slides = images
+    return generate_video(
+        os.path.join(output_dir, "final_video.mp4"),
+        images=(image, insta_image),
+        audio_path=audio_path,
+        insta_video_output=os.path.join(output_dir, "insta_video.mp4"),
+        slides=slides,
+        script_text=script_text,
+        cancelled=cancelled
     )
-    if insta_img and os.path.exists(insta_img):
-        send_telegram_file(insta_img, "🖼️ Instagram Layout Preview")
-
-    with open(OFFSET_FILE, "w") as f:
-        f.write("0")
 
+def approve_script(job, script_draft, report_text, images, _previews_sent):
+    script_text, synthesis = script_draft
+    # The first draft is written while previews are sent, so it is posted
+    # whole; regenerated drafts stream into Telegram as they are written
+    posted = False
+    variant = 0
     while True:
-        combined_text = "\n".join(["\t".join(row) for row in table_rows]) + "\n\n" + news_report
-        script_text = generate_script_from_report(combined_text)
-        send_telegram_message(f"📝 Generated Script:\n\n{script_text}")
-        if wait_for_telegram_reply("🤖 Proceed to generate audio? Reply 'yes' to continue or 'no' to regenerate script."):
-            break
-
+        speculation = speculate(job, script_text, images, synthesis)
+        if not posted:
+            # The previews the script refers to should be in the chat first
+            job.uploads.flush()
+            send_telegram_message(f"📝 Generated Script:\n\n{script_text}")
+        if wait_for_telegram_reply("🤖 Proceed to generate audio? Reply 'yes' to continue or 'no' to regenerate script.",
+                                   job=job.name, stage="script"):
+            return script_text, speculation
+        if speculation:
+            speculation.cancel()
+        if synthesis:
+            synthesis.cancel()
+        variant += 1
+        script_text, synthesis = draft_script(job, report_text, live=True, variant=variant)
+        posted = True
+
+def approve_audio(job, approved_script, images):
+    script_text, speculation = approved_script
+    audio_dest = job.path("output_polly.mp3")
     while True:
-        audio_path = generate_audio(script_text)
-        if audio_path and os.path.exists(audio_path):
-            send_telegram_file(audio_path, "🎤 Audio Generated")
+        if speculation:
+            audio_path = speculation.take_audio(audio_dest)
         else:
+            audio_path = generate_audio(script_text, voice_id=job.edition.voice_id, output_path=audio_dest)
+        if not audio_path or not os.path.exists(audio_path):
+            # Nothing to approve; the video needs an audio file
             send_telegram_message("❌ Audio generation failed. Retrying...")
-        if wait_for_telegram_reply("▶️ Proceed to generate video? Reply 'yes' to continue or 'no' to regenerate audio."):
-            break
-
+        else:
+            send_telegram_file(audio_path, "🎤 Audio Generated")
+            if wait_for_telegram_reply("▶️ Proceed to generate video? Reply 'yes' to continue or 'no' to regenerate audio.",
+                                       job=job.name, stage="audio"):
+                return audio_path, speculation
+        if speculation:
+            speculation.cancel()
+        speculation = speculate(job, script_text, images)
+
+def approve_video(job, date_text, approved_script, approved_audio, images):
+    script_text, _ = approved_script
+    audio_path, speculation = approved_audio
+    insta_video_path = job.path("insta_video.mp4")
     while True:
-        video_path = generate_video()
+        video_path = None
+        if speculation:
+            # Already rendered while the audio was waiting for approval
+            video_path = speculation.take_videos(job.workdir)
+            speculation.cleanup()
+            speculation = None
+        if video_path is None:
+            video_path = render_final_videos(images, audio_path, job.workdir, script_text)
         if video_path and os.path.exists(video_path):
-            send_telegram_file(video_path, "✅ Final Video")
+            # Both videos upload at the same time
+            job.uploads.submit(send_telegram_file, video_path, "✅ Final Video")
 
-            insta_video_path = "output/insta_video.mp4"
             if os.path.exists(insta_video_path):
-                send_telegram_file(insta_video_path, "✅ Instagram Video Version")
+                job.uploads.submit(send_telegram_file, insta_video_path, "✅ Instagram Video Version")
 
-            # ✅ Generate YouTube title + description
-            from datetime import datetime
-            import calendar
+            job.uploads.flush()
+            send_youtube_details(date_text, job.edition.title)
 
-            def get_ordinal_day(day: int):
-                return f"{day}{'th' if 11 <= day <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')}"
+        else:
+            send_telegram_message("❌ Video generation failed. Retrying...")
+        if wait_for_telegram_reply("🎬 Happy with this video? Reply 'yes' to finish or 'no' to regenerate video.",
+                                   job=job.name, stage="video"):
+            return video_path
 
-            try:
-                dt = datetime.strptime(date_text, "%d.%m.%Y")
-                long_date = f"{get_ordinal_day(dt.day)} {calendar.month_name[dt.month]} {dt.year}"
-            except Exception as e:
-                long_date = date_text  # fallback
+def send_youtube_details(date_text, report_title="Pre Market Report"):
+    # ✅ Generate YouTube title + description
+    from datetime import datetime
+    import calendar
 
-            youtube_title = f"Pre Market Report – {long_date} | Nifty, Sensex, Global Market News"
-            youtube_description = f"""Welcome to today's Pre Market Report!
+    def get_ordinal_day(day: int):
+        return f"{day}{'th' if 11 <= day <= 13 else {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')}"
+
+    try:
+        dt = datetime.strptime(date_text, "%d.%m.%Y")
+        long_date = f"{get_ordinal_day(dt.day)} {calendar.month_name[dt.month]} {dt.year}"
+    except Exception:
+        long_date = date_text  # fallback
+
+    youtube_title = f"{report_title} – {long_date} | Nifty, Sensex, Global Market News"
+    youtube_description = f"""Welcome to today's {report_title}!
 
 In this video:
 ✅ Nifty 50 & Sensex performance  
@@ -230,15 +265,156 @@ Stay ahead of the curve with our accurate and timely market updates. Ideal for r
 👍 Like | 💬 Comment | 📢 Share
 
 📅 Date: {date_text}
-📊 Report Type: Pre Market Report
+📊 Report Type: {report_title}
 🌐 Language: English/Hinglish
 """
-            send_telegram_message(f"🎥 *YouTube Video Details:*\n\n*Title:* {youtube_title}\n\n*Description:*\n{youtube_description}")
-
+    send_telegram_message(f"🎥 *YouTube Video Details:*\n\n*Title:* {youtube_title}\n\n*Description:*\n{youtube_description}")
+
+# Approval stages hand on (text or path, speculation); only the first half is kept
+FIRST_OF_PAIR = Checkpoint(dump=lambda result: result[0], load=lambda value: (value, None))
+AUDIO_CHECKPOINT = Checkpoint(dump=lambda result: result[0], load=lambda value: (value, None),
+                              artifact=lambda path: path)
+FILE_CHECKPOINT = Checkpoint(artifact=lambda path: path)
+# Sends are checkpointed so a resumed run doesn't post the same preview twice
+DONE = Checkpoint()
+
+def build_pipeline(job=None, manifest=None):
+    """Declare one edition's report as a dependency graph of stages.
+
+    The thumbnail, quotes and news have no dependencies on each other and
+    start together. The first script draft is requested from GPT as soon as
+    the table and news are known, so it is usually ready by the time the
+    preview images have been sent. Previews upload in the background and
+    the script is posted once they are done; the approval loops run last.
+
+    With SPECULATIVE=1, each candidate script has its audio and videos
+    produced in the background while it waits for approval; the audio
+    starts from the first finished sentences, before GPT is done.
+
+    Fetches, sends, drafts, approvals and the media files are checkpointed
+    in the manifest, so a restart after a crash picks up where it stopped.
+    Images are cheap and are simply rendered again.
+    """
+    job = job or Job(EDITIONS[DEFAULT_EDITION])
+    bind = lambda fn: partial(fn, job)
+    pipeline = Pipeline(manifest=manifest, job=job.name)
+    pipeline.add("date", bind(get_current_date_ist))
+    pipeline.add("thumbnail", bind(create_thumbnail), deps=["date"])
+    pipeline.add("send_thumbnail", bind(send_thumbnail), deps=["thumbnail"], checkpoint=DONE)
+    # Fetches depend on the date so the next day's run doesn't restore yesterday's
+    pipeline.add("quotes", bind(fetch_quotes), deps=["date"], checkpoint=Checkpoint())
+    pipeline.add("news", fetch_news_report, deps=["date"], checkpoint=Checkpoint())
+    pipeline.add("table", bind(build_market_table), deps=["quotes"])
+    pipeline.add("market_image", bind(create_market_image), deps=["date", "table", "news"])
+    pipeline.add("insta_image", bind(create_insta_image), deps=["date", "table", "news"])
+    pipeline.add("send_previews", bind(send_previews), deps=["market_image", "insta_image"], checkpoint=DONE)
+    pipeline.add("report_text", build_report_text, deps=["table", "news"])
+    pipeline.add("script_draft", bind(draft_script), deps=["report_text"], checkpoint=FIRST_OF_PAIR)
+    pipeline.add("slides", bind(create_slides), deps=["date", "table", "news"])
+    pipeline.add("video_images", video_images, deps=["market_image", "insta_image", "slides"])
+    pipeline.add("script", bind(approve_script), deps=["script_draft", "report_text", "video_images", "send_previews"],
+                 checkpoint=FIRST_OF_PAIR)
+    pipeline.add("audio", bind(approve_audio), deps=["script", "video_images"], checkpoint=AUDIO_CHECKPOINT)
+    pipeline.add("video", bind(approve_video), deps=["date", "script", "audio", "video_images"],
+                 checkpoint=FILE_CHECKPOINT)
+    return pipeline
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build and send today's market reports.")
+    parser.add_argument("--edition", action="append", choices=sorted(EDITIONS),
+                        help=f"edition to run now; repeat to run several side by side (default: {DEFAULT_EDITION})")
+    parser.add_argument("--daemon", action="store_true",
+                        help="stay running and start every edition (or the --edition ones) on its schedule")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore saved progress and run every stage again")
+    parser.add_argument("--from-stage", metavar="STAGE",
+                        help="run this stage and everything after it again, reusing earlier stages")
+    return parser.parse_args(argv)
+
+def run_job(edition, force=False, from_stage=None):
+    """Run one edition in its own working directory. Returns False if it was already done today."""
+    job = Job(edition)
+    manifest = RunManifest(job.path("manifest.json"))
+    pipeline = build_pipeline(job, manifest)
+    run_key = job.today()
+
+    if force:
+        manifest.reset()
+    elif from_stage:
+        manifest.invalidate({from_stage} | pipeline.downstream(from_stage))
+    elif manifest.completed == run_key:
+        print(f"🛑 Today's {edition.title} is already done. Skipping to save API usage (use --force to run again).")
+        return False
+
+    print(f"🚀 Starting {edition.title} in {job.workdir}")
+    try:
+        pipeline.run()
+        manifest.mark_complete(run_key)
+    except PipelineAbort:
+        pass
+    finally:
+        job.uploads.flush()
+        # Rejected candidates may still be encoding; their files go once they stop
+        discard_all(job.path("speculative"))
+        print(f"[{edition.name}] " + pipeline.report())
+    return True
+
+def finish_report():
+    print(f"📈 Run report saved to: {RECORDER.write()}")
+    if RUN_SUMMARY:
+        send_telegram_message(RECORDER.summary_text())
+    RECORDER.reset()
+
+def ready_editions(editions, named=True):
+    """The editions whose templates are all in place.
+
+    An edition asked for by name without them is an error; one picked up
+    by default is only skipped.
+    """
+    ready = []
+    for edition in editions:
+        missing = edition.missing_templates()
+        if not missing:
+            ready.append(edition)
+        elif named:
+            raise SystemExit(f"❌ {edition.title} is missing templates: {', '.join(missing)}")
         else:
-            send_telegram_message("❌ Video generation failed. Retrying...")
-        if wait_for_telegram_reply("🎬 Happy with this video? Reply 'yes' to finish or 'no' to regenerate video."):
-            break
+            print(f"⚠️ Not scheduling {edition.title} until its templates exist: {', '.join(missing)}")
+    return ready
+
+def main(argv=None):
+    args = parse_args(argv)
+    editions = [EDITIONS[name] for name in dict.fromkeys(args.edition or ([] if args.daemon else [DEFAULT_EDITION]))]
+    if args.from_stage and args.from_stage not in build_pipeline().stages:
+        raise SystemExit(f"Unknown stage {args.from_stage!r}. Stages: {', '.join(build_pipeline().order())}")
+    editions = ready_editions(editions) if editions else ready_editions(EDITIONS.values(), named=False)
+
+    if args.daemon:
+        scheduler = Scheduler(editions, run_job, on_idle=finish_report)
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            print("👋 Stopping the scheduler once running jobs finish.")
+            scheduler.stop()
+            scheduler.join()
+        finally:
+            APPROVAL_BOT.stop()
+        return
+
+    RECORDER.reset()
+    # Editions share the fetch caches, API rate limits and encode slots
+    scheduler = Scheduler(editions, partial(run_job, force=args.force, from_stage=args.from_stage))
+    try:
+        for edition in editions:
+            scheduler.start(edition.name)
+        scheduler.join()
+    finally:
+        APPROVAL_BOT.stop()
+    # Nothing is reported when every edition was already done today
+    if RECORDER.spans:
+        finish_report()
+    if scheduler.failures:
+        raise SystemExit(f"❌ Failed: {', '.join(scheduler.failures)}")
 
 if __name__ == "__main__":
     main()
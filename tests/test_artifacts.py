@@ -0,0 +1,37 @@
+import io
+
+from PIL import Image
+
+from utils import artifacts
+from utils.artifacts import ArtifactStore, save_image
+
+
+def test_each_format_is_encoded_once(monkeypatch):
+    calls = []
+    encode = artifacts.encode_image
+
+    def counting_encode(image, fmt="PNG"):
+        calls.append(fmt)
+        return encode(image, fmt)
+
+    monkeypatch.setattr(artifacts, "encode_image", counting_encode)
+    store = ArtifactStore()
+    artifact = store.put("final_image", Image.new("RGB", (64, 32), "white"))
+
+    assert artifact.encode() == artifact.encode("PNG")
+    assert artifact.open("JPEG").read() == artifact.encode("JPEG")
+    assert calls == ["PNG", "JPEG"]
+    assert artifact.filename() == "final_image.png"
+    assert artifact.filename("JPEG") == "final_image.jpg"
+    assert Image.open(io.BytesIO(artifact.encode("JPEG"))).format == "JPEG"
+    assert store.get("final_image") is artifact
+    store.discard("final_image")
+    assert store.get("final_image") is None
+
+
+def test_save_picks_the_format_from_the_extension(tmp_path):
+    image = Image.new("RGBA", (16, 16), "red")
+    png = save_image(image, str(tmp_path / "out" / "slide.png"))
+    jpg = save_image(image, str(tmp_path / "slide.jpg"))
+    assert Image.open(png).format == "PNG"
+    assert Image.open(jpg).format == "JPEG"
@@ -0,0 +1,108 @@
+import os
+import threading
+
+import ffmpeg
+from pydub import AudioSegment
+
+from utils.audio_generator import (
+    StreamingSynthesis, StubBackend, generate_audio_with_polly, get_audio_duration, split_script
+)
+from utils.cache import DiskCache
+
+
+def test_split_script_packs_whole_sentences():
+    text = "First sentence here. Second one! Third? " + "word " * 30
+    chunks, text_type = split_script(text, max_chars=40)
+    assert text_type == "text"
+    assert chunks[0] == "First sentence here. Second one! Third?"
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_split_script_keeps_ssml_valid():
+    text = '<speak>Good morning.<break time="500ms"/> Markets opened higher today. Banks led.</speak>'
+    chunks, text_type = split_script(text, max_chars=60)
+    assert text_type == "ssml"
+    assert len(chunks) > 1
+    assert all(c.startswith("<speak>") and c.endswith("</speak>") and len(c) <= 60 for c in chunks)
+    assert chunks[0] == '<speak>Good morning.<break time="500ms"/></speak>'
+
+
+def test_chunks_are_synthesized_and_joined_without_gaps(tmp_path):
+    backend = StubBackend(ms_per_char=10)
+    script = "Nifty closed higher. " * 20
+    output = str(tmp_path / "out.mp3")
+
+    assert generate_audio_with_polly(script, output_path=output, backend=backend, max_chars=100,
+                                     cache=None) == output
+    assert len(backend.calls) > 1
+    expected_ms = sum(len(chunk) for chunk in backend.calls) * 10
+    # MP3 frames pad each chunk a little; no chunk adds a pause of its own
+    assert abs(len(AudioSegment.from_file(output)) - expected_ms) < 50 * len(backend.calls)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.mp3"]
+
+
+def test_repeat_synthesis_is_served_from_cache(tmp_path, monkeypatch):
+    cache = DiskCache("audio", ttl=float("inf"), directory=str(tmp_path / "cache"))
+    backend = StubBackend(ms_per_char=10)
+    first = str(tmp_path / "first.mp3")
+    second = str(tmp_path / "second.mp3")
+
+    generate_audio_with_polly("Nifty closed higher.", output_path=first, backend=backend, cache=cache)
+    duration = get_audio_duration(first)
+    # Whitespace differences don't change what Polly would say
+    generate_audio_with_polly("  Nifty closed\nhigher. ", output_path=second, backend=backend, cache=cache)
+
+    assert len(backend.calls) == 1
+    assert open(first, "rb").read() == open(second, "rb").read()
+
+    def probe(path):
+        raise AssertionError("duration should come from the cache")
+    monkeypatch.setattr(ffmpeg, "probe", probe)
+    assert get_audio_duration(second) == duration
+
+
+def test_streamed_sentences_start_synthesis_early_and_fill_the_cache(tmp_path):
+    cache = DiskCache("audio", ttl=float("inf"), directory=str(tmp_path / "cache"))
+    backend = StubBackend(ms_per_char=5)
+    synthesis = StreamingSynthesis(backend=backend, directory=str(tmp_path), min_chars=40, cache=cache)
+    sentences = ["Nifty closed higher yesterday.", "Banks led the gains.", "Global cues are mixed.", "Subscribe!"]
+
+    synthesis.feed(sentences[0])
+    synthesis.feed(sentences[1])
+    assert len(synthesis._chunks) == 1
+    for sentence in sentences[2:]:
+        synthesis.feed(sentence)
+    output = str(tmp_path / "out.mp3")
+    assert synthesis.finish(output) == output
+    assert " ".join(backend.calls).split() == " ".join(sentences).split()
+
+    calls = len(backend.calls)
+    generate_audio_with_polly("\n".join(sentences), output_path=str(tmp_path / "again.mp3"), backend=backend,
+                              cache=cache)
+    assert len(backend.calls) == calls
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["again.mp3", "cache", "out.mp3"]
+
+
+def test_cancelled_stream_lets_the_running_chunk_finish_before_cleaning_up(tmp_path, capsys):
+    started, release = threading.Event(), threading.Event()
+    written = []
+
+    class SlowBackend(StubBackend):
+        def synthesize(self, text, output_path, voice_id, engine, text_type="text"):
+            started.set()
+            release.wait(5)
+            written.append(super().synthesize(text, output_path, voice_id, engine, text_type))
+
+    synthesis = StreamingSynthesis(backend=SlowBackend(ms_per_char=1), directory=str(tmp_path), min_chars=10,
+                                   cache=None)
+    synthesis.feed("Nifty closed higher yesterday.")
+    assert started.wait(5)
+    synthesis.cancel()
+    assert os.listdir(tmp_path)
+    release.set()
+    assert synthesis.finish(str(tmp_path / "out.mp3")) is None
+
+    assert len(written) == 1
+    assert os.listdir(tmp_path) == []
+    assert "Error" not in capsys.readouterr().out
@@ -0,0 +1,31 @@
+from datetime import date
+
+import backfill
+from utils.fetch_data import quote_before
+
+
+def test_date_range_skips_weekends_by_default():
+    # 2026-10-16 is a Friday
+    days = list(backfill.date_range(date(2026, 10, 16), date(2026, 10, 19)))
+    assert days == [date(2026, 10, 16), date(2026, 10, 19)]
+    assert len(list(backfill.date_range(date(2026, 10, 16), date(2026, 10, 19), include_weekends=True))) == 4
+
+
+def test_quote_before_uses_the_last_two_sessions_before_the_date():
+    candles = [(date(2026, 10, 14), 100.0), (date(2026, 10, 15), 102.0), (date(2026, 10, 16), 101.0)]
+    quote = quote_before(candles, "NIFTY 50", date(2026, 10, 16))
+    assert (quote["price"], quote["change_pts"], quote["change_pct"]) == (102.0, 2.0, 2.0)
+    assert quote_before(candles, "NIFTY 50", date(2026, 10, 15))["price"] == "❌"
+
+
+def test_cached_reports_are_reused(tmp_path, monkeypatch):
+    out_dir = tmp_path / "2026-10-16"
+    out_dir.mkdir()
+    (out_dir / "report.json").write_text('{"date": "2026-10-16", "quotes": [{"label": "x"}], "news": "• cached"}')
+
+    def no_fetch(*args, **kwargs):
+        raise AssertionError("history should not be fetched")
+
+    monkeypatch.setattr(backfill, "get_yahoo_history", no_fetch)
+    reports = backfill.build_reports([date(2026, 10, 16)], str(tmp_path))
+    assert reports[date(2026, 10, 16)]["news"] == "• cached"
@@ -0,0 +1,123 @@
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import fetch_data
+from utils.cache import DiskCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache("test", ttl=60, max_entries=3, max_bytes=1024, directory=str(tmp_path))
+
+
+def _age(cache, key, seconds):
+    # Push an entry's fetch time into the past without sleeping
+    meta_path, _ = cache._paths(key)
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta["fetched_at"] -= seconds
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+
+
+def test_entries_expire_after_ttl(cache):
+    assert cache.get("a") is None
+    cache.set("a", b"body", etag='"v1"')
+    entry = cache.get("a")
+    assert entry["body"] == b"body" and entry["fresh"] and entry["etag"] == '"v1"'
+
+    _age(cache, "a", 61)
+    entry = cache.get("a")
+    # Stale entries are still returned, for revalidation and as a fallback
+    assert entry["body"] == b"body" and not entry["fresh"]
+    cache.refresh("a")
+    assert cache.get("a")["fresh"]
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for i, key in enumerate("abc"):
+        cache.set(key, b"x")
+        # mtime is the LRU clock; space the entries out
+        os.utime(cache._paths(key)[1], (time.time() - 100 + i, time.time() - 100 + i))
+    cache.get("a")  # a is now the most recently used
+    cache.set("d", b"x")
+    assert cache.get("b") is None
+    assert all(cache.get(key) for key in "acd")
+
+
+def test_eviction_respects_max_bytes(cache):
+    cache.set("big", b"x" * 800)
+    os.utime(cache._paths("big")[1], (time.time() - 100, time.time() - 100))
+    cache.set("bigger", b"y" * 800)
+    assert cache.get("big") is None
+    assert cache.get("bigger")["body"] == b"y" * 800
+
+
+def _response(status_code, content=b"", headers=None):
+    return SimpleNamespace(status_code=status_code, content=content, headers=headers or {})
+
+
+def test_cached_get_revalidates_with_304(cache, monkeypatch):
+    cache.ttl = 0
+    calls = []
+
+    def fake_get(url, params=None, headers=None, timeout=10, retries=2):
+        calls.append(dict(headers or {}))
+        if len(calls) == 1:
+            return _response(200, b"feed", {"ETag": '"v1"', "Last-Modified": "Sat, 17 Oct 2026 08:00:00 GMT"})
+        return _response(304)
+
+    monkeypatch.setattr(fetch_data, "get_with_retries", fake_get)
+    assert fetch_data.cached_get(cache, "https://example.com/rss") == b"feed"
+    assert fetch_data.cached_get(cache, "https://example.com/rss") == b"feed"
+    assert calls[0] == {}
+    assert calls[1] == {"If-None-Match": '"v1"', "If-Modified-Since": "Sat, 17 Oct 2026 08:00:00 GMT"}
+
+
+def test_cached_get_serves_fresh_entries_and_falls_back_when_offline(cache, monkeypatch):
+    def offline(*args, **kwargs):
+        raise fetch_data.requests.ConnectionError("offline")
+
+    cache.set("https://example.com/q?range=1d", b"cached")
+    monkeypatch.setattr(fetch_data, "get_with_retries", offline)
+    assert fetch_data.cached_get(cache, "https://example.com/q", params={"range": "1d"}) == b"cached"
+    cache.ttl = 0
+    assert fetch_data.cached_get(cache, "https://example.com/q", params={"range": "1d"}) == b"cached"
+    with pytest.raises(fetch_data.requests.ConnectionError):
+        fetch_data.cached_get(cache, "https://example.com/other")
+
+
+def test_failed_fetch_never_falls_back_past_max_stale(cache, monkeypatch):
+    def offline(*args, **kwargs):
+        raise fetch_data.requests.ConnectionError("offline")
+
+    monkeypatch.setattr(fetch_data, "get_with_retries", offline)
+    cache.max_stale = 30
+    cache.set("https://example.com/q", b"yesterday")
+    _age(cache, "https://example.com/q", 80)
+    assert fetch_data.cached_get(cache, "https://example.com/q") == b"yesterday"
+
+    _age(cache, "https://example.com/q", 20)
+    with pytest.raises(fetch_data.requests.ConnectionError):
+        fetch_data.cached_get(cache, "https://example.com/q")
+
+
+def test_quotes_too_old_to_fall_back_on_show_as_unavailable(tmp_path, monkeypatch):
+    def offline(*args, **kwargs):
+        raise fetch_data.requests.ConnectionError("offline")
+
+    quotes = DiskCache("quotes", ttl=60, max_stale=60, directory=str(tmp_path))
+    monkeypatch.setattr(fetch_data, "QUOTE_CACHE", quotes)
+    monkeypatch.setattr(fetch_data, "get_with_retries", offline)
+    chart = {"chart": {"result": [{"meta": {"regularMarketPrice": 101.0, "previousClose": 100.0}}]}}
+    url = fetch_data.YAHOO_CHART_URL.format(symbol="^NSEI")
+    key = url + "?" + "&".join(f"{k}={v}" for k, v in sorted(fetch_data.YAHOO_PARAMS.items()))
+    quotes.set(key, json.dumps(chart).encode())
+    _age(quotes, key, 3 * 86400)
+
+    [quote] = fetch_data.get_yahoo_prices([("^NSEI", "NIFTY 50")])
+    assert quote["price"] == "❌" and quote["sentiment"] == "Unavailable"
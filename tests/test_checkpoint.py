@@ -0,0 +1,113 @@
+import pytest
+
+from utils.checkpoint import Checkpoint, RunManifest
+from utils.pipeline import Pipeline
+
+
+class Run:
+    """A small report-shaped pipeline that counts how often each stage runs."""
+
+    def __init__(self, tmp_path, quotes=(1, 2), fail_at=None):
+        self.calls = []
+        self.quotes = list(quotes)
+        self.fail_at = fail_at
+        self.media = tmp_path / "audio.mp3"
+
+    def stage(self, name, result):
+        def fn(*args):
+            self.calls.append(name)
+            if name == self.fail_at:
+                raise RuntimeError(f"{name} crashed")
+            return result(*args)
+        return fn
+
+    def pipeline(self, manifest):
+        def audio(script):
+            self.media.write_text(script)
+            return str(self.media)
+
+        pipeline = Pipeline(manifest=manifest)
+        pipeline.add("quotes", self.stage("quotes", lambda: self.quotes), checkpoint=Checkpoint())
+        pipeline.add("rows", self.stage("rows", lambda quotes: [q * 10 for q in quotes]), deps=["quotes"])
+        pipeline.add("script", self.stage("script", lambda rows: f"rows {rows}"), deps=["rows"],
+                     checkpoint=Checkpoint())
+        pipeline.add("audio", self.stage("audio", audio), deps=["script"],
+                     checkpoint=Checkpoint(artifact=lambda path: path))
+        return pipeline
+
+
+def test_restart_resumes_after_the_last_completed_stage(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    crashed = Run(tmp_path, fail_at="audio")
+    with pytest.raises(RuntimeError):
+        crashed.pipeline(RunManifest(path)).run()
+
+    resumed = Run(tmp_path)
+    pipeline = resumed.pipeline(RunManifest(path))
+    results = pipeline.run()
+
+    # Uncheckpointed stages are recomputed; the fetch and the script are not
+    assert resumed.calls == ["rows", "audio"]
+    assert results["script"] == "rows [10, 20]"
+    assert pipeline.timings["quotes"][2] == "restored"
+
+    again = Run(tmp_path)
+    again.pipeline(RunManifest(path)).run()
+    assert again.calls == ["rows"]
+
+
+def test_changed_inputs_and_artifacts_make_stages_stale(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    Run(tmp_path).pipeline(RunManifest(path)).run()
+
+    manifest = RunManifest(path)
+    manifest.invalidate(["quotes"])
+    changed = Run(tmp_path, quotes=(3,))
+    changed.pipeline(manifest).run()
+    assert changed.calls == ["quotes", "rows", "script", "audio"]
+
+    (tmp_path / "audio.mp3").unlink()
+    missing = Run(tmp_path, quotes=(3,))
+    missing.pipeline(RunManifest(path)).run()
+    assert missing.calls == ["rows", "audio"]
+
+
+def test_from_stage_reruns_it_and_everything_after_it(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    Run(tmp_path).pipeline(RunManifest(path)).run()
+
+    run = Run(tmp_path)
+    manifest = RunManifest(path)
+    pipeline = run.pipeline(manifest)
+    assert pipeline.downstream("script") == {"audio"}
+    manifest.invalidate({"script"} | pipeline.downstream("script"))
+    pipeline.run()
+    assert run.calls == ["rows", "script", "audio"]
+
+
+def test_a_new_day_fetches_quotes_and_news_again(tmp_path, monkeypatch):
+    import main
+    from utils.editions import EDITIONS, Job
+
+    day = ["16.10.2025"]
+    fetched = []
+    monkeypatch.setattr(main, "get_current_date_ist", lambda job: day[0])
+    monkeypatch.setattr(main, "fetch_quotes", lambda job, date_text: fetched.append("quotes") or [date_text])
+    monkeypatch.setattr(main, "fetch_news_report", lambda date_text: fetched.append("news") or date_text)
+    job = Job(EDITIONS["premarket"], root=str(tmp_path))
+
+    def run():
+        pipeline = main.build_pipeline(job, RunManifest(job.path("manifest.json")))
+        for name in set(pipeline.stages) - {"date", "quotes", "news"}:
+            del pipeline.stages[name]
+        return pipeline.run()
+
+    run()
+    run()
+    assert fetched == ["quotes", "news"]
+
+    day[0] = "17.10.2025"
+    results = run()
+    assert sorted(fetched) == ["news", "news", "quotes", "quotes"]
+    assert results["quotes"] == ["17.10.2025"]
+
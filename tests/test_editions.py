@@ -0,0 +1,113 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+import pytz
+
+from utils.editions import EDITIONS, Edition, Job
+from utils.limits import RateLimiter
+from utils.scheduler import Scheduler, next_due
+
+IST = pytz.timezone("Asia/Kolkata")
+
+
+def edition(name, schedule, weekdays=(0, 1, 2, 3, 4)):
+    return Edition(name, name.title(), templates={}, prompt={}, schedule=schedule, weekdays=weekdays)
+
+
+def at(*args):
+    return IST.localize(datetime(*args))
+
+
+def test_next_run_is_later_today_or_the_next_weekday():
+    premarket = edition("premarket", "08:00")
+    # Friday 2025-10-17
+    assert premarket.next_run(at(2025, 10, 17, 7, 0)) == at(2025, 10, 17, 8, 0)
+    assert premarket.next_run(at(2025, 10, 17, 8, 0)) == at(2025, 10, 20, 8, 0)
+    assert premarket.next_run(at(2025, 10, 18, 12, 0)) == at(2025, 10, 20, 8, 0)
+
+
+def test_next_due_groups_editions_starting_together():
+    editions = [edition("premarket", "08:00"), edition("postmarket", "16:15"), edition("weekly", "16:15", (4,))]
+    assert next_due(editions, at(2025, 10, 17, 9, 0)) == (at(2025, 10, 17, 16, 15), ["postmarket", "weekly"])
+    assert next_due(editions, at(2025, 10, 16, 17, 0)) == (at(2025, 10, 17, 8, 0), ["premarket"])
+
+
+def test_jobs_get_separate_workdirs_artifacts_and_uploads(tmp_path):
+    pre = Job(EDITIONS["premarket"], root=str(tmp_path))
+    post = Job(EDITIONS["postmarket"], root=str(tmp_path))
+    assert pre.path("final_video.mp4") != post.path("final_video.mp4")
+    assert (tmp_path / "premarket").is_dir() and (tmp_path / "postmarket").is_dir()
+    assert pre.artifacts is not post.artifacts
+    assert pre.uploads is not post.uploads
+    # Every template with a title printed on it is the edition's own
+    for name in ("thumbnail", "market", "insta", "date"):
+        assert EDITIONS["postmarket"].templates[name] != EDITIONS["premarket"].templates[name]
+
+
+def test_every_registered_edition_can_run():
+    for ed in EDITIONS.values():
+        assert ed.missing_templates() == []
+
+
+def test_an_edition_without_its_templates_is_not_scheduled(tmp_path):
+    import main
+
+    (tmp_path / "market.jpg").write_bytes(b"")
+    ready = Edition("ready", "Ready", templates={"market": str(tmp_path / "market.jpg")}, prompt={})
+    unready = Edition("unready", "Unready", templates={"market": str(tmp_path / "missing.jpg")}, prompt={})
+    assert unready.missing_templates() == [str(tmp_path / "missing.jpg")]
+
+    assert main.ready_editions([ready, unready], named=False) == [ready]
+    with pytest.raises(SystemExit, match="missing.jpg"):
+        main.ready_editions([ready, unready])
+
+
+def test_scheduler_runs_editions_concurrently_and_skips_a_running_one():
+    barrier = threading.Barrier(2, timeout=5)
+    release = threading.Event()
+    idle = []
+
+    def run_job(ed):
+        # Deadlocks (and times out) unless both editions run at the same time
+        barrier.wait()
+        release.wait(5)
+        if ed.name == "postmarket":
+            raise RuntimeError("boom")
+
+    scheduler = Scheduler([edition("premarket", "08:00"), edition("postmarket", "16:15")], run_job,
+                          on_idle=lambda: idle.append(True))
+    assert scheduler.start("premarket") is not None
+    assert scheduler.start("postmarket") is not None
+    assert scheduler.start("premarket") is None
+    release.set()
+    scheduler.join()
+    assert list(scheduler.failures) == ["postmarket"]
+    assert idle == [True]
+
+
+def test_scheduler_sleeps_until_the_next_start():
+    now = [at(2025, 10, 17, 7, 58)]
+    started = []
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] = now[0] + (at(2025, 10, 17, 8, 0) - at(2025, 10, 17, 7, 59))
+
+    scheduler = Scheduler([edition("premarket", "08:00")], lambda ed: (started.append(ed.name), scheduler.stop()),
+                          clock=lambda: now[0], sleep=sleep)
+    scheduler.run_forever()
+    scheduler.join()
+    assert sleeps[:2] == [60, 60]
+    assert started == ["premarket"]
+
+
+def test_rate_limiter_spaces_calls_after_the_burst():
+    limiter = RateLimiter(rate=50, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    # Two calls from the burst, then two refills at 20 ms each
+    assert 0.03 <= time.monotonic() - start < 0.5
@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from utils import fetch_data
+from utils.cache import DiskCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error", response=self)
+
+
+class FakeSession:
+    """Answers each get() with the next outcome: a status code, or an exception to raise."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, params=None, headers=None, timeout=10):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome, b"ok")
+
+
+@pytest.fixture
+def backoffs(monkeypatch):
+    delays = []
+    monkeypatch.setattr(fetch_data.time, "sleep", delays.append)
+    return delays
+
+
+def test_rate_limits_and_server_errors_are_retried_with_backoff(monkeypatch, backoffs):
+    session = FakeSession([429, 503, 200])
+    monkeypatch.setattr(fetch_data, "_session", session)
+    res = fetch_data.get_with_retries("https://example.com/q", retries=2, backoff=0.5)
+    assert res.status_code == 200 and session.calls == 3
+    # Full jitter: each wait is anywhere up to the doubling ceiling
+    assert len(backoffs) == 2 and 0 <= backoffs[0] <= 0.5 and 0 <= backoffs[1] <= 1.0
+
+    monkeypatch.setattr(fetch_data, "_session", FakeSession([500, 502, 504]))
+    with pytest.raises(requests.HTTPError):
+        fetch_data.get_with_retries("https://example.com/q", retries=2)
+
+    # Client errors other than 429 aren't worth retrying
+    session = FakeSession([404])
+    monkeypatch.setattr(fetch_data, "_session", session)
+    with pytest.raises(requests.HTTPError):
+        fetch_data.get_with_retries("https://example.com/q", retries=2)
+    assert session.calls == 1
+
+
+def test_a_timeout_on_the_last_attempt_is_raised(monkeypatch, backoffs):
+    session = FakeSession([requests.Timeout("slow"), requests.ConnectionError("reset"), requests.Timeout("slow")])
+    monkeypatch.setattr(fetch_data, "_session", session)
+    with pytest.raises(requests.Timeout):
+        fetch_data.get_with_retries("https://example.com/q", retries=2)
+    assert session.calls == 3 and len(backoffs) == 2
+
+    session = FakeSession([requests.Timeout("slow"), 200])
+    monkeypatch.setattr(fetch_data, "_session", session)
+    assert fetch_data.get_with_retries("https://example.com/q", retries=2).status_code == 200
+
+
+def test_quotes_keep_the_input_order_when_fetches_finish_out_of_order(tmp_path, monkeypatch):
+    prices = {"^NSEI": 101.0, "^BSESN": 202.0, "^DJI": 303.0}
+    delays = {"^NSEI": 0.2, "^BSESN": 0.1, "^DJI": 0.0}
+    finished = []
+    lock = threading.Lock()
+
+    class SlowSession:
+        def get(self, url, params=None, headers=None, timeout=10):
+            symbol = url.rsplit("/", 1)[1]
+            time.sleep(delays[symbol])
+            with lock:
+                finished.append(symbol)
+            chart = {"meta": {"regularMarketPrice": prices[symbol], "previousClose": 100.0}}
+            return FakeResponse(200, json.dumps({"chart": {"result": [chart]}}).encode())
+
+    monkeypatch.setattr(fetch_data, "_session", SlowSession())
+    monkeypatch.setattr(fetch_data, "QUOTE_CACHE", DiskCache("quotes", ttl=60, directory=str(tmp_path)))
+    quotes = fetch_data.get_yahoo_prices([("^NSEI", "NIFTY 50"), ("^BSESN", "SENSEX"), ("^DJI", "Dow Jones")])
+    assert finished == ["^DJI", "^BSESN", "^NSEI"]
+    assert [(q["label"], q["price"]) for q in quotes] == [("NIFTY 50", 101.0), ("SENSEX", 202.0), ("Dow Jones", 303.0)]
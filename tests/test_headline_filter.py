@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+from utils import headline_filter
+from utils.headline_filter import HEADLINE_FILTER, HeadlineFilter, load_blocklist
+
+# The list get_et_market_articles scanned for before the blocklist file
+LEGACY_PHRASES = [
+    "stocks to buy", "stocks to watch", "these", "top", "who", "why",
+    "multibagger", "hot stocks", "must buy", "recommend", "price target", "talk", "predict", "what", "want", "smart", "stocks", "tip",
+    "whom", "whose", "when", "where", "which", "how", "how much", "how many", "how far", "how long", "how often", "how come", "this", "that", "those",
+    "head and shoulders", "double top", "double bottom", "triple top", "triple bottom",
+    "rounding top", "rounding bottom", "cup and handle", "island reversal", "diamond top", "diamond bottom",
+    "ascending triangle", "descending triangle", "symmetrical triangle", "falling wedge", "rising wedge",
+    "rectangle pattern", "bullish flag", "bearish flag", "bullish pennant", "bearish pennant", "broadening formation",
+    "megaphone pattern", "channel up", "channel down", "gap up", "gap down", "breakout", "retest",
+    "hammer", "inverted hammer", "bullish engulfing", "bearish engulfing", "morning star", "evening star",
+    "piercing line", "dark cloud cover", "three white soldiers", "three black crows", "doji", "dragonfly doji",
+    "gravestone doji", "spinning top", "marubozu", "says", "shooting star", "harami", "tweezer top", "tweezer bottom"
+]
+CLEAN = [
+    "Sensex closes higher as banks rally",
+    "RBI holds policy rate, rupee firms against dollar",
+    "Crude oil slips on weak Asia demand"
+]
+
+
+def legacy_match(title):
+    return any(phrase in title.lower() for phrase in LEGACY_PHRASES)
+
+
+def test_whole_word_phrases_block_what_the_old_scan_blocked():
+    titles = CLEAN + [f"Nifty {phrase.title()} on Dalal Street" for phrase in LEGACY_PHRASES]
+    assert [HEADLINE_FILTER.match(t) is not None for t in titles] == [legacy_match(t) for t in titles]
+    assert HEADLINE_FILTER.allowed(titles) == CLEAN
+
+
+def test_phrases_match_whole_words_or_a_starred_prefix():
+    # The old scan hit "top" inside "stop"; whole words don't
+    assert legacy_match("Markets stop falling") and HEADLINE_FILTER.match("Markets stop falling") is None
+    assert HEADLINE_FILTER.match("Brokers' recommendations for Monday") == "recommend*"
+    # The longest phrase at the earliest word wins
+    assert HEADLINE_FILTER.match("How much will Nifty rise") == "how much"
+    assert HEADLINE_FILTER.classify(["Doji forms on Nifty"]) == [("Doji forms on Nifty", "doji")]
+
+
+def test_memo_remembers_tokens_and_resets_when_rules_change(monkeypatch):
+    filter = HeadlineFilter(["gap up"])
+    assert filter.match("Nifty opens flat") is None
+    assert {"nifty", "opens", "flat"} <= filter._seen and not filter._starts
+    assert filter.match("Nifty set to gap up") == "gap up"
+    assert filter._starts == {"gap"}
+
+    filter.add("nifty")
+    assert not filter._seen and filter.match("Nifty opens flat") == "nifty"
+
+    monkeypatch.setattr(headline_filter, "MAX_MEMO_TOKENS", 2)
+    filter.match("one two three")
+    filter.match("four")
+    assert filter._seen == {"four"}
+
+
+def test_blocklist_skips_comments_and_blank_lines(tmp_path):
+    path = tmp_path / "blocklist.txt"
+    path.write_text("# tips\n\nStocks To Buy\n  tip*  \n", encoding="utf-8")
+    assert load_blocklist(str(path)) == ["stocks to buy", "tip*"]
+    assert HeadlineFilter(load_blocklist(str(path))).match("Tipsters pick stocks to buy") == "tip*"
+
+
+def test_the_default_blocklist_loads_from_any_directory(tmp_path):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root}
+    env.pop("HEADLINE_BLOCKLIST", None)
+    subprocess.run(
+        [sys.executable, "-c", "from utils.headline_filter import HEADLINE_FILTER; assert HEADLINE_FILTER.match('this')"],
+        cwd=tmp_path, env=env, check=True
+    )
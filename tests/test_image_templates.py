@@ -0,0 +1,38 @@
+import os
+
+from PIL import Image
+
+from utils import image_templates
+
+
+def test_templates_are_decoded_once_and_copied_on_draw(tmp_path, monkeypatch):
+    path = str(tmp_path / "template.jpg")
+    Image.new("RGB", (20, 10), "white").save(path)
+    opened = []
+    real_open = Image.open
+    monkeypatch.setattr(Image, "open", lambda p: opened.append(p) or real_open(p))
+
+    first = image_templates.load_template(path)
+    first.putpixel((0, 0), (255, 0, 0))
+    second = image_templates.load_template(path)
+    assert opened == [path]
+    assert second.getpixel((0, 0)) == (255, 255, 255)
+
+    # A newer file on disk replaces the cached decode
+    Image.new("RGB", (20, 10), "black").save(path)
+    os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+    assert image_templates.load_template(path).getpixel((0, 0)) == (0, 0, 0)
+    assert len(opened) == 2
+
+    image_templates.evict(path)
+    image_templates.load_template(path)
+    assert len(opened) == 3
+
+
+def test_fonts_are_cached_by_path_and_size():
+    image_templates.evict()
+    font = image_templates.load_font(30)
+    assert image_templates.load_font(30) is font
+    assert image_templates.load_font(32) is not font
+    image_templates.evict()
+    assert image_templates.load_font(30) is not font
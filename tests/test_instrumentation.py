@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from utils.instrumentation import RECORDER, Recorder, span
+from utils.pipeline import Pipeline
+
+
+def test_spans_nest_and_count_bytes_and_retries():
+    recorder = Recorder()
+
+    @recorder.traced("upload")
+    def upload():
+        with recorder.span("http:example.com") as s:
+            s.add("retries")
+            s.add("bytes", 100)
+            s.add("bytes", 50)
+
+    with recorder.span("send", kind="stage"):
+        upload()
+    with pytest.raises(ValueError):
+        with recorder.span("broken"):
+            raise ValueError("boom")
+
+    records = {r["name"]: r for r in recorder.records()}
+    assert records["upload"]["parent"] == "send"
+    assert records["http:example.com"]["parent"] == "upload"
+    assert records["http:example.com"]["bytes"] == 150
+    assert records["broken"]["status"] == "failed" and records["broken"]["error"] == "ValueError"
+    assert records["send"]["duration"] >= records["upload"]["duration"] >= 0
+    assert records["send"]["peak_rss_mb"] > 0
+
+    totals = recorder.totals()
+    assert totals["http:example.com"]["retries"] == 1
+    assert totals["broken"]["failed"] == 1
+    assert "send" in recorder.summary_text()
+
+
+def test_report_is_written_as_jsonl_with_a_summary(tmp_path):
+    recorder = Recorder()
+    with recorder.span("fetch", bytes=10):
+        pass
+    path = recorder.write(str(tmp_path))
+
+    lines = [json.loads(line) for line in open(path)]
+    assert lines[0]["name"] == "fetch"
+    assert lines[-1]["type"] == "summary"
+    assert lines[-1]["totals"]["fetch"]["bytes"] == 10
+
+
+def test_pipeline_stages_are_recorded_with_their_calls():
+    def fetch():
+        with span("http:quotes"):
+            return 1
+
+    pipeline = Pipeline()
+    pipeline.add("fetch", fetch)
+    pipeline.add("double", lambda x: x * 2, deps=["fetch"])
+    RECORDER.reset()
+    pipeline.run()
+
+    records = {r["name"]: r for r in RECORDER.records()}
+    assert records["fetch"]["kind"] == "stage" and records["double"]["kind"] == "stage"
+    assert records["http:quotes"]["parent"] == "fetch"
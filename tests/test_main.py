@@ -0,0 +1,69 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import main
+from utils.checkpoint import RunManifest
+from utils.editions import EDITIONS, Job
+from utils.pipeline import PipelineAbort
+
+
+def test_audio_is_only_offered_for_approval_once_it_exists(tmp_path, monkeypatch):
+    job = Job(EDITIONS["premarket"], root=str(tmp_path))
+    attempts = []
+    asked = []
+
+    def generate_audio(text, voice_id, output_path):
+        attempts.append(output_path)
+        if len(attempts) == 1:
+            return None
+        with open(output_path, "wb") as f:
+            f.write(b"mp3")
+        return output_path
+
+    monkeypatch.setattr(main, "speculate", lambda job, script_text, images: None)
+    monkeypatch.setattr(main, "generate_audio", generate_audio)
+    monkeypatch.setattr(main, "send_telegram_message", lambda text: None)
+    monkeypatch.setattr(main, "send_telegram_file", lambda path, caption: None)
+    monkeypatch.setattr(main, "wait_for_telegram_reply", lambda prompt, job, stage: asked.append(stage) or True)
+
+    audio_path, speculation = main.approve_audio(job, ("script", None), None)
+    assert audio_path == job.path("output_polly.mp3") and speculation is None
+    # The failed attempt was retried without asking to make a video from it
+    assert len(attempts) == 2 and asked == ["audio"]
+
+
+def test_a_missing_audio_file_fails_the_video_cleanly(tmp_path):
+    from PIL import Image
+
+    image = Image.new("RGB", (64, 36))
+    assert main.generate_video(str(tmp_path / "final_video.mp4"), images=(image, None), audio_path=None) is None
+
+
+def test_importing_main_leaves_the_heavy_libraries_unloaded():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    heavy = ("PIL", "numpy", "ffmpeg", "pydub", "feedparser", "pytz")
+    check = f"import sys, main; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", check], cwd=root, capture_output=True, text=True, check=True)
+    assert loaded.stdout.strip() == ""
+
+
+def test_a_failed_market_render_aborts_instead_of_crashing(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "get_current_date_ist", lambda job: "17.10.2025")
+    monkeypatch.setattr(main, "fetch_quotes", lambda job, date_text: [])
+    monkeypatch.setattr(main, "fetch_news_report", lambda date_text: "")
+    monkeypatch.setattr(main, "create_market_image", lambda job, date_text, table, news: None)
+    monkeypatch.setattr(main, "create_insta_image", lambda job, date_text, table, news: None)
+    monkeypatch.setattr(main, "create_slides", lambda job, date_text, table, news: None)
+    monkeypatch.setattr(main, "send_previews", lambda job, final_img, insta_img: None)
+    job = Job(EDITIONS["premarket"], root=str(tmp_path))
+    pipeline = main.build_pipeline(job, RunManifest(job.path("manifest.json")))
+    keep = {"date", "quotes", "news", "table", "market_image", "insta_image", "slides", "video_images"}
+    for name in set(pipeline.stages) - keep:
+        del pipeline.stages[name]
+
+    with pytest.raises(PipelineAbort):
+        pipeline.run()
+    assert pipeline.timings["video_images"][2] == "aborted"
@@ -0,0 +1,92 @@
+import math
+
+import pytest
+
+from utils.market_series import MarketSeries
+from utils.report_table import build_table
+from utils.sentiment import classify_sentiment, classify_sentiments
+
+
+def chart(previous_close, price, bars, volume=None):
+    """A chart API result; bars are (open, high, low, close), None for an empty bar."""
+    quote = {field: [] for field in ("open", "high", "low", "close", "volume")}
+    for i, bar in enumerate(bars):
+        for field, value in zip(("open", "high", "low", "close"), bar or (None,) * 4):
+            quote[field].append(value)
+        quote["volume"].append(volume[i] if volume else 0)
+    return {
+        "meta": {"regularMarketPrice": price, "previousClose": previous_close},
+        "timestamp": [1700000000 + 120 * i for i in range(len(bars))],
+        "indicators": {"quote": [quote]}
+    }
+
+
+SYMBOLS = [("^NSEI", "NIFTY 50"), ("RELIANCE.NS", "Reliance"), ("^DJI", "Dow Jones")]
+CHARTS = [
+    chart(100.0, 101.0, [(100.5, 101.0, 100.0, 100.5), None, (100.5, 101.5, 100.5, 101.0)]),
+    chart(200.0, 198.0, [(202.0, 203.0, 199.0, 200.0), (200.0, 201.0, 197.0, 198.0)], volume=[100, 300]),
+    None
+]
+
+
+def test_indicators_are_computed_for_every_symbol_at_once():
+    series = MarketSeries.from_charts(SYMBOLS, CHARTS)
+    assert series.close.shape == (3, 3)
+
+    assert series.change_pct[:2].tolist() == pytest.approx([1.0, -1.0])
+    assert series.day_high()[:2].tolist() == [101.5, 203.0]
+    assert series.day_low()[:2].tolist() == [100.0, 197.0]
+    assert series.gap_pct()[:2].tolist() == pytest.approx([0.5, 1.0])
+    # Volume-weighted for the stock, a plain average for the index without volume
+    typical = [(203.0 + 199.0 + 200.0) / 3, (201.0 + 197.0 + 198.0) / 3]
+    assert series.vwap()[1] == pytest.approx((typical[0] * 100 + typical[1] * 300) / 400)
+    assert series.vwap()[0] == pytest.approx(((101.0 + 100.0 + 100.5) / 3 + (101.5 + 100.5 + 101.0) / 3) / 2)
+    # The empty bar is skipped, not read as a price of zero
+    assert series.realized_volatility()[0] == pytest.approx(abs(math.log(101.0 / 100.5)) * 100)
+    assert series.breadth() == {"advancing": 1, "declining": 1, "unchanged": 0, "unavailable": 1}
+
+    # The failed fetch is a row of NaN
+    assert math.isnan(series.change_pct[2]) and math.isnan(series.vwap()[2])
+
+
+def test_quotes_carry_the_indicators_and_stay_json_friendly():
+    quotes = MarketSeries.from_charts(SYMBOLS, CHARTS).to_quotes()
+    assert quotes[0]["price"] == 101.0 and quotes[0]["day_range_pct"] == 1.5 and quotes[0]["arrow"] == "▲"
+    assert quotes[1]["gap_pct"] == 1.0 and quotes[1]["sentiment"] == "Bearish"
+    assert quotes[2]["sentiment"] == "Unavailable"
+    assert all(type(value) in (str, float, int, type(None)) for quote in quotes for value in quote.values())
+
+
+def test_sentiment_weighs_the_days_swings_and_vwap():
+    assert classify_sentiment(1.0) == "Bullish"
+    # A 1% move on a day that swung 4% is only a slight one
+    assert classify_sentiment(1.0, volatility=4.0) == "Slight Bullish"
+    # A strong rise that closed below VWAP had faded
+    assert classify_sentiment(1.0, vwap_bias=-2.0) == "Slight Bullish"
+    assert classify_sentiment(-1.0, vwap_bias=-2.0) == "Bearish"
+    assert classify_sentiments(["❌", None, 0.5, -0.5]) == ["Neutral", "Neutral", "Slight Bullish", "Slight Bearish"]
+
+
+def test_table_uses_the_richer_sentiment():
+    quotes = [
+        {"label": "NIFTY 50", "price": 101.0, "change_pts": 1.0, "change_pct": 1.0, "vwap": 102.0, "volatility": 0.5},
+        {"label": "Dow Jones", "price": 101.0, "change_pts": 1.0, "change_pct": 1.0}
+    ]
+    table = build_table(quotes, indian_count=1)
+    assert table.section("india")[0].sentiment == "Slight Bullish"
+    assert table.section("global")[0].sentiment == "Bullish"
+
+
+def test_hundreds_of_symbols_build_one_series():
+    symbols = [(f"SYM{i}", f"Symbol {i}") for i in range(300)]
+    charts = [chart(100.0, 100.0 + i % 7 - 3, [(100.0, 101.0, 99.0, 100.0 + j % 3) for j in range(190)])
+              for i in range(300)]
+    series = MarketSeries.from_charts(symbols, charts)
+    assert series.close.shape == (300, 190)
+    assert len(series.to_quotes()) == 300
+    assert sum(series.breadth().values()) == 300
+
+
+def test_a_series_where_every_fetch_failed_is_all_unavailable():
+    quotes = MarketSeries.from_charts(SYMBOLS[:2], [None, None]).to_quotes()
+    assert [quote["price"] for quote in quotes] == ["❌", "❌"]
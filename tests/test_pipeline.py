@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from utils.pipeline import Pipeline, PipelineAbort
+
+
+def test_stages_receive_dependency_results_in_declared_order():
+    pipeline = Pipeline()
+    pipeline.add("a", lambda: 2)
+    pipeline.add("b", lambda: 5)
+    pipeline.add("diff", lambda b, a: b - a, deps=["b", "a"])
+    results = pipeline.run()
+    assert results == {"a": 2, "b": 5, "diff": 3}
+    assert all(status == "ok" for _, _, status in pipeline.timings.values())
+
+
+def test_independent_stages_overlap():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet():
+        # Deadlocks (and times out) unless both stages run at the same time
+        barrier.wait()
+        return True
+
+    pipeline = Pipeline(max_workers=2)
+    pipeline.add("left", meet)
+    pipeline.add("right", meet)
+    assert pipeline.run() == {"left": True, "right": True}
+
+
+def test_failure_stops_dependants_and_is_reraised():
+    calls = []
+
+    def slow():
+        time.sleep(0.05)
+        calls.append("slow")
+
+    def boom():
+        raise RuntimeError("boom")
+
+    pipeline = Pipeline()
+    pipeline.add("slow", slow)
+    pipeline.add("boom", boom)
+    pipeline.add("after", lambda _: calls.append("after"), deps=["boom"])
+    with pytest.raises(RuntimeError):
+        pipeline.run()
+    # Stages already running finish; dependants never start
+    assert calls == ["slow"]
+    assert pipeline.timings["boom"][2] == "failed"
+    assert pipeline.timings["after"][2] == "skipped"
+    assert "skipped" in pipeline.report()
+
+
+def test_abort_is_reported_separately():
+    def stop():
+        raise PipelineAbort("no image")
+
+    pipeline = Pipeline()
+    pipeline.add("stop", stop)
+    with pytest.raises(PipelineAbort):
+        pipeline.run()
+    assert pipeline.timings["stop"][2] == "aborted"
+
+
+def test_graph_is_validated():
+    pipeline = Pipeline()
+    pipeline.add("a", lambda b: b, deps=["b"])
+    pipeline.add("b", lambda a: a, deps=["a"])
+    with pytest.raises(ValueError, match="cycle"):
+        pipeline.run()
+
+    pipeline = Pipeline()
+    pipeline.add("a", lambda x: x, deps=["missing"])
+    with pytest.raises(ValueError, match="unknown"):
+        pipeline.order()
+    with pytest.raises(ValueError, match="Duplicate"):
+        pipeline.add("a", lambda: None)
+
+
+def test_process_stages_run_on_the_process_pool():
+    pipeline = Pipeline()
+    pipeline.add("n", lambda: -3)
+    pipeline.add("abs", abs, deps=["n"], executor="process")
+    assert pipeline.run()["abs"] == 3
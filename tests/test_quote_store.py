@@ -0,0 +1,93 @@
+import math
+from datetime import date
+
+import numpy as np
+
+import backfill
+from utils.market_series import MarketSeries
+from utils.quote_store import BAR_DTYPE, QuoteStore
+
+# 2023-11-14 22:13:20 UTC; the charts below put the exchange 5.5 hours ahead, on the 15th
+START = 1700000000
+
+
+def chart(previous_close, price, closes, start=START):
+    return {
+        "meta": {"regularMarketPrice": price, "previousClose": previous_close, "gmtoffset": 19800},
+        "timestamp": [start + 120 * i for i in range(len(closes))],
+        "indicators": {"quote": [{
+            "open": closes, "high": closes, "low": closes, "close": closes, "volume": [0] * len(closes)
+        }]}
+    }
+
+
+def bars(start, closes):
+    rows = np.zeros(len(closes), dtype=BAR_DTYPE)
+    rows["ts"] = start + 120 * np.arange(len(closes))
+    rows["close"] = closes
+    return rows
+
+
+def test_a_run_is_recorded_and_read_back_by_range(tmp_path):
+    store = QuoteStore(str(tmp_path))
+    series = MarketSeries.from_charts(
+        [("^NSEI", "NIFTY 50"), ("RELIANCE.NS", "Reliance"), ("^DJI", "Dow Jones")],
+        [chart(100.0, 101.0, [100.0, None, 101.0]), chart(200.0, 198.0, [199.0, 198.0]), None]
+    )
+    assert store.record(series) == 2
+    assert store.symbols() == ["RELIANCE.NS", "^NSEI"]
+
+    # The empty bar isn't stored; the session is the exchange's date
+    assert store.bars("^NSEI")["close"].tolist() == [100.0, 101.0]
+    assert store.bars("^NSEI", start=START + 1)["ts"].tolist() == [START + 240]
+    assert store.daily_closes("^NSEI") == [(date(2023, 11, 15), 101.0)]
+    assert store.days("RELIANCE.NS", date(2023, 11, 15), date(2023, 11, 15))["previous_close"].tolist() == [200.0]
+
+    timestamps, matrix = store.window(["^NSEI", "RELIANCE.NS", "^DJI"])
+    assert timestamps.tolist() == [START, START + 120, START + 240]
+    assert matrix[1, :2].tolist() == [199.0, 198.0] and math.isnan(matrix[1, 2])
+    assert np.isnan(matrix[0, 1]) and np.isnan(matrix[2]).all()
+
+
+def test_rerecording_replaces_the_overlap_and_keeps_older_rows(tmp_path):
+    store = QuoteStore(str(tmp_path))
+    store.append_bars("^NSEI", bars(START, [1.0, 2.0, 3.0]))
+    # A later fetch of the same session revises the last bar and adds one
+    store.append_bars("^NSEI", bars(START + 240, [3.5, 4.0]))
+    store.append_bars("^NSEI", bars(START + 240, [3.5, 4.0]))
+    assert store.bars("^NSEI")["close"].tolist() == [1.0, 2.0, 3.5, 4.0]
+
+    # Backfilled closes slot in before the live session without wiping its indicators
+    store.record(MarketSeries.from_charts([("^NSEI", "NIFTY 50")], [chart(100.0, 101.0, [100.0, 101.0])]))
+    store.append_closes("^NSEI", [(date(2023, 11, 13), 99.0), (date(2023, 11, 15), 101.5)])
+    days = store.days("^NSEI")
+    assert [str(d) for d in days["day"].astype("datetime64[D]")] == ["2023-11-13", "2023-11-15"]
+    assert days["price"].tolist() == [99.0, 101.5]
+    assert math.isnan(days["previous_close"][0]) and days["previous_close"][1] == 100.0
+
+    dates, closes = store.daily(["^NSEI", "RELIANCE.NS"], end=date(2023, 11, 14))
+    assert dates == [date(2023, 11, 13)] and closes.shape == (2, 1)
+
+
+def test_reads_are_memory_mapped_views(tmp_path):
+    store = QuoteStore(str(tmp_path))
+    # A year of 2-minute sessions for one symbol
+    store.append_bars("^NSEI", bars(START, np.linspace(100.0, 200.0, 250 * 188)))
+    week = store.bars("^NSEI", START + 120 * 1000, START + 120 * 1939)
+    assert isinstance(week, np.memmap) and len(week) == 940
+    assert not week.flags.writeable
+
+
+def test_backfill_can_run_from_the_store(tmp_path, monkeypatch):
+    store = QuoteStore(str(tmp_path / "quotes"))
+    monkeypatch.setattr("utils.quote_store.QUOTES", store)
+    candles = [(date(2026, 10, 14), 100.0), (date(2026, 10, 15), 102.0)]
+    monkeypatch.setattr(backfill, "get_yahoo_history", lambda symbols, start, end: [candles] * len(symbols))
+    backfill.build_reports([date(2026, 10, 16)], str(tmp_path / "online"))
+
+    def no_fetch(*args, **kwargs):
+        raise AssertionError("history should not be fetched")
+
+    monkeypatch.setattr(backfill, "get_yahoo_history", no_fetch)
+    reports = backfill.build_reports([date(2026, 10, 16)], str(tmp_path / "offline"), offline=True)
+    assert reports[date(2026, 10, 16)]["quotes"][0]["price"] == 102.0
@@ -0,0 +1,54 @@
+from utils.fetch_data import _quote, _unavailable_quote
+from utils.image_templates import draw_index_table
+from utils.report_table import TABLE_HEADER, build_table
+from utils.sentiment import classify_sentiment
+
+QUOTES = [
+    _quote("NIFTY 50", 25100.4, 25000.0),
+    _unavailable_quote("SENSEX"),
+    _quote("Dow Jones", 44900.0, 45000.0),
+    _quote("NASDAQ", 20050.0, 20000.0)
+]
+
+
+class RecordingDraw:
+    def __init__(self):
+        self.calls = []
+
+    def text(self, xy, text, font, fill):
+        self.calls.append((xy[1], text, fill))
+
+
+def test_quotes_and_table_agree_on_sentiment():
+    # 0.5% was Bullish when quotes had their own thresholds
+    assert _quote("NIFTY 50", 100.5, 100.0)["sentiment"] == "Slight Bullish" == classify_sentiment(0.5)
+    table = build_table(QUOTES, indian_count=2)
+    assert [row.sentiment for row in table] == [quote["sentiment"] for quote in QUOTES if quote["price"] != "❌"]
+
+
+def test_table_rows_are_typed_and_grouped_by_section():
+    table = build_table(QUOTES, indian_count=2)
+    assert [row.label for row in table.section("india")] == ["NIFTY 50"]
+    assert [name for name, _ in table.sections()] == ["india", "global"]
+    nifty = table.rows[0]
+    assert (nifty.price, nifty.change, nifty.change_pct) == (25100.4, 100.4, 0.4)
+    assert nifty.cells == ("NIFTY 50", "25,100", "+100", "+0.40%", "Slight Bullish")
+    assert table.to_text().split("\n\n")[1].splitlines()[0] == "\t".join(TABLE_HEADER)
+
+
+def test_layouts_space_sections_from_the_same_table():
+    table = build_table(QUOTES, indian_count=2)
+    report, insta = RecordingDraw(), RecordingDraw()
+    # The report repeats the header after a gap; Instagram lists every row under one
+    assert draw_index_table(report, table, None, 0, 100, 10, "black", section_gap=3) == 100 + 10 * 8
+    assert draw_index_table(insta, table, None, 0, 100, 10, "black") == 100 + 10 * 4
+    assert [text for _, text, _ in insta.calls].count("Index") == 1
+    assert ("+100", "green") in [(text, fill) for _, text, fill in insta.calls]
+    assert ("-0.22%", "red") in [(text, fill) for _, text, fill in insta.calls]
+
+
+def test_hundreds_of_rows_are_formatted_in_one_pass():
+    quotes = [_quote(f"Symbol {i}", 100.0 + (i % 9 - 4) * 0.2, 100.0) for i in range(500)]
+    table = build_table(quotes, indian_count=250)
+    assert len(table) == 500 and len(table.section("global")) == 250
+    assert {row.sentiment for row in table} == {"Bearish", "Neutral", "Slight Bullish", "Slight Bearish", "Bullish"}
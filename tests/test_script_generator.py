@@ -0,0 +1,53 @@
+from utils.cache import DiskCache
+from utils.script_generator import SCRIPT_CALLS, FakeLLMBackend, generate_youtube_script_from_report, iter_sentences
+
+
+class CountingBackend(FakeLLMBackend):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.streamed = 0
+
+    def stream(self, messages, model, temperature, usage=None):
+        for piece in super().stream(messages, model, temperature, usage):
+            self.streamed += len(piece)
+            yield piece
+
+
+def test_sentences_are_emitted_as_soon_as_they_end():
+    pieces = ["Nifty rose 0.5", "%. Banks", " led!\nIT lagged", " a bit"]
+    assert list(iter_sentences(pieces)) == ["Nifty rose 0.5%.", "Banks led!", "IT lagged a bit"]
+
+
+def test_sentences_are_handed_off_before_the_reply_is_complete():
+    backend = CountingBackend(piece_chars=5)
+    handed_off = []
+
+    script = generate_youtube_script_from_report(
+        "report", on_sentence=lambda s: handed_off.append((s, backend.streamed)), backend=backend, cache=None
+    )
+
+    assert script == backend.text
+    assert [s for s, _ in handed_off] == list(iter_sentences([backend.text]))
+    first_sentence, streamed = handed_off[0]
+    assert streamed < len(first_sentence) + 10 < len(backend.text)
+    assert "report" in backend.calls[0][1]["content"]
+
+
+def test_variants_are_cached_and_replayed(tmp_path):
+    cache = DiskCache("scripts", ttl=float("inf"), directory=str(tmp_path))
+    first = FakeLLMBackend(text="Variant zero.")
+    generate_youtube_script_from_report("report", backend=first, cache=cache)
+    generate_youtube_script_from_report("report", backend=FakeLLMBackend(text="Variant one."), variant=1, cache=cache)
+
+    replayed = FakeLLMBackend(text="Should not be streamed.")
+    sentences = []
+    assert generate_youtube_script_from_report("report", on_sentence=sentences.append, backend=replayed,
+                                               cache=cache) == "Variant zero."
+    assert generate_youtube_script_from_report("report", backend=replayed, variant=1, cache=cache) == "Variant one."
+    assert replayed.calls == [] and sentences == ["Variant zero."]
+    # A different report is a different prompt
+    assert generate_youtube_script_from_report("other", backend=replayed, cache=cache) == replayed.text
+
+    assert [c["cached"] for c in SCRIPT_CALLS[-5:]] == [False, False, True, True, False]
+    assert SCRIPT_CALLS[-1]["completion_tokens"] > 0
+    assert SCRIPT_CALLS[-3]["prompt_tokens"] == SCRIPT_CALLS[-5]["prompt_tokens"]
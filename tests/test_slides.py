@@ -0,0 +1,93 @@
+import threading
+
+import ffmpeg
+import pytest
+from PIL import Image
+
+from utils.audio_generator import StubBackend, generate_audio_with_polly, get_audio_timeline
+from utils.slides import Slide, slide_durations, split_sections
+from utils.video_creator import encode_audio, render_slide_video
+
+SCRIPT = (
+    "Good morning. Nifty closed higher yesterday, led by banks. "
+    "Reliance announces a new green energy plant in Gujarat. "
+    "If this helped, like, share and subscribe!"
+)
+NEWS = "• Reliance announces green energy plant in Gujarat\n\n• Crude oil prices slip"
+
+
+def slides(news_text=NEWS, colors=("red", "green", "blue", "white"), size=(64, 64)):
+    names = [("date", "intro"), ("report", "market"), ("news", "news"), ("thank", "outro")]
+    return [
+        Slide(name, section, lambda color=color: Image.new("RGB", size, color), text=news_text if name == "news" else None)
+        for (name, section), color in zip(names, colors)
+    ]
+
+
+def test_script_is_split_into_intro_market_news_and_outro():
+    lengths = split_sections(SCRIPT, NEWS)
+    assert lengths == {
+        "intro": len("Good morning. "),
+        "market": len("Nifty closed higher yesterday, led by banks. "),
+        "news": len("Reliance announces a new green energy plant in Gujarat. "),
+        "outro": len("If this helped, like, share and subscribe! ")
+    }
+    # Without a matching headline the middle is split in half
+    assert split_sections(SCRIPT, "")["news"] == lengths["news"]
+
+
+def test_durations_follow_the_chunk_timeline_and_keep_a_minimum(monkeypatch):
+    monkeypatch.setattr("utils.slides.MIN_SLIDE_SECONDS", 2.0)
+    lengths = split_sections(SCRIPT, NEWS)
+    # The first chunk (intro and market) was spoken quickly, the rest slowly
+    timeline = [[lengths["intro"] + lengths["market"], 6.0], [lengths["news"] + lengths["outro"], 12.0]]
+    durations = slide_durations(slides(), SCRIPT, 18.0, timeline)
+    assert round(sum(durations), 6) == 18.0
+    assert durations[0] == 2.0
+    assert durations[2] > durations[1]
+
+    even = slide_durations(slides(), SCRIPT, 18.0)
+    assert round(sum(even), 6) == 18.0
+    assert even[2] < durations[2]
+
+
+def test_slides_are_piped_into_one_video_with_crossfades(tmp_path):
+    audio = generate_audio_with_polly(SCRIPT, output_path=str(tmp_path / "a.mp3"), backend=StubBackend(ms_per_char=15),
+                                      max_chars=60, cache=None)
+    assert len(get_audio_timeline(audio)) > 1
+    aac = encode_audio(audio, str(tmp_path / "a.m4a"))
+    output = str(tmp_path / "slides.mp4")
+
+    assert render_slide_video(slides(), [0.6, 0.6, 0.6, 0.6], aac, output, fps=10, crossfade=0.2, profile="fast")
+    video = next(s for s in ffmpeg.probe(output)["streams"] if s["codec_type"] == "video")
+    assert (video["width"], video["height"]) == (64, 64)
+    assert 20 <= int(video["nb_frames"]) <= 24
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.m4a", "a.mp3", "slides.mp4"]
+
+
+def test_a_cancelled_slide_video_stops_encoding(tmp_path):
+    audio = generate_audio_with_polly(SCRIPT, output_path=str(tmp_path / "a.mp3"), backend=StubBackend(ms_per_char=15),
+                                      cache=None)
+    aac = encode_audio(audio, str(tmp_path / "a.m4a"))
+    cancelled = threading.Event()
+    cancelled.set()
+    assert not render_slide_video(slides(), [0.6, 0.6, 0.6, 0.6], aac, str(tmp_path / "slides.mp4"), fps=10,
+                                  crossfade=0.2, profile="fast", cancelled=cancelled)
+
+
+def test_a_slide_that_renders_nothing_fails_the_video_and_real_errors_propagate(tmp_path):
+    audio = generate_audio_with_polly(SCRIPT, output_path=str(tmp_path / "a.mp3"), backend=StubBackend(ms_per_char=15),
+                                      cache=None)
+    aac = encode_audio(audio, str(tmp_path / "a.m4a"))
+    broken = slides()
+    broken[2] = Slide("news", "news", lambda: None)
+    assert not render_slide_video(broken, [0.6, 0.6, 0.6, 0.6], aac, str(tmp_path / "slides.mp4"), fps=10,
+                                  crossfade=0.2, profile="fast")
+
+    def bug():
+        raise AttributeError("bug in a slide renderer")
+
+    broken[2] = Slide("news", "news", bug)
+    with pytest.raises(AttributeError, match="bug in a slide renderer"):
+        render_slide_video(broken, [0.6, 0.6, 0.6, 0.6], aac, str(tmp_path / "slides.mp4"), fps=10,
+                           crossfade=0.2, profile="fast")
@@ -0,0 +1,111 @@
+import os
+import threading
+
+from utils.speculation import SpeculativeRender, discard_all
+
+
+def _synthesize(text, path, cancelled=None):
+    with open(path, "w") as f:
+        f.write(text)
+    return path
+
+
+def _render(audio_path, output_dir, cancelled=None):
+    for name in ("final_video.mp4", "insta_video.mp4"):
+        with open(os.path.join(output_dir, name), "w") as f:
+            f.write(open(audio_path).read())
+    return os.path.join(output_dir, "final_video.mp4")
+
+
+def test_accepted_candidate_is_promoted(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    spec = SpeculativeRender("script", _synthesize, _render, directory=str(tmp_path / "spec"))
+
+    assert spec.take_audio(str(out / "output_polly.mp3")) == str(out / "output_polly.mp3")
+    assert spec.take_videos(str(out)) == str(out / "final_video.mp4")
+    assert (out / "insta_video.mp4").read_text() == "script"
+    spec.cleanup()
+    assert not os.path.exists(spec.directory)
+
+
+def test_rejected_candidate_is_cancelled_and_cleaned_up(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+    rendered = []
+
+    def slow_synthesize(text, path, cancelled):
+        started.set()
+        release.wait(5)
+        return _synthesize(text, path)
+
+    def render(audio_path, output_dir, cancelled):
+        rendered.append(audio_path)
+        return _render(audio_path, output_dir)
+
+    spec = SpeculativeRender("script", slow_synthesize, render, directory=str(tmp_path / "spec"))
+    assert started.wait(5)
+    spec.cancel()
+    release.set()
+    spec._finished.wait(5)
+
+    # The running step finishes, but nothing after it starts and the files go
+    assert rendered == []
+    assert not os.path.exists(spec.directory)
+    assert spec.take_videos(str(tmp_path)) is None
+
+
+def test_cancelling_mid_render_stops_it_before_the_files_go(tmp_path):
+    started = threading.Event()
+    seen = []
+
+    def render(audio_path, output_dir, cancelled):
+        started.set()
+        # An encode that checks for cancellation between frames
+        while not cancelled.wait(0.01):
+            pass
+        # The directory is still there while the render winds down
+        seen.append(os.path.exists(audio_path))
+        return None
+
+    spec = SpeculativeRender("script", _synthesize, render, directory=str(tmp_path / "spec"))
+    assert started.wait(5)
+    spec.cancel()
+    discard_all(str(tmp_path / "spec"))
+
+    assert seen == [True]
+    assert not os.path.exists(tmp_path / "spec")
+    assert spec.take_videos(str(tmp_path)) is None
+
+
+def test_cleanup_waits_for_the_running_step(tmp_path):
+    release = threading.Event()
+    seen = []
+
+    def render(audio_path, output_dir, cancelled):
+        release.wait(5)
+        seen.append(os.path.exists(audio_path))
+        return _render(audio_path, output_dir)
+
+    spec = SpeculativeRender("script", _synthesize, render, directory=str(tmp_path / "spec"))
+    assert spec.take_audio(str(tmp_path / "audio.mp3"))
+    threading.Timer(0.05, release.set).start()
+    spec.cleanup()
+    assert seen == [True]
+    assert not os.path.exists(spec.directory)
+
+
+def test_taken_audio_keeps_its_duration_and_timeline(tmp_path):
+    from utils.audio_generator import get_audio_duration, get_audio_timeline, remember_duration
+
+    def synthesize(text, path, cancelled):
+        _synthesize(text, path)
+        remember_duration(path, 3.5, [[6, 3.5]])
+        return path
+
+    spec = SpeculativeRender("script", synthesize, _render, directory=str(tmp_path / "spec"))
+    dest = str(tmp_path / "output_polly.mp3")
+    assert spec.take_audio(dest) == dest
+    # Not a real MP3, so these could only come from what synthesis recorded
+    assert get_audio_duration(dest) == 3.5 and get_audio_timeline(dest) == [[6, 3.5]]
+    spec.cleanup()
@@ -0,0 +1,139 @@
+import email
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from utils import telegram_alert
+from utils.instrumentation import RECORDER
+from utils.telegram_alert import MultipartBody, Uploader
+
+
+class FakeBotAPI:
+    """Local Bot API stand-in that parses multipart uploads and can rate-limit."""
+
+    def __init__(self):
+        self.requests = []
+        self.rate_limit = 0
+        self.delay = 0.0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                method = self.path.rsplit("/", 1)[-1]
+                raw = self.rfile.read(int(self.headers["Content-Length"]))
+                content_type = self.headers["Content-Type"]
+                if content_type.startswith("multipart/"):
+                    message = email.message_from_bytes(f"Content-Type: {content_type}\r\n\r\n".encode() + raw)
+                    form = {
+                        part.get_param("name", header="content-disposition"): (
+                            part.get_filename(), part.get_payload(decode=True)
+                        )
+                        for part in message.get_payload()
+                    }
+                else:
+                    form = {k: (None, v[0].encode()) for k, v in parse_qs(raw.decode()).items()}
+                fake.requests.append((method, form))
+                if fake.rate_limit:
+                    fake.rate_limit -= 1
+                    self._reply(429, {"ok": False, "parameters": {"retry_after": 0.2}})
+                    return
+                time.sleep(fake.delay)
+                self._reply(200, {"ok": True, "result": {"message_id": len(fake.requests)}})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def bot_api(monkeypatch):
+    fake = FakeBotAPI()
+    monkeypatch.setattr(telegram_alert, "TELEGRAM_API_URL", fake.url)
+    monkeypatch.setattr(telegram_alert, "BOT_TOKEN", "token")
+    monkeypatch.setattr(telegram_alert, "CHAT_ID", "42")
+    yield fake
+    fake.server.shutdown()
+
+
+def test_multipart_body_streams_in_small_reads():
+    body = MultipartBody({"chat_id": "42"}, [("video", "clip.mp4", io.BytesIO(b"x" * 1000))])
+    whole = body.read()
+    body.rewind()
+    pieces = iter(lambda: body.read(7), b"")
+    assert b"".join(pieces) == whole
+    assert len(whole) == len(body)
+
+
+def test_file_upload_is_retried_after_retry_after(bot_api, tmp_path):
+    video = tmp_path / "final_video.mp4"
+    video.write_bytes(b"\x00video" * 5000)
+    bot_api.rate_limit = 1
+
+    start = time.monotonic()
+    telegram_alert.send_telegram_file(str(video), "✅ Final Video")
+
+    assert time.monotonic() - start >= 0.2
+    assert [method for method, _ in bot_api.requests] == ["sendVideo", "sendVideo"]
+    form = bot_api.requests[-1][1]
+    assert form["video"] == ("final_video.mp4", video.read_bytes())
+    assert form["caption"][1].decode() == "✅ Final Video"
+
+
+def test_photos_go_out_as_one_album(bot_api):
+    telegram_alert.send_telegram_media_group([
+        (io.BytesIO(b"png"), "final_image.png", "🖼️ Market Report"),
+        (io.BytesIO(b"jpg"), "insta_image.jpg", None),
+    ])
+
+    (method, form), = bot_api.requests
+    assert method == "sendMediaGroup"
+    media = json.loads(form["media"][1])
+    assert [m["media"] for m in media] == ["attach://photo0", "attach://photo1"]
+    assert media[0]["caption"] == "🖼️ Market Report" and "caption" not in media[1]
+    assert form["photo1"] == ("insta_image.jpg", b"jpg")
+
+
+def test_album_bytes_count_any_file_object(bot_api, tmp_path):
+    photo = tmp_path / "final_image.png"
+    photo.write_bytes(b"p" * 300)
+    RECORDER.reset()
+    with open(photo, "rb") as f:
+        # A file object that isn't a BytesIO, and a BytesIO read from partway
+        partial = io.BytesIO(b"xxjpg")
+        partial.seek(2)
+        telegram_alert.send_telegram_media_group([(f, "final_image.png", None), (partial, "insta_image.jpg", None)])
+
+    [record] = [r for r in RECORDER.records() if r["name"] == "telegram:sendMediaGroup"]
+    assert record["status"] == "ok" and record["bytes"] == 303
+    assert bot_api.requests[0][1]["photo1"] == ("insta_image.jpg", b"jpg")
+
+
+def test_uploads_run_concurrently_in_the_background(bot_api):
+    bot_api.delay = 0.3
+    uploads = Uploader(max_workers=3)
+
+    start = time.monotonic()
+    for name in ("a.mp4", "b.mp4", "c.mp4"):
+        uploads.submit(telegram_alert.send_telegram_file, io.BytesIO(b"data"), None, name)
+    submitted = time.monotonic() - start
+    uploads.flush()
+
+    assert submitted < 0.1
+    assert time.monotonic() - start < 0.8
+    assert len(bot_api.requests) == 3
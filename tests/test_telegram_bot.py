@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from utils.telegram_bot import ApprovalBot
+
+
+class FakeTelegram:
+    """Minimal local stand-in for the Bot API's getUpdates and sendMessage."""
+
+    def __init__(self):
+        self.updates = []
+        self.sent = []
+        self.lock = threading.Condition()
+        self.next_id = 100
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, result):
+                body = json.dumps({"ok": True, "result": result}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                self._reply(fake.get_updates(int(params.get("offset", 0)), float(params.get("timeout", 0))))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+                with fake.lock:
+                    fake.sent.append(form["text"])
+                    fake.lock.notify_all()
+                self._reply({})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def get_updates(self, offset, timeout):
+        deadline = time.time() + min(timeout, 2)
+        with self.lock:
+            while True:
+                if offset < 0:
+                    return self.updates[offset:]
+                pending = [u for u in self.updates if u["update_id"] >= offset]
+                if pending or time.time() >= deadline:
+                    return pending
+                self.lock.wait(deadline - time.time())
+
+    def reply(self, text, chat_id=42):
+        with self.lock:
+            self.next_id += 1
+            self.updates.append({"update_id": self.next_id, "message": {"chat": {"id": chat_id}, "text": text}})
+            self.lock.notify_all()
+
+    def wait_for_message(self, fragment, timeout=5):
+        with self.lock:
+            assert self.lock.wait_for(lambda: any(fragment in m for m in self.sent), timeout), self.sent
+
+
+@pytest.fixture
+def telegram():
+    fake = FakeTelegram()
+    yield fake
+    fake.server.shutdown()
+
+
+@pytest.fixture
+def bot(telegram, tmp_path):
+    bot = ApprovalBot(token="T", chat_id=42, api_url=telegram.url,
+                      offset_file=str(tmp_path / "offset.txt"), poll_timeout=1)
+    yield bot
+    bot.stop()
+
+
+def test_old_replies_are_ignored_and_offset_is_checkpointed(telegram, bot, tmp_path):
+    telegram.reply("yes")  # backlog from an earlier run
+    with ThreadPoolExecutor(1) as pool:
+        answer = pool.submit(bot.wait_sync, "Proceed?")
+        telegram.wait_for_message("Proceed?")
+        telegram.reply("maybe")
+        telegram.wait_for_message("Invalid reply")
+        telegram.reply("No")
+        assert answer.result(timeout=5) is False
+    assert (tmp_path / "offset.txt").read_text() == str(telegram.next_id)
+
+
+def test_replies_are_routed_between_concurrent_jobs(telegram, bot):
+    with ThreadPoolExecutor(2) as pool:
+        audio = pool.submit(bot.wait_sync, "Audio?", job="2025-10-18", stage="audio")
+        video = pool.submit(bot.wait_sync, "Video?", job="2025-10-19", stage="video")
+        telegram.wait_for_message("Audio?")
+        telegram.wait_for_message("Video?")
+
+        telegram.reply("yes")
+        telegram.wait_for_message("Several jobs are waiting")
+        telegram.reply("no 2025-10-19")
+        telegram.reply("yes 2025-10-18 audio")
+        assert audio.result(timeout=5) is True
+        assert video.result(timeout=5) is False
+
+
+def test_messages_from_other_chats_are_ignored(telegram, bot):
+    with ThreadPoolExecutor(1) as pool:
+        answer = pool.submit(bot.wait_sync, "Proceed?")
+        telegram.wait_for_message("Proceed?")
+        telegram.reply("no", chat_id=7)
+        telegram.reply("yes")
+        assert answer.result(timeout=5) is True
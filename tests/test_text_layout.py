@@ -0,0 +1,67 @@
+from utils import text_layout
+from utils.text_layout import fit_text, layout_text
+
+
+class FakeFont:
+    """Monospace stand-in for ImageFont: every character is size/2 wide."""
+
+    def __init__(self, size, path="fake.ttf"):
+        self.size = size
+        self.path = path
+        self.measured = []
+
+    def getlength(self, text):
+        self.measured.append(text)
+        return len(text) * self.size / 2
+
+
+class FakeDraw:
+    def __init__(self):
+        self.calls = []
+
+    def text(self, xy, text, font, fill):
+        self.calls.append((xy, text))
+
+
+def test_words_are_measured_once_and_lines_break_greedily():
+    font = FakeFont(10, "greedy.ttf")
+    # Each character is 5px wide, so 40px holds 8 characters
+    layout = layout_text("aaa bbb ccc aaa\n\nbbbbbbbbbbbb", font, 40, line_spacing=2)
+    assert layout.lines == ["aaa bbb", "ccc aaa", None, "bbbbbbbbbbbb"]
+    assert sorted(font.measured) == [" ", "aaa", "bbb", "bbbbbbbbbbbb", "ccc"]
+
+    draw = FakeDraw()
+    assert layout.draw(draw, 5, 100, fill="black") == 100 + 4 * 12
+    assert draw.calls == [((5, 100), "aaa bbb"), ((5, 112), "ccc aaa"), ((5, 136), "bbbbbbbbbbbb")]
+
+
+def test_layouts_and_widths_are_reused():
+    font = FakeFont(10, "reuse.ttf")
+    first = layout_text("reuse me please", font, 40)
+    assert layout_text("reuse me please", font, 40) is first
+    font.measured.clear()
+    layout_text("please reuse", font, 100)
+    assert font.measured == []
+
+
+def test_fit_text_shrinks_until_the_box_fits():
+    fonts = {}
+
+    def load_font(size):
+        return fonts.setdefault(size, FakeFont(size, "fit.ttf"))
+
+    text = "one two three four five six seven eight"
+    layout = fit_text(text, load_font, max_width=100, max_height=40, size=20)
+    assert layout.height <= 40
+    assert layout.font.size < 20
+    # Only the starting size and the chosen size were ever measured
+    assert set(fonts) == {20, layout.font.size}
+    assert layout_text(text, load_font(layout.font.size + 1), 100).height > 40
+
+
+def test_width_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(text_layout, "MAX_CACHED_WORDS", 2)
+    font = FakeFont(10, "bounded.ttf")
+    text_layout.word_widths(font, ["a", "b", "c"])
+    text_layout.word_widths(font, ["d"])
+    assert len(text_layout._widths[text_layout.font_key(font)]) == 1
@@ -0,0 +1,55 @@
+import ffmpeg
+import pytest
+from PIL import Image
+
+from utils.artifacts import save_image
+from utils.video_creator import render_videos
+
+SECONDS = 2.0
+
+
+@pytest.fixture
+def audio(tmp_path):
+    path = str(tmp_path / "narration.mp3")
+    ffmpeg.input(f"sine=frequency=440:duration={SECONDS}", f="lavfi").output(path).run(quiet=True)
+    return path
+
+
+def durations(path):
+    streams = {s["codec_type"]: s for s in ffmpeg.probe(path)["streams"]}
+    return float(streams["video"]["duration"]), float(streams["audio"]["duration"]), streams["video"]
+
+
+def renditions(tmp_path, frames=False):
+    images = [Image.new("RGB", (64, 36), "red"), Image.new("RGB", (36, 64), "blue")]
+    pairs = []
+    for name, image in zip(("final_video", "insta_video"), images):
+        frame = save_image(image, str(tmp_path / f"{name}.jpg")) if frames else image
+        pairs.append((frame, str(tmp_path / f"{name}.mp4")))
+    return pairs
+
+
+@pytest.mark.parametrize("mode", ["single", "parallel", "sequential"])
+def test_every_mode_writes_videos_as_long_as_the_narration(tmp_path, audio, mode):
+    pairs = renditions(tmp_path, frames=True)
+    assert render_videos(pairs, audio, SECONDS, mode=mode, profile="fast") == [path for _, path in pairs]
+    for _, path in pairs:
+        video, sound, _ = durations(path)
+        assert video == pytest.approx(SECONDS, abs=0.1) and sound == pytest.approx(SECONDS, abs=0.1)
+
+
+def test_still_mode_encodes_one_frame_for_the_whole_narration(tmp_path, audio):
+    pairs = renditions(tmp_path)
+    assert render_videos(pairs, audio, SECONDS, mode="still", profile="fast") == [path for _, path in pairs]
+    for _, path in pairs:
+        video, sound, stream = durations(path)
+        assert video == pytest.approx(SECONDS, abs=0.1) and sound == pytest.approx(SECONDS, abs=0.1)
+        assert int(stream["nb_frames"]) == 1
+
+
+def test_still_mode_clones_the_frame_at_still_fps(tmp_path, audio, monkeypatch):
+    monkeypatch.setattr("utils.video_creator.STILL_FPS", 5)
+    [(image, path)] = renditions(tmp_path)[:1]
+    assert render_videos([(image, path)], audio, SECONDS, mode="still", profile="fast") == [path]
+    video, _, stream = durations(path)
+    assert video == pytest.approx(SECONDS, abs=0.25) and int(stream["nb_frames"]) == pytest.approx(10, abs=1)
@@ -0,0 +1,86 @@
+import io
+import os
+import threading
+
+# Encoder settings per format. PNG level 1 is nearly as fast as the old
+# uncompressed level 0 but several times smaller for flat report slides.
+IMAGE_FORMATS = {
+    "PNG": {"ext": "png", "options": {"compress_level": int(os.getenv("PNG_COMPRESS_LEVEL", "1"))}},
+    "JPEG": {"ext": "jpg", "options": {"quality": int(os.getenv("JPEG_QUALITY", "95"))}}
+}
+EXTENSIONS = {"png": "PNG", "jpg": "JPEG", "jpeg": "JPEG"}
+
+
+def format_for_path(path, default="PNG"):
+    return EXTENSIONS.get(path.rsplit(".", 1)[-1].lower(), default)
+
+
+def encode_image(image, fmt="PNG"):
+    buffer = io.BytesIO()
+    if fmt == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    image.save(buffer, format=fmt, **IMAGE_FORMATS[fmt]["options"])
+    return buffer.getvalue()
+
+
+def save_image(image, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(encode_image(image, format_for_path(path)))
+    return path
+
+
+class Artifact:
+    """A rendered image plus its encodings, each produced once on demand."""
+
+    def __init__(self, name, image, default_format="PNG"):
+        self.name = name
+        self.image = image
+        self.default_format = default_format
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def encode(self, fmt=None):
+        fmt = fmt or self.default_format
+        with self._lock:
+            if fmt not in self._encoded:
+                self._encoded[fmt] = encode_image(self.image, fmt)
+            return self._encoded[fmt]
+
+    def open(self, fmt=None):
+        return io.BytesIO(self.encode(fmt))
+
+    def filename(self, fmt=None):
+        return f"{self.name}.{IMAGE_FORMATS[fmt or self.default_format]['ext']}"
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.encode(format_for_path(path, self.default_format)))
+        return path
+
+
+class ArtifactStore:
+    """Named in-memory artifacts shared between pipeline stages."""
+
+    def __init__(self):
+        self._artifacts = {}
+        self._lock = threading.Lock()
+
+    def put(self, name, image, default_format="PNG"):
+        artifact = Artifact(name, image, default_format)
+        with self._lock:
+            self._artifacts[name] = artifact
+        return artifact
+
+    def get(self, name):
+        with self._lock:
+            return self._artifacts.get(name)
+
+    def discard(self, name):
+        with self._lock:
+            self._artifacts.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._artifacts.clear()
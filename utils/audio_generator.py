@@ -1,28 +1,388 @@
+import hashlib
 import os
-import boto3
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 
-def generate_audio_with_polly(script_text, voice_id="Kajal", output_path="./output/output_polly.mp3"):
-    neural_supported = ["Raveena", "Kajal", "Karan", "Neerja"]
-    engine_type = "neural" if voice_id in neural_supported else "standard"
+from utils.cache import DiskCache
+from utils.instrumentation import span
+from utils.limits import LIMITS
 
-    polly = boto3.client("polly", region_name="ap-south-1")  # Mumbai region for Indian voices
+NEURAL_VOICES = ["Raveena", "Kajal", "Karan", "Neerja"]
+POLLY_REGION = "ap-south-1"  # Mumbai region for Indian voices
+# Polly bills up to 3000 characters per request; stay clear of the limit
+MAX_CHUNK_CHARS = int(os.getenv("POLLY_MAX_CHUNK_CHARS", "2800"))
+MAX_SYNTH_WORKERS = int(os.getenv("POLLY_MAX_WORKERS", "4"))
+STREAM_BLOCK_SIZE = 64 * 1024
+AUDIO_BACKEND = os.getenv("AUDIO_BACKEND", "polly")
+# While a script streams in, start a Polly chunk once this much text is ready
+STREAM_CHUNK_CHARS = int(os.getenv("POLLY_STREAM_CHUNK_CHARS", "400"))
 
-    try:
-        response = polly.synthesize_speech(
-            Text=script_text,
-            OutputFormat="mp3",
-            VoiceId=voice_id,
-            Engine=engine_type
-        )
+SENTENCE_RE = re.compile(r"(?<=[.!?।])\s+|\n+")
+SSML_BREAK_RE = re.compile(r"(<break\b[^>]*/>)")
+SPEAK_RE = re.compile(r"^\s*<speak>(.*)</speak>\s*$", re.S)
+TAG_RE = re.compile(r"<[^>]+>")
 
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+# Synthesized audio never goes stale, so entries only leave by size/count
+AUDIO_CACHE = DiskCache(
+    "audio",
+    ttl=float("inf"),
+    max_entries=int(os.getenv("AUDIO_CACHE_MAX_ENTRIES", "64")),
+    max_bytes=int(float(os.getenv("AUDIO_CACHE_MAX_MB", "200")) * 1024 * 1024)
+)
 
-        with open(output_path, "wb") as f:
-            f.write(response["AudioStream"].read())
 
-        print(f"✅ Polly audio saved to: {output_path} using {voice_id} ({engine_type})")
+# ------------------ SPLITTING ------------------ #
+def _split_long(piece, max_chars):
+    # A single sentence over the limit falls back to word boundaries
+    parts = []
+    current = ""
+    for word in piece.split():
+        if current and len(current) + 1 + len(word) > max_chars:
+            parts.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _pack(pieces, max_chars, joiner=" "):
+    chunks = []
+    current = ""
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        for part in _split_long(piece, max_chars) if len(piece) > max_chars else [piece]:
+            if current and len(current) + len(joiner) + len(part) > max_chars:
+                chunks.append(current)
+                current = part
+            else:
+                current = f"{current}{joiner}{part}" if current else part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def split_script(text, max_chars=MAX_CHUNK_CHARS):
+    """Split a script into Polly-sized chunks at sentence boundaries.
+
+    SSML input (wrapped in <speak>) is split after <break/> tags and
+    sentence ends, and every chunk is re-wrapped in its own <speak>.
+    Returns (chunks, text_type).
+    """
+    ssml = SPEAK_RE.match(text)
+    if ssml:
+        pieces = []
+        for part in SSML_BREAK_RE.split(ssml.group(1)):
+            if SSML_BREAK_RE.fullmatch(part) and pieces:
+                pieces[-1] += part
+            else:
+                pieces.extend(SENTENCE_RE.split(part))
+        limit = max_chars - len("<speak></speak>")
+        return [f"<speak>{chunk}</speak>" for chunk in _pack(pieces, limit)], "ssml"
+    return _pack(SENTENCE_RE.split(text), max_chars), "text"
+
+
+# ------------------ BACKENDS ------------------ #
+_polly = None
+_polly_lock = threading.Lock()
+
+def get_polly_client():
+    # boto3 clients are thread-safe; share one across every chunk and call
+    global _polly
+    with _polly_lock:
+        if _polly is None:
+            import boto3
+            _polly = boto3.client("polly", region_name=POLLY_REGION)
+    return _polly
+
+
+class PollyBackend:
+    def synthesize(self, text, output_path, voice_id, engine, text_type="text"):
+        with span("polly", chars=len(text)) as s:
+            LIMITS["polly"].acquire()
+            response = get_polly_client().synthesize_speech(
+                Text=text,
+                TextType=text_type,
+                OutputFormat="mp3",
+                VoiceId=voice_id,
+                Engine=engine
+            )
+            stream = response["AudioStream"]
+            try:
+                with open(output_path, "wb") as f:
+                    for block in stream.iter_chunks(STREAM_BLOCK_SIZE):
+                        f.write(block)
+                        s.add("bytes", len(block))
+            finally:
+                stream.close()
+        return output_path
+
+
+class StubBackend:
+    """Offline stand-in for Polly: a tone whose length follows the text."""
+
+    def __init__(self, ms_per_char=20):
+        self.ms_per_char = ms_per_char
+        self.calls = []
+
+    def synthesize(self, text, output_path, voice_id, engine, text_type="text"):
+        self.calls.append(text)
+        from pydub.generators import Sine
+        Sine(440).to_audio_segment(duration=len(text) * self.ms_per_char).export(output_path, format="mp3")
         return output_path
 
-    except Exception as e:
-        print(f"❌ Error generating Polly audio: {e}")
-        return None
+
+BACKENDS = {"polly": PollyBackend, "stub": StubBackend}
+
+
+def get_backend(name=None):
+    return BACKENDS[name or AUDIO_BACKEND]()
+
+
+# ------------------ CACHE ------------------ #
+def normalize_script(text):
+    return " ".join(text.split())
+
+
+def audio_cache_key(text, voice_id, engine, backend, fmt="mp3"):
+    """Content address of a synthesis: same text, voice and engine, same audio."""
+    parts = [normalize_script(text), voice_id, engine, type(backend).__name__, fmt]
+    return "audio:" + hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+_durations = {}
+_durations_lock = threading.Lock()
+
+def _file_stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def remember_duration(path, duration, timeline=None):
+    with _durations_lock:
+        _durations[os.path.abspath(path)] = (_file_stamp(path), duration, timeline)
+
+
+def _known(path):
+    with _durations_lock:
+        known = _durations.get(os.path.abspath(path))
+    if known and known[0] == _file_stamp(path):
+        return known
+    return None
+
+
+def copy_audio(path, dest):
+    """Copy an audio file, keeping the duration and timeline known for it."""
+    shutil.copyfile(path, dest)
+    known = _known(path)
+    if known:
+        remember_duration(dest, known[1], known[2])
+    return dest
+
+
+def get_audio_duration(path):
+    """Duration of an audio file in seconds, probing only if it isn't known."""
+    known = _known(path)
+    if known:
+        return known[1]
+    import ffmpeg
+    with span("ffprobe"):
+        duration = float(ffmpeg.probe(path)["format"]["duration"])
+    remember_duration(path, duration)
+    return duration
+
+
+def get_audio_timeline(path):
+    """[(spoken characters, seconds)] per synthesized chunk, or None if unknown.
+
+    Each chunk's characters were spoken over its seconds, which places any
+    point of the script on the audio without aligning words.
+    """
+    known = _known(path)
+    return known[2] if known else None
+
+
+def _timeline(chunks, durations):
+    return [[len(normalize_script(TAG_RE.sub("", chunk))), round(seconds, 3)]
+            for chunk, seconds in zip(chunks, durations)]
+
+
+# ------------------ SYNTHESIS ------------------ #
+def concatenate_mp3(paths, output_path, durations=None):
+    """Join MP3 chunks back to back, without gaps, into one MP3.
+
+    If durations is a list, each chunk's length in seconds is appended to it.
+    """
+    if len(paths) == 1:
+        shutil.copyfile(paths[0], output_path)
+        if durations is not None:
+            durations.append(get_audio_duration(output_path))
+        return output_path
+    from pydub import AudioSegment
+    with span("pydub:concat", chunks=len(paths)):
+        combined = AudioSegment.empty()
+        for path in paths:
+            segment = AudioSegment.from_file(path, format="mp3")
+            if durations is not None:
+                durations.append(len(segment) / 1000)
+            combined += segment
+        combined.export(output_path, format="mp3", bitrate="64k")
+    return output_path
+
+
+def generate_audio_with_polly(script_text, voice_id="Kajal", output_path="./output/output_polly.mp3",
+                              backend=None, max_chars=MAX_CHUNK_CHARS, max_workers=MAX_SYNTH_WORKERS,
+                              cache=AUDIO_CACHE, cancelled=None):
+    """Synthesize script_text to output_path; returns the path, or None on failure.
+
+    cancelled is an optional threading.Event; once set, chunks that have not
+    started are skipped and None is returned.
+    """
+    engine_type = "neural" if voice_id in NEURAL_VOICES else "standard"
+    backend = backend or get_backend()
+    key = audio_cache_key(script_text, voice_id, engine_type, backend)
+
+    with span("tts", chars=len(script_text)) as s:
+        try:
+            entry = cache.get(key) if cache else None
+            if entry:
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                with open(output_path, "wb") as f:
+                    f.write(entry["body"])
+                if entry.get("duration"):
+                    remember_duration(output_path, entry["duration"], entry.get("timeline"))
+                s.set(cached=True)
+                print(f"✅ Polly audio reused from cache: {output_path}")
+                return output_path
+
+            chunks, text_type = split_script(script_text, max_chars)
+            if not chunks:
+                raise ValueError("script is empty")
+
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            durations = []
+            if len(chunks) == 1:
+                backend.synthesize(chunks[0], output_path, voice_id, engine_type, text_type)
+                durations.append(get_audio_duration(output_path))
+            else:
+                with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path)) as tmp:
+                    paths = [os.path.join(tmp, f"chunk_{i:03d}.mp3") for i in range(len(chunks))]
+                    def synthesize(job):
+                        if cancelled is not None and cancelled.is_set():
+                            raise CancelledError()
+                        backend.synthesize(job[0], job[1], voice_id, engine_type, text_type)
+
+                    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+                        list(pool.map(synthesize, zip(chunks, paths)))
+                    concatenate_mp3(paths, output_path, durations)
+            timeline = _timeline(chunks, durations)
+            remember_duration(output_path, get_audio_duration(output_path), timeline)
+
+            if cache:
+                with open(output_path, "rb") as f:
+                    cache.set(key, f.read(), duration=get_audio_duration(output_path), timeline=timeline)
+
+            s.set(cached=False, chunks=len(chunks))
+            print(f"✅ Polly audio saved to: {output_path} using {voice_id} ({engine_type}, {len(chunks)} chunk(s))")
+            return output_path
+
+        except CancelledError:
+            s.status = "cancelled"
+            print("⏹️ Polly audio cancelled")
+            return None
+        except Exception as e:
+            s.status = "failed"
+            print(f"❌ Error generating Polly audio: {e}")
+            return None
+
+
+class StreamingSynthesis:
+    """Synthesizes a script while it is still being written.
+
+    feed() takes finished sentences and starts a Polly chunk whenever
+    min_chars of them have gathered, so the first audio is under way long
+    before the last sentence arrives. finish() synthesizes the rest, joins
+    the chunks and stores the result in the audio cache under the full
+    script, so generate_audio_with_polly() for the same text is a hit.
+    """
+
+    def __init__(self, voice_id="Kajal", backend=None, directory="output", min_chars=STREAM_CHUNK_CHARS,
+                 max_chars=MAX_CHUNK_CHARS, max_workers=MAX_SYNTH_WORKERS, cache=AUDIO_CACHE):
+        self.voice_id = voice_id
+        self.engine = "neural" if voice_id in NEURAL_VOICES else "standard"
+        self.backend = backend or get_backend()
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.cache = cache
+        self.sentences = []
+        self._pending = []
+        self._texts = []
+        self._chunks = []
+        self._cancelled = False
+        os.makedirs(directory, exist_ok=True)
+        self._tmp = tempfile.mkdtemp(dir=directory)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stream-tts")
+
+    def feed(self, sentence):
+        sentence = sentence.strip()
+        if not sentence or self._cancelled:
+            return
+        self.sentences.append(sentence)
+        self._pending.append(sentence)
+        if sum(len(s) + 1 for s in self._pending) > self.min_chars:
+            self._flush()
+
+    def _flush(self):
+        for text in _pack(self._pending, self.max_chars):
+            path = os.path.join(self._tmp, f"chunk_{len(self._chunks):03d}.mp3")
+            self._texts.append(text)
+            self._chunks.append(self._pool.submit(
+                self.backend.synthesize, text, path, self.voice_id, self.engine, "text"
+            ))
+        self._pending = []
+
+    def finish(self, output_path):
+        """Wait for every chunk and write the joined MP3. Returns the path, or None if it failed or was cancelled."""
+        try:
+            if self._cancelled:
+                return None
+            self._flush()
+            if not self._chunks:
+                return None
+            paths = [chunk.result() for chunk in self._chunks]
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            durations = []
+            concatenate_mp3(paths, output_path, durations)
+            timeline = _timeline(self._texts, durations)
+            remember_duration(output_path, get_audio_duration(output_path), timeline)
+            if self.cache:
+                key = audio_cache_key(" ".join(self.sentences), self.voice_id, self.engine, self.backend)
+                with open(output_path, "rb") as f:
+                    self.cache.set(key, f.read(), duration=get_audio_duration(output_path), timeline=timeline)
+            print(f"✅ Streamed Polly audio saved to: {output_path} ({len(paths)} chunk(s))")
+            return output_path
+        except Exception as e:
+            if self._cancelled:
+                return None
+            print(f"❌ Error generating streamed Polly audio: {e}")
+            return None
+        finally:
+            self._discard()
+
+    def cancel(self):
+        self._cancelled = True
+        for chunk in self._chunks:
+            chunk.cancel()
+        # Chunks already at Polly still write into the temp directory
+        threading.Thread(target=self._discard, daemon=True).start()
+
+    def _discard(self):
+        # The temp directory goes only once no chunk can write to it
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(self._tmp, ignore_errors=True)
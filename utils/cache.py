@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+CACHE_DIR = os.getenv("CACHE_DIR", "output/cache")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+CACHE_MAX_BYTES = int(float(os.getenv("CACHE_MAX_MB", "50")) * 1024 * 1024)
+
+
+class DiskCache:
+    """Small on-disk HTTP response cache with a TTL and LRU eviction.
+
+    Each entry is a body file plus a JSON sidecar holding the validators
+    (ETag / Last-Modified) needed for conditional requests. The body file's
+    mtime is bumped on every hit and used as the LRU clock. An expired entry
+    may stand in for a failed fetch for max_stale more seconds (one more
+    TTL by default); after that it is only used for revalidation.
+    """
+
+    def __init__(self, namespace, ttl, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES, directory=CACHE_DIR,
+                 max_stale=None):
+        self.directory = os.path.join(directory, namespace)
+        self.ttl = ttl
+        self.max_stale = ttl if max_stale is None else max_stale
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _paths(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, digest)
+        return base + ".json", base + ".body"
+
+    def get(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+            os.utime(body_path)
+        except (OSError, ValueError):
+            return None
+
+        age = time.time() - meta.get("fetched_at", 0)
+        meta["body"] = body
+        meta["fresh"] = age < self.ttl
+        meta["fallback"] = age <= self.ttl + self.max_stale
+        return meta
+
+    def set(self, key, body, etag=None, last_modified=None, **extra):
+        """Store body under key; extra keyword fields are kept in the sidecar."""
+        os.makedirs(self.directory, exist_ok=True)
+        meta_path, body_path = self._paths(key)
+        meta = dict(extra)
+        meta.update({
+            "key": key,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": time.time()
+        })
+        _atomic_write(body_path, body)
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+        self.evict()
+
+    def refresh(self, key):
+        """Mark an entry as fresh again after a 304 Not Modified."""
+        meta_path, _ = self._paths(key)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        meta["fetched_at"] = time.time()
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def evict(self):
+        with self._lock:
+            try:
+                names = [n for n in os.listdir(self.directory) if n.endswith(".body")]
+            except OSError:
+                return
+
+            entries = []
+            for name in names:
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+            # Oldest access first
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+                _, size, path = entries.pop(0)
+                total -= size
+                for p in (path, path[:-len(".body")] + ".json"):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+
+    def clear(self):
+        with self._lock:
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                return
+            for name in names:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+def _atomic_write(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
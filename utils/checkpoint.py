@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+
+MANIFEST_PATH = "output/manifest.json"
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def input_hash(name, dep_hashes):
+    """Hash of what a stage was computed from: its name and its inputs' hashes."""
+    return _digest(json.dumps([name, list(dep_hashes)]))
+
+
+def fingerprint(result, from_input):
+    """Output hash of a stage that is not checkpointed.
+
+    Plain data (the date, table rows) is hashed by value, so a change flows
+    on to every later stage. Anything else, such as a rendered image, is
+    taken to follow from its inputs.
+    """
+    try:
+        return _digest(json.dumps(result, sort_keys=True))
+    except (TypeError, ValueError):
+        return _digest("derived:" + from_input)
+
+
+class Checkpoint:
+    """How a stage's result is kept in the run manifest.
+
+    dump(result) turns the result into JSON and load(value) turns it back.
+    artifact(value), if given, names a file the result lives in; the
+    checkpoint only counts while that file is unchanged.
+    """
+
+    def __init__(self, dump=None, load=None, artifact=None):
+        self.dump = dump or (lambda result: result)
+        self.load = load or (lambda value: value)
+        self.artifact = artifact
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class RunManifest:
+    """Completed stages of a run, saved after every stage so a restart can resume.
+
+    Each entry holds the stage's input hash, its saved value, the artifact
+    path it wrote (if any) and when it finished. An entry is reused only
+    while its input hash matches and its artifact is unchanged.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.stages = data.get("stages", {})
+        self.completed = data.get("completed")
+
+    def restore(self, name, in_hash, checkpoint):
+        """Return (True, result, output_hash) for a valid entry, else (False, None, None)."""
+        entry = self.stages.get(name)
+        if not entry or entry["input_hash"] != in_hash:
+            return False, None, None
+        if entry.get("artifact") and _stamp(entry["artifact"]) != entry.get("artifact_stamp"):
+            return False, None, None
+        return True, checkpoint.load(entry["value"]), entry["output_hash"]
+
+    def save(self, name, in_hash, result, checkpoint):
+        value = checkpoint.dump(result)
+        artifact = checkpoint.artifact(value) if checkpoint.artifact else None
+        stamp = _stamp(artifact) if artifact else None
+        output_hash = _digest(json.dumps([value, stamp], sort_keys=True))
+        self.stages[name] = {
+            "input_hash": in_hash,
+            "output_hash": output_hash,
+            "value": value,
+            "artifact": artifact,
+            "artifact_stamp": stamp,
+            "completed_at": datetime.now().isoformat(timespec="seconds")
+        }
+        self.completed = None
+        self.write()
+        return output_hash
+
+    def invalidate(self, names):
+        for name in names:
+            self.stages.pop(name, None)
+        self.completed = None
+        self.write()
+
+    def reset(self):
+        self.invalidate(list(self.stages))
+
+    def mark_complete(self, run_key):
+        self.completed = run_key
+        self.write()
+
+    def write(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"stages": self.stages, "completed": self.completed}, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,117 @@
+import os
+from datetime import datetime, timedelta
+
+from utils.artifacts import ArtifactStore
+from utils.report_table import INDIAN_SYMBOLS, GLOBAL_SYMBOLS
+from utils.telegram_alert import Uploader
+
+OUTPUT_ROOT = os.getenv("OUTPUT_ROOT", "output")
+TIMEZONE = "Asia/Kolkata"
+WEEKDAYS = (0, 1, 2, 3, 4)
+
+
+class Edition:
+    """Configuration of one daily report: what it covers and how it looks.
+
+    templates maps "thumbnail", "market" and "insta", and the vertical
+    slides "date", "report", "news" and "thank", to template paths.
+    prompt holds the script_generator.build_messages() options. schedule is
+    the IST "HH:MM" at which the scheduler starts it on the given weekdays.
+    """
+
+    def __init__(self, name, title, templates, prompt, voice_id="Kajal", schedule="08:00", weekdays=WEEKDAYS,
+                 indian_symbols=INDIAN_SYMBOLS, global_symbols=GLOBAL_SYMBOLS):
+        self.name = name
+        self.title = title
+        self.templates = templates
+        self.prompt = prompt
+        self.voice_id = voice_id
+        self.schedule = schedule
+        self.weekdays = tuple(weekdays)
+        self.indian_symbols = list(indian_symbols)
+        self.global_symbols = list(global_symbols)
+
+    @property
+    def symbols(self):
+        return self.indian_symbols + self.global_symbols
+
+    def missing_templates(self):
+        """Template paths that don't exist yet; an edition runs only once this is empty."""
+        return sorted(path for path in set(self.templates.values()) if not os.path.exists(path))
+
+    def next_run(self, now):
+        """The first scheduled start strictly after now (an aware IST datetime)."""
+        hour, minute = (int(part) for part in self.schedule.split(":"))
+        candidate = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if candidate <= now:
+            candidate += timedelta(days=1)
+        while candidate.weekday() not in self.weekdays:
+            candidate += timedelta(days=1)
+        return candidate
+
+
+# Slides after the date one are the same for every edition
+SLIDE_TEMPLATES = {
+    "report": "templates/report.jpg",
+    "news": "templates/news.jpg",
+    "thank": "templates/thank.jpg"
+}
+
+EDITIONS = {
+    "premarket": Edition(
+        "premarket",
+        "Pre Market Report",
+        templates={
+            "thumbnail": "templates/premarket_thumbnail.jpg",
+            "market": "templates/premarket group.jpg",
+            "insta": "templates/insta_image.jpg",
+            "date": "templates/Pre Date.jpg",
+            **SLIDE_TEMPLATES
+        },
+        prompt={},
+        schedule=os.getenv("PREMARKET_SCHEDULE", "08:00")
+    ),
+    # Same layouts as premarket, with "Post Market Report" printed on them
+    "postmarket": Edition(
+        "postmarket",
+        "Post Market Report",
+        templates={
+            "thumbnail": "templates/postmarket_thumbnail.jpg",
+            "market": "templates/postmarket group.jpg",
+            "insta": "templates/postmarket_insta_image.jpg",
+            "date": "templates/Post Date.jpg",
+            **SLIDE_TEMPLATES
+        },
+        prompt={
+            "report_type": "post-market report",
+            "context": "data is about how the market closed today and todays top news so talk in that context",
+            "opening": "Good evening. Here's how the market closed today"
+        },
+        schedule=os.getenv("POSTMARKET_SCHEDULE", "16:15")
+    )
+}
+DEFAULT_EDITION = "premarket"
+
+
+class Job:
+    """One run of an edition, with a working directory of its own.
+
+    Everything the run writes (media, manifest, reports, speculative
+    renders) goes under workdir, and its images and Telegram uploads are
+    kept apart from any other job running in the same process.
+    """
+
+    def __init__(self, edition, root=OUTPUT_ROOT):
+        self.edition = edition
+        self.name = edition.name
+        self.workdir = os.path.join(root, edition.name)
+        self.artifacts = ArtifactStore()
+        self.uploads = Uploader()
+        os.makedirs(self.workdir, exist_ok=True)
+
+    def path(self, *parts):
+        return os.path.join(self.workdir, *parts)
+
+    def today(self):
+        import pytz
+        return datetime.now(pytz.timezone(TIMEZONE)).strftime("%d.%m.%Y")
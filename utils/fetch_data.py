@@ -1,80 +1,255 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+
 import requests
-import feedparser
-from newspaper import Article
+from requests.adapters import HTTPAdapter
 
-# ------------------ STOCK PRICE FETCH ------------------ #
-def get_yahoo_price_with_change(symbol, label):
-    url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    params = {
-        "region": "IN",
-        "lang": "en-IN",
-        "includePrePost": False,
-        "interval": "2m",
-        "range": "1d"
+from utils.cache import DiskCache
+from utils.headline_filter import HEADLINE_FILTER
+from utils.instrumentation import span
+from utils.limits import LIMITS
+from utils.sentiment import UNAVAILABLE, classify_sentiment
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+YAHOO_HEADERS = {"User-Agent": "Mozilla/5.0"}
+YAHOO_PARAMS = {
+    "region": "IN",
+    "lang": "en-IN",
+    "includePrePost": False,
+    "interval": "2m",
+    "range": "1d"
+}
+MAX_FETCH_WORKERS = 16
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+ET_MARKETS_RSS_URL = "https://economictimes.indiatimes.com/markets/rssfeeds/1977021501.cms"
+# Which shared rate limit each host's requests count against
+HOST_LIMITS = {
+    "query1.finance.yahoo.com": "yahoo",
+    "economictimes.indiatimes.com": "rss"
+}
+
+# Quotes are served from disk within their TTL; news is revalidated on every
+# run with a conditional GET, so an unchanged feed costs a single 304. When a
+# fetch fails, an expired entry is only used within its max_stale window:
+# past it, quotes show as unavailable rather than as an old day's prices.
+QUOTE_CACHE = DiskCache("quotes", ttl=int(os.getenv("QUOTE_CACHE_TTL", "1800")),
+                        max_stale=int(os.getenv("QUOTE_MAX_STALE", "1800")))
+NEWS_CACHE = DiskCache("news", ttl=int(os.getenv("NEWS_CACHE_TTL", "0")),
+                       max_stale=int(os.getenv("NEWS_MAX_STALE", "21600")))
+# Past daily candles don't change, so history can be kept for a long time
+HISTORY_CACHE = DiskCache("history", ttl=int(os.getenv("HISTORY_CACHE_TTL", "86400")))
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    # One keep-alive session shared by every fetch, with a pool wide enough
+    # for all concurrent quote requests to reuse their connections.
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_FETCH_WORKERS)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+    return _session
+
+def get_with_retries(url, params=None, headers=None, timeout=10, retries=2, backoff=0.5):
+    session = get_session()
+    host = urlparse(url).netloc
+    limiter = LIMITS.get(HOST_LIMITS.get(host))
+    with span(f"http:{host}", path=urlparse(url).path) as s:
+        for attempt in range(retries + 1):
+            if limiter:
+                limiter.acquire()
+            try:
+                res = session.get(url, params=params, headers=headers, timeout=timeout)
+                if res.status_code not in RETRY_STATUSES or attempt == retries:
+                    s.set(status_code=res.status_code, bytes=len(res.content))
+                    res.raise_for_status()
+                    return res
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == retries:
+                    raise
+            s.add("retries")
+            # Exponential backoff with full jitter so parallel retries don't line up
+            time.sleep(random.uniform(0, backoff * (2 ** attempt)))
+
+def cached_get(cache, url, params=None, headers=None, timeout=10, retries=2):
+    """Return the response body for url, using cache TTL and ETag/Last-Modified."""
+    key = url
+    if params:
+        key += "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+    entry = cache.get(key)
+    if entry and entry["fresh"]:
+        return entry["body"]
+
+    request_headers = dict(headers or {})
+    if entry:
+        if entry.get("etag"):
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    try:
+        res = get_with_retries(url, params=params, headers=request_headers, timeout=timeout, retries=retries)
+    except requests.RequestException:
+        if entry and entry["fallback"]:
+            print(f"⚠️ Fetch failed, using stale cache for: {url}")
+            return entry["body"]
+        if entry:
+            print(f"⚠️ Fetch failed and the cached copy is too old to use: {url}")
+        raise
+
+    if res.status_code == 304 and entry:
+        cache.refresh(key)
+        return entry["body"]
+
+    cache.set(key, res.content, etag=res.headers.get("ETag"), last_modified=res.headers.get("Last-Modified"))
+    return res.content
+
+def _unavailable_quote(label):
+    return {
+        "label": label,
+        "price": "❌",
+        "change_pts": "❌",
+        "change_pct": "❌",
+        "arrow": "⛔",
+        "sentiment": UNAVAILABLE
+    }
+
+def _quote(label, price, previous_close):
+    current_price = round(price, 2)
+    previous_close = round(previous_close, 2)
+    change = round(current_price - previous_close, 2)
+    change_pct = round((change / previous_close) * 100, 2)
+
+    arrow = "▲" if change > 0 else "▼" if change < 0 else "⏸"
+    sentiment = classify_sentiment(change_pct)
+
+    return {
+        "label": label,
+        "price": current_price,
+        "change_pts": change,
+        "change_pct": change_pct,
+        "arrow": arrow,
+        "sentiment": sentiment
     }
 
+# ------------------ STOCK PRICE FETCH ------------------ #
+def get_yahoo_chart(symbol, timeout=10, retries=2):
+    """The chart result for symbol: meta plus the day's 2-minute timestamp and OHLCV arrays."""
+    url = YAHOO_CHART_URL.format(symbol=symbol)
+    body = cached_get(QUOTE_CACHE, url, params=YAHOO_PARAMS, headers=YAHOO_HEADERS, timeout=timeout, retries=retries)
+    return json.loads(body)["chart"]["result"][0]
+
+def get_yahoo_price_with_change(symbol, label, timeout=10, retries=2):
     try:
-        res = requests.get(url, params=params, headers=headers, timeout=10)
-        res.raise_for_status()
-        data = res.json()["chart"]["result"][0]["meta"]
-
-        current_price = round(data["regularMarketPrice"], 2)
-        previous_close = round(data["previousClose"], 2)
-        change = round(current_price - previous_close, 2)
-        change_pct = round((change / previous_close) * 100, 2)
-
-        arrow = "▲" if change > 0 else "▼" if change < 0 else "⏸"
-        sentiment = (
-            "Bullish" if change_pct > 0.4 else
-            "Slight Bullish" if 0 < change_pct <= 0.4 else
-            "Neutral" if abs(change_pct) < 0.2 else
-            "Slight Bearish" if -0.4 <= change_pct < 0 else
-            "Bearish"
-        )
-
-        return {
-            "label": label,
-            "price": current_price,
-            "change_pts": change,
-            "change_pct": change_pct,
-            "arrow": arrow,
-            "sentiment": sentiment
-        }
+        data = get_yahoo_chart(symbol, timeout, retries)["meta"]
+
+        return _quote(label, data["regularMarketPrice"], data["previousClose"])
 
     except Exception:
-        return {
-            "label": label,
-            "price": "❌",
-            "change_pts": "❌",
-            "change_pct": "❌",
-            "arrow": "⛔",
-            "sentiment": "Unavailable"
-        }
+        return _unavailable_quote(label)
+
+def get_market_series(symbols, timeout=10, retries=2, max_workers=MAX_FETCH_WORKERS):
+    """Fetch every (symbol, label) pair's intraday chart concurrently into one MarketSeries."""
+    from utils.market_series import MarketSeries
+
+    symbols = list(symbols)
+
+    def fetch(symbol):
+        try:
+            return get_yahoo_chart(symbol, timeout, retries)
+        except Exception:
+            return None
+
+    charts = []
+    if symbols:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as pool:
+            charts = list(pool.map(fetch, [symbol for symbol, _ in symbols]))
+    return MarketSeries.from_charts(symbols, charts)
+
+def get_yahoo_prices(symbols, timeout=10, retries=2, max_workers=MAX_FETCH_WORKERS):
+    """Fetch all (symbol, label) pairs concurrently; results keep the input order.
+
+    Besides price and change, each quote carries the day's high, low,
+    range, VWAP, opening gap and realized volatility from its intraday bars.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return []
+    return get_market_series(symbols, timeout, retries, max_workers).to_quotes()
+
+# ------------------ HISTORICAL PRICES ------------------ #
+def get_yahoo_daily_closes(symbol, start, end, timeout=10, retries=2):
+    """Daily (date, close) candles for symbol between two dates, oldest first."""
+    # A week of lead-in so the first date still has a previous session
+    period1 = datetime.combine(start - timedelta(days=7), datetime.min.time(), timezone.utc)
+    period2 = datetime.combine(end + timedelta(days=1), datetime.min.time(), timezone.utc)
+    params = {"interval": "1d", "period1": int(period1.timestamp()), "period2": int(period2.timestamp())}
+    url = YAHOO_CHART_URL.format(symbol=symbol)
+
+    body = cached_get(HISTORY_CACHE, url, params=params, headers=YAHOO_HEADERS, timeout=timeout, retries=retries)
+    result = json.loads(body)["chart"]["result"][0]
+    offset = result["meta"].get("gmtoffset", 0)
+    closes = result["indicators"]["quote"][0]["close"]
+
+    candles = []
+    for ts, close in zip(result.get("timestamp", []), closes):
+        if close is not None:
+            day = datetime.fromtimestamp(ts + offset, timezone.utc).date()
+            candles.append((day, close))
+    return candles
+
+def quote_before(candles, label, day):
+    """The quote a pre-market report on day would show: the last close before it."""
+    previous = [close for candle_day, close in candles if candle_day < day]
+    if len(previous) < 2:
+        return _unavailable_quote(label)
+    return _quote(label, previous[-1], previous[-2])
+
+def get_yahoo_history(symbols, start, end, timeout=10, retries=2, max_workers=MAX_FETCH_WORKERS):
+    """Fetch daily candles for all (symbol, label) pairs concurrently.
+
+    Returns one candle list per pair, in input order; a failed fetch gives
+    an empty list, which quote_before() reports as unavailable.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return []
+
+    def fetch(symbol):
+        try:
+            return get_yahoo_daily_closes(symbol, start, end, timeout, retries)
+        except Exception as e:
+            print(f"❌ Failed to fetch history for {symbol}: {e}")
+            return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols))) as pool:
+        return list(pool.map(fetch, [symbol for symbol, _ in symbols]))
 
 # ------------------ MARKET NEWS FETCH ------------------ #
 def get_et_market_articles(limit=5):
-    rss_url = "https://economictimes.indiatimes.com/markets/rssfeeds/1977021501.cms"
-    feed = feedparser.parse(rss_url)
+    try:
+        body = cached_get(NEWS_CACHE, ET_MARKETS_RSS_URL, headers=YAHOO_HEADERS)
+    except requests.RequestException as e:
+        print(f"❌ Failed to fetch market news: {e}")
+        return []
+    import feedparser
+    feed = feedparser.parse(body)
     top_articles = []
 
-    forbidden_phrases = [
-        "stocks to buy", "stocks to watch", "these", "top", "who", "why",
-        "multibagger", "hot stocks", "must buy", "recommend", "price target", "talk", "predict", "what", "want", "smart", "stocks", "tip",
-        "whom", "whose", "when", "where", "which", "how", "how much", "how many", "how far", "how long", "how often", "how come", "this", "that", "those",
-        "head and shoulders", "double top", "double bottom", "triple top", "triple bottom",
-        "rounding top", "rounding bottom", "cup and handle", "island reversal", "diamond top", "diamond bottom",
-        "ascending triangle", "descending triangle", "symmetrical triangle", "falling wedge", "rising wedge",
-        "rectangle pattern", "bullish flag", "bearish flag", "bullish pennant", "bearish pennant", "broadening formation",
-        "megaphone pattern", "channel up", "channel down", "gap up", "gap down", "breakout", "retest",
-        "hammer", "inverted hammer", "bullish engulfing", "bearish engulfing", "morning star", "evening star",
-        "piercing line", "dark cloud cover", "three white soldiers", "three black crows", "doji", "dragonfly doji",
-        "gravestone doji", "spinning top", "marubozu", "says", "shooting star", "harami", "tweezer top", "tweezer bottom"
-    ]
-
     for entry in feed.entries:
         title = entry.title.strip()
-        if any(phrase in title.lower() for phrase in forbidden_phrases):
+        if HEADLINE_FILTER.match(title):
             continue
 
         top_articles.append({
@@ -0,0 +1,110 @@
+import os
+import re
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Resolved from the repo, not the working directory, since it loads at import
+BLOCKLIST_PATH = os.getenv("HEADLINE_BLOCKLIST", os.path.join(ROOT, "config", "headline_blocklist.txt"))
+
+WORD_RE = re.compile(r"\w+")
+MAX_MEMO_TOKENS = 100000
+
+
+def load_blocklist(path=BLOCKLIST_PATH):
+    phrases = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip().lower()
+            if line and not line.startswith("#"):
+                phrases.append(line)
+    return phrases
+
+
+class _Node:
+    __slots__ = ("children", "rule", "prefixes")
+
+    def __init__(self):
+        self.children = {}
+        self.rule = None
+        self.prefixes = []
+
+
+class HeadlineFilter:
+    """Matches headlines against a blocklist of whole-word phrases.
+
+    The phrases are compiled once into a trie keyed by word, so a title is
+    tokenized a single time and each token is a dict lookup rather than a
+    substring scan per phrase. A trailing ``*`` on a phrase's last word
+    matches any word starting with it. The longest phrase starting at the
+    earliest position wins, so "how much" is reported instead of "how".
+    """
+
+    def __init__(self, phrases):
+        self.root = _Node()
+        # Memo of token -> "can a rule start here?", so clean headlines are
+        # rejected with set operations instead of walking the trie.
+        self._seen = set()
+        self._starts = set()
+        for phrase in phrases:
+            self.add(phrase)
+
+    def add(self, phrase):
+        words = phrase.lower().rstrip("*").split()
+        if not words:
+            return
+        node = self.root
+        for word in words[:-1]:
+            node = node.children.setdefault(word, _Node())
+        if phrase.endswith("*"):
+            node.prefixes.append((words[-1], phrase))
+        else:
+            node = node.children.setdefault(words[-1], _Node())
+            node.rule = phrase
+        self._seen.clear()
+        self._starts.clear()
+
+    def _can_start(self, token):
+        if token in self.root.children:
+            return True
+        return any(token.startswith(prefix) for prefix, _ in self.root.prefixes)
+
+    def match(self, title):
+        """Return the blocklist rule that title hits, or None."""
+        tokens = WORD_RE.findall(title.lower())
+        unseen = set(tokens) - self._seen
+        if unseen:
+            if len(self._seen) > MAX_MEMO_TOKENS:
+                self._seen.clear()
+                self._starts.clear()
+            self._starts.update(t for t in unseen if self._can_start(t))
+            self._seen.update(unseen)
+        starts = self._starts
+        if starts.isdisjoint(tokens):
+            return None
+
+        root = self.root
+        for i in range(len(tokens)):
+            if tokens[i] not in starts:
+                continue
+            node = root
+            hit = None
+            for token in tokens[i:]:
+                for prefix, rule in node.prefixes:
+                    if token.startswith(prefix):
+                        hit = rule
+                node = node.children.get(token)
+                if node is None:
+                    break
+                if node.rule is not None:
+                    hit = node.rule
+            if hit is not None:
+                return hit
+        return None
+
+    def classify(self, titles):
+        return [(title, self.match(title)) for title in titles]
+
+    def allowed(self, titles):
+        return [title for title in titles if self.match(title) is None]
+
+
+HEADLINE_FILTER = HeadlineFilter(load_blocklist())
@@ -1,67 +1,131 @@
-from PIL import Image, ImageDraw, ImageFont
 from datetime import datetime
-import pytz
 import os
+import threading
+
+from utils.artifacts import save_image
+from utils.report_table import TABLE_HEADER
+from utils.text_layout import fit_text, layout_text
 
 FONT_PATH = "fonts/Agrandir.ttf"
+TEMPLATE_PATHS = (
+    "templates/premarket group.jpg",
+    "templates/premarket_thumbnail.jpg",
+    "templates/insta_image.jpg",
+    "templates/Pre Date.jpg",
+    "templates/report.jpg",
+    "templates/news.jpg",
+    "templates/thank.jpg"
+)
+FONT_SIZES = (30, 32, 70, 80, 150)
+
+# Process-level caches of decoded templates and parsed fonts. Templates are
+# keyed by path and mtime, so editing a template picks up the new file.
+_templates = {}
+_fonts = {}
+_cache_lock = threading.Lock()
+
+def load_template(path):
+    """Return a fresh RGB copy of a template, decoding the file only once."""
+    from PIL import Image
+
+    key = (path, os.path.getmtime(path))
+    with _cache_lock:
+        img = _templates.get(key)
+    if img is None:
+        img = Image.open(path).convert("RGB")
+        with _cache_lock:
+            # Drop decodes of older versions of the same file
+            for stale in [k for k in _templates if k[0] == path]:
+                del _templates[stale]
+            _templates[key] = img
+    # Copy-on-draw: callers draw on their own copy, never on the cached one
+    return img.copy()
+
+def load_font(size, path=FONT_PATH):
+    from PIL import ImageFont
+
+    key = (path, size)
+    with _cache_lock:
+        font = _fonts.get(key)
+    if font is None:
+        font = ImageFont.truetype(path, size)
+        with _cache_lock:
+            font = _fonts.setdefault(key, font)
+    return font
+
+def warmup(template_paths=TEMPLATE_PATHS, font_sizes=FONT_SIZES, font_path=FONT_PATH):
+    """Decode templates and parse fonts ahead of rendering."""
+    for path in template_paths:
+        load_template(path)
+    for size in font_sizes:
+        load_font(size, font_path)
+
+def evict(path=None):
+    """Drop cached templates and fonts for path, or everything if path is None."""
+    with _cache_lock:
+        if path is None:
+            _templates.clear()
+            _fonts.clear()
+            return
+        for key in [k for k in _templates if k[0] == path]:
+            del _templates[key]
+        for key in [k for k in _fonts if k[0] == path]:
+            del _fonts[key]
 
 def get_current_date_ist():
+    import pytz
     ist = pytz.timezone("Asia/Kolkata")
     return datetime.now(ist).strftime("%d.%m.%Y")
 
 def draw_wrapped_text(draw, text, font, x, y, max_width, line_spacing, fill):
-    for paragraph in text.split("\n"):
-        if not paragraph.strip():
-            y += font.size + line_spacing
-            continue
-        words = paragraph.split()
-        line = ""
-        for word in words:
-            test_line = f"{line} {word}".strip()
-            if draw.textlength(test_line, font=font) <= max_width:
-                line = test_line
-            else:
-                draw.text((x, y), line, font=font, fill=fill)
-                y += font.size + line_spacing
-                line = word
-        if line:
-            draw.text((x, y), line, font=font, fill=fill)
-            y += font.size + line_spacing
-
-def draw_index_table(draw, data, font, start_x, start_y, line_height, fill):
-    col_x = {
-        0: 100,  # Index
-        1: 300,  # Price
-        2: 440,  # Change
-        3: 580,  # %Change
-        4: 750   # Sentiment
-    }
-
+    return layout_text(text, font, max_width, line_spacing).draw(draw, x, y, fill)
+
+def layout_news(news_text, font_size, max_width, line_spacing, max_height=None):
+    """Lay out the news block, shrinking the font to fit max_height if given."""
+    if max_height is None:
+        return layout_text(news_text, load_font(font_size), max_width, line_spacing)
+    return fit_text(news_text, load_font, max_width, max_height, font_size, line_spacing=line_spacing)
+
+# Left edge of each column: Index, Price, Change, %Change, Sentiment
+TABLE_COLUMNS_X = (100, 300, 440, 580, 750)
+
+def _cell_color(column, text, fill):
+    # Change and %Change are green when up, red when down
+    if column in (2, 3):
+        if text.startswith("+"):
+            return "green"
+        if text.startswith("-"):
+            return "red"
+    return fill
+
+def draw_table_rows(draw, rows, font, start_y, line_height, fill, header=True):
+    """Draw TableRows under the header from start_y; returns the y below the last line."""
     y = start_y
-    for row in data:
-        if all(cell.strip() == "" for cell in row):  # Spacer
-            y += line_height
-            continue
-
-        if any("----" in cell for cell in row):  # Skip dashed rows
-            continue
-
-        for j, text in enumerate(row):
-            color = fill
-            if j in (2, 3):  # Change or %Change
-                if "+" in text:
-                    color = "green"
-                elif "-" in text:
-                    color = "red"
-            draw.text((col_x[j], y), text, font=font, fill=color)
+    lines = ([TABLE_HEADER] if header else []) + [row.cells for row in rows]
+    for cells in lines:
+        for column, text in enumerate(cells):
+            draw.text((TABLE_COLUMNS_X[column], y), text, font=font, fill=_cell_color(column, text, fill))
         y += line_height
+    return y
 
-def create_combined_market_image(
+def draw_index_table(draw, table, font, start_x, start_y, line_height, fill, section_gap=None):
+    """Draw a MarketTable from start_y.
+
+    With section_gap, each section gets its own header and that many blank
+    lines separate them; without, one header heads every row.
+    """
+    if section_gap is None:
+        return draw_table_rows(draw, list(table), font, start_y, line_height, fill)
+    y = start_y
+    for i, (_, rows) in enumerate(table.sections()):
+        y = draw_table_rows(draw, rows, font, y + (section_gap * line_height if i else 0), line_height, fill)
+    return y
+
+def render_combined_market_image(
     date_text,
-    table_rows,
+    table,
     news_text,
     template_path="templates/premarket group.jpg",
-    output_path="output/final_image.png",
 
     # Date
     date_font_size=70,
@@ -74,98 +138,97 @@ def create_combined_market_image(
     table_start_x=114,
     table_start_y=330,
     table_line_height=42,
+    table_section_gap=3,
 
     # News
     news_font_size=30,
     news_x=1050,
     news_y=150,
     news_line_spacing=10,
-    news_color="black"
+    news_color="black",
+    news_max_height=None
 ):
+    from PIL import ImageDraw
+
     try:
-        img = Image.open(template_path).convert("RGB")
+        img = load_template(template_path)
         draw = ImageDraw.Draw(img)
         image_width, _ = img.size
 
         # Load fonts
-        date_font = ImageFont.truetype(FONT_PATH, date_font_size)
-        table_font = ImageFont.truetype(FONT_PATH, table_font_size)
-        news_font = ImageFont.truetype(FONT_PATH, news_font_size)
+        date_font = load_font(date_font_size)
+        table_font = load_font(table_font_size)
 
         # Draw date
         draw.text((date_x, date_y), date_text, font=date_font, fill=date_color)
 
         # Draw index table
-        draw_index_table(draw, table_rows, table_font, table_start_x, table_start_y, table_line_height, fill="black")
+        draw_index_table(draw, table, table_font, table_start_x, table_start_y, table_line_height, fill="black",
+                         section_gap=table_section_gap)
 
         # Draw news content
-        draw_wrapped_text(
-            draw,
+        news_layout = layout_news(
             news_text,
-            news_font,
-            news_x,
-            news_y + news_font.size + 10,
+            news_font_size,
             max_width=image_width - news_x - 80,
             line_spacing=news_line_spacing,
-            fill=news_color
+            max_height=news_max_height
         )
+        news_layout.draw(draw, news_x, news_y + news_layout.font.size + 10, fill=news_color)
 
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        # Save image in high quality
-        if output_path.lower().endswith(".jpg") or output_path.lower().endswith(".jpeg"):
-            img.save(output_path, quality=95)
-        elif output_path.lower().endswith(".png"):
-            img.save(output_path, compress_level=0)
-        else:
-            img.save(output_path)  # Fallback default
-
-        print(f"✅ Combined image saved to: {output_path}")
-        return output_path
+        print("✅ Combined image rendered")
+        return img
 
     except Exception as e:
         print(f"❌ Error creating combined image: {e}")
         return None
 
-def create_thumbnail_image(
+def create_combined_market_image(date_text, table, news_text, output_path="output/final_image.png", **layout):
+    img = render_combined_market_image(date_text, table, news_text, **layout)
+    if img is None:
+        return None
+    save_image(img, output_path)
+    print(f"✅ Combined image saved to: {output_path}")
+    return output_path
+
+def render_thumbnail_image(
     date_text,
     template_path="templates/premarket_thumbnail.jpg",
-    output_path="output/thumbnail_image.jpg",
     font_size=150,
     date_x=120,
     date_y=400,
     date_color="black"
 ):
+    from PIL import ImageDraw
+
     try:
-        img = Image.open(template_path).convert("RGB")
+        img = load_template(template_path)
         draw = ImageDraw.Draw(img)
-        font = ImageFont.truetype(FONT_PATH, font_size)
+        font = load_font(font_size)
 
         # Draw the date
         draw.text((date_x, date_y), date_text, font=font, fill=date_color)
 
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        if output_path.lower().endswith(".jpg") or output_path.lower().endswith(".jpeg"):
-            img.save(output_path, quality=95)
-        elif output_path.lower().endswith(".png"):
-            img.save(output_path, compress_level=0)
-        else:
-            img.save(output_path)  # Fallback
-
-        print(f"✅ Thumbnail image saved to: {output_path}")
-        return output_path
+        print("✅ Thumbnail image rendered")
+        return img
 
     except Exception as e:
         print(f"❌ Error creating thumbnail image: {e}")
         return None
 
-def create_instagram_image(
+def create_thumbnail_image(date_text, output_path="output/thumbnail_image.jpg", **layout):
+    img = render_thumbnail_image(date_text, **layout)
+    if img is None:
+        return None
+    save_image(img, output_path)
+    print(f"✅ Thumbnail image saved to: {output_path}")
+    return output_path
+
+def render_instagram_image(
     date_text,
-    table_rows,
+    table,
     news_text,
     template_path="templates/insta_image.jpg",
-    output_path="output/insta_image.jpg",
 
     # Date
     date_font_size=80,
@@ -184,47 +247,120 @@ def create_instagram_image(
     news_x=110,
     news_y=1050,
     news_line_spacing=12,
-    news_color="black"
+    news_color="black",
+    news_max_height=None
 ):
+    from PIL import ImageDraw
+
     try:
-        img = Image.open(template_path).convert("RGB")
+        img = load_template(template_path)
         draw = ImageDraw.Draw(img)
         image_width, _ = img.size
 
-        date_font = ImageFont.truetype(FONT_PATH, date_font_size)
-        table_font = ImageFont.truetype(FONT_PATH, table_font_size)
-        news_font = ImageFont.truetype(FONT_PATH, news_font_size)
+        date_font = load_font(date_font_size)
+        table_font = load_font(table_font_size)
 
         # Draw date
         draw.text((date_x, date_y), date_text, font=date_font, fill=date_color)
 
         # Draw index table
-        draw_index_table(draw, table_rows, table_font, table_start_x, table_start_y, table_line_height, fill="black")
+        draw_index_table(draw, table, table_font, table_start_x, table_start_y, table_line_height, fill="black")
 
         # Draw news
-        draw_wrapped_text(
-            draw,
+        news_layout = layout_news(
             news_text,
-            news_font,
-            news_x,
-            news_y + news_font.size + 10,
+            news_font_size,
             max_width=image_width - news_x - 80,
             line_spacing=news_line_spacing,
-            fill=news_color
+            max_height=news_max_height
         )
+        news_layout.draw(draw, news_x, news_y + news_layout.font.size + 10, fill=news_color)
 
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        print("✅ Instagram image rendered")
+        return img
+
+    except Exception as e:
+        print(f"❌ Error creating Instagram image: {e}")
+        return None
 
-        if output_path.lower().endswith(".jpg") or output_path.lower().endswith(".jpeg"):
-            img.save(output_path, quality=95)
-        elif output_path.lower().endswith(".png"):
-            img.save(output_path, compress_level=0)
-        else:
-            img.save(output_path)
+def create_instagram_image(date_text, table, news_text, output_path="output/insta_image.jpg", **layout):
+    img = render_instagram_image(date_text, table, news_text, **layout)
+    if img is None:
+        return None
+    save_image(img, output_path)
+    print(f"✅ Instagram image saved to: {output_path}")
+    return output_path
 
-        print(f"✅ Instagram image saved to: {output_path}")
-        return output_path
+# ------------------ VERTICAL SLIDES ------------------ #
+def render_date_slide(
+    date_text,
+    template_path="templates/Pre Date.jpg",
+    font_size=70,
+    date_x=115,
+    date_y=1080,
+    date_color="black"
+):
+    # Same as the thumbnail: the date under the title
+    return render_thumbnail_image(date_text, template_path, font_size, date_x, date_y, date_color)
+
+def render_report_slide(
+    table,
+    template_path="templates/report.jpg",
+    table_font_size=32,
+    table_start_x=100,
+    # Below the "India Indices" and "Global Market" headings
+    section_y=(340, 900),
+    table_line_height=46
+):
+    from PIL import ImageDraw
+
+    try:
+        img = load_template(template_path)
+        draw = ImageDraw.Draw(img)
+        font = load_font(table_font_size)
+        for (_, rows), y in zip(table.sections(), section_y):
+            draw_table_rows(draw, rows, font, y, table_line_height, fill="black")
+        print("✅ Report slide rendered")
+        return img
 
     except Exception as e:
-        print(f"❌ Error creating Instagram image: {e}")
+        print(f"❌ Error creating report slide: {e}")
+        return None
+
+def render_news_slide(
+    news_text,
+    template_path="templates/news.jpg",
+    news_font_size=40,
+    news_x=100,
+    news_y=300,
+    news_line_spacing=14,
+    news_color="black",
+    news_max_height=1500
+):
+    from PIL import ImageDraw
+
+    try:
+        img = load_template(template_path)
+        draw = ImageDraw.Draw(img)
+        image_width, _ = img.size
+        news_layout = layout_news(
+            news_text,
+            news_font_size,
+            max_width=image_width - news_x - 80,
+            line_spacing=news_line_spacing,
+            max_height=news_max_height
+        )
+        news_layout.draw(draw, news_x, news_y, fill=news_color)
+        print("✅ News slide rendered")
+        return img
+
+    except Exception as e:
+        print(f"❌ Error creating news slide: {e}")
+        return None
+
+def render_thank_slide(template_path="templates/thank.jpg"):
+    try:
+        return load_template(template_path)
+    except Exception as e:
+        print(f"❌ Error creating thank-you slide: {e}")
         return None
@@ -0,0 +1,223 @@
+import cProfile
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+REPORT_DIR = os.getenv("RUN_REPORT_DIR", "output/reports")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "output/profiles")
+# Comma-separated stage names to profile, or "all"; cprofile or pyinstrument
+PROFILE_STAGES = {name.strip() for name in os.getenv("PROFILE_STAGES", "").split(",") if name.strip()}
+PROFILER = os.getenv("PROFILER", "cprofile")
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident memory so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Span:
+    __slots__ = ("name", "kind", "parent", "start", "duration", "status", "attrs")
+
+    def __init__(self, name, kind, parent, attrs):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.start = None
+        self.duration = None
+        self.status = "ok"
+        self.attrs = dict(attrs)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def add(self, key, amount=1):
+        """Accumulate a counter such as bytes or retries."""
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    def to_dict(self):
+        record = {
+            "name": self.name,
+            "kind": self.kind,
+            "parent": self.parent,
+            "start": round(self.start, 4) if self.start is not None else None,
+            "duration": round(self.duration, 4) if self.duration is not None else None,
+            "status": self.status
+        }
+        record.update(self.attrs)
+        return record
+
+
+class Recorder:
+    """Collects timed spans for every stage and external call in a run.
+
+    span() is a context manager and traced() a decorator. Spans opened on
+    the same thread nest, so a call made inside a stage names that stage as
+    its parent. Stage spans can also be profiled (PROFILE_STAGES), and
+    write() dumps everything as JSONL with a summary line at the end.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self.started_at = datetime.now()
+            self._origin = time.perf_counter()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name, kind="call", **attrs):
+        stack = self._stack()
+        span = Span(name, kind, stack[-1].name if stack else None, attrs)
+        profiler = self._start_profiler(name) if kind == "stage" else None
+        stack.append(span)
+        start = time.perf_counter()
+        span.start = start - self._origin
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "failed"
+            span.attrs["error"] = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            span.attrs["peak_rss_mb"] = peak_rss_mb()
+            stack.pop()
+            if profiler is not None:
+                self._save_profile(name, profiler)
+            with self._lock:
+                self.spans.append(span)
+
+    def traced(self, name=None, kind="call"):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name or fn.__name__, kind):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, kind, start, duration, status="ok", **attrs):
+        """Add a span that was timed elsewhere, e.g. in a worker process."""
+        span = Span(name, kind, None, attrs)
+        span.start = start - self._origin
+        span.duration = duration
+        span.status = status
+        with self._lock:
+            self.spans.append(span)
+
+    # ------------------ PROFILING ------------------ #
+    def _start_profiler(self, name):
+        if name not in PROFILE_STAGES and "all" not in PROFILE_STAGES:
+            return None
+        if PROFILER == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                profiler = Profiler()
+                profiler.start()
+                return profiler
+            except ImportError:
+                print("⚠️ pyinstrument is not installed; profiling with cProfile.")
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Python 3.12+ allows one active profiler at a time
+            print(f"⚠️ Not profiling {name}: {e}")
+            return None
+        return profiler
+
+    def _save_profile(self, name, profiler):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            path = os.path.join(PROFILE_DIR, f"{name}.prof")
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = os.path.join(PROFILE_DIR, f"{name}.html")
+            with open(path, "w") as f:
+                f.write(profiler.output_html())
+        print(f"🔬 Profile for {name} saved to: {path}")
+
+    # ------------------ REPORTING ------------------ #
+    def records(self):
+        with self._lock:
+            spans = list(self.spans)
+        return [span.to_dict() for span in sorted(spans, key=lambda s: s.start)]
+
+    def totals(self):
+        """Per span name: count, total seconds, bytes, retries and failures."""
+        totals = OrderedDict()
+        for record in self.records():
+            entry = totals.setdefault(record["name"], {
+                "kind": record["kind"], "count": 0, "seconds": 0.0, "bytes": 0, "retries": 0, "failed": 0
+            })
+            entry["count"] += 1
+            entry["seconds"] = round(entry["seconds"] + (record["duration"] or 0), 4)
+            entry["bytes"] += record.get("bytes", 0)
+            entry["retries"] += record.get("retries", 0)
+            entry["failed"] += record["status"] == "failed"
+        return totals
+
+    def summary(self):
+        return {
+            "type": "summary",
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall": round(time.perf_counter() - self._origin, 3),
+            "peak_rss_mb": peak_rss_mb(),
+            "totals": self.totals()
+        }
+
+    def write(self, directory=REPORT_DIR):
+        """Write one JSON line per span plus a summary line. Returns the path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"run-{self.started_at:%Y%m%d-%H%M%S}.jsonl")
+        with open(path, "w") as f:
+            for record in self.records():
+                f.write(json.dumps(record) + "\n")
+            f.write(json.dumps(self.summary()) + "\n")
+        return path
+
+    def summary_text(self, top=8):
+        summary = self.summary()
+        lines = [f"📈 Run report: {summary['wall']:.1f}s wall, peak RSS {summary['peak_rss_mb']} MB"]
+        for kind, title in (("stage", "Slowest stages"), ("call", "External calls")):
+            rows = [(name, t) for name, t in summary["totals"].items() if t["kind"] == kind]
+            if not rows:
+                continue
+            lines.append(f"\n{title}:")
+            for name, t in sorted(rows, key=lambda row: -row[1]["seconds"])[:top]:
+                extras = []
+                if t["count"] > 1:
+                    extras.append(f"×{t['count']}")
+                if t["bytes"]:
+                    extras.append(f"{t['bytes'] / 1024:.0f} KB")
+                if t["retries"]:
+                    extras.append(f"{t['retries']} retries")
+                if t["failed"]:
+                    extras.append(f"{t['failed']} failed")
+                lines.append(f"• {name}: {t['seconds']:.2f}s" + (f" ({', '.join(extras)})" if extras else ""))
+        return "\n".join(lines)
+
+
+# One recorder per process; every util reports into it
+RECORDER = Recorder()
+span = RECORDER.span
+traced = RECORDER.traced
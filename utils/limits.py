@@ -0,0 +1,55 @@
+import os
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket shared by every job in the process.
+
+    acquire() blocks until a call is allowed: up to `burst` calls at once,
+    refilled at `rate` calls per second.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _limiter(name, rate, burst):
+    return RateLimiter(
+        float(os.getenv(f"{name}_RATE", rate)),
+        float(os.getenv(f"{name}_BURST", burst))
+    )
+
+
+# Calls per second per external API, whichever edition is making them.
+# Polly's default quota is 8 TPS; Telegram allows about 30 messages a second.
+LIMITS = {
+    "yahoo": _limiter("YAHOO", 10, 20),
+    "rss": _limiter("RSS", 2, 2),
+    "openai": _limiter("OPENAI", 1, 3),
+    "polly": _limiter("POLLY", 8, 8),
+    "telegram": _limiter("TELEGRAM", 20, 20)
+}
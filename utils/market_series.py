@@ -0,0 +1,185 @@
+import warnings
+
+import numpy as np
+
+from utils.fetch_data import _unavailable_quote
+from utils.sentiment import classify_sentiments
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def _first_valid(values):
+    # Value at the first non-NaN column of every row (NaN for empty rows)
+    valid = ~np.isnan(values)
+    index = valid.argmax(axis=1)
+    first = values[np.arange(len(values)), index]
+    return np.where(valid.any(axis=1), first, np.nan)
+
+
+def _divide(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+
+def breadth(change_pct):
+    """Advancing, declining and unchanged counts across symbols; NaN counts as unavailable."""
+    change = np.asarray(change_pct, dtype=float)
+    return {
+        "advancing": int((change > 0).sum()),
+        "declining": int((change < 0).sum()),
+        "unchanged": int((change == 0).sum()),
+        "unavailable": int(np.isnan(change).sum())
+    }
+
+
+class MarketSeries:
+    """Intraday candles for many symbols at once, one row per symbol.
+
+    The chart API's timestamp and OHLCV arrays are padded with NaN to a
+    common length, so every indicator is a single NumPy operation across
+    all symbols rather than a loop over rows. price and previous_close
+    come from the chart's meta block, as does gmtoffset, the exchange's UTC
+    offset in seconds. A symbol whose fetch failed is a row of NaN and
+    reports as unavailable.
+    """
+
+    def __init__(self, symbols, labels, timestamps, open, high, low, close, volume, price, previous_close,
+                 gmtoffset=None):
+        self.symbols = list(symbols)
+        self.labels = list(labels)
+        self.timestamps = timestamps
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.price = price
+        self.previous_close = previous_close
+        self.gmtoffset = np.zeros(len(self.symbols), dtype=np.int64) if gmtoffset is None else gmtoffset
+
+    @classmethod
+    def from_charts(cls, symbols, charts):
+        """Build from (symbol, label) pairs and their chart results (None if the fetch failed)."""
+        symbols = list(symbols)
+        # At least one (empty) bar, so the reductions work when every fetch failed
+        width = max((len(chart.get("timestamp") or []) for chart in charts if chart), default=1) or 1
+        shape = (len(symbols), width)
+        timestamps = np.zeros(shape, dtype=np.int64)
+        arrays = {field: np.full(shape, np.nan) for field in FIELDS}
+        price = np.full(len(symbols), np.nan)
+        previous_close = np.full(len(symbols), np.nan)
+        gmtoffset = np.zeros(len(symbols), dtype=np.int64)
+
+        for row, chart in enumerate(charts):
+            if not chart:
+                continue
+            meta = chart.get("meta", {})
+            price[row] = meta.get("regularMarketPrice", np.nan)
+            previous_close[row] = meta.get("previousClose", meta.get("chartPreviousClose", np.nan))
+            gmtoffset[row] = meta.get("gmtoffset") or 0
+            stamps = chart.get("timestamp") or []
+            timestamps[row, :len(stamps)] = stamps
+            quote = (chart.get("indicators", {}).get("quote") or [{}])[0]
+            for field in FIELDS:
+                # None (a bar with no trades) becomes NaN
+                values = np.array(quote.get(field) or [], dtype=float)[:width]
+                arrays[field][row, :len(values)] = values
+
+        return cls(
+            [symbol for symbol, _ in symbols], [label for _, label in symbols], timestamps,
+            arrays["open"], arrays["high"], arrays["low"], arrays["close"], arrays["volume"],
+            price, previous_close, gmtoffset
+        )
+
+    def __len__(self):
+        return len(self.symbols)
+
+    # ------------------ INDICATORS ------------------ #
+    @property
+    def change(self):
+        return self.price - self.previous_close
+
+    @property
+    def change_pct(self):
+        return _divide(self.change, self.previous_close) * 100
+
+    def _reduce(self, fn, values):
+        # nanmax/nanmin warn on all-NaN rows; those rows stay NaN
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return fn(values, axis=1)
+
+    def day_high(self):
+        return self._reduce(np.nanmax, self.high)
+
+    def day_low(self):
+        return self._reduce(np.nanmin, self.low)
+
+    def day_range_pct(self):
+        """High-to-low range of the session as a percentage of the previous close."""
+        return _divide(self.day_high() - self.day_low(), self.previous_close) * 100
+
+    def vwap(self):
+        """Volume-weighted average of each bar's typical price.
+
+        Indices report no volume, so a row without any falls back to the
+        plain average of the typical price.
+        """
+        typical = (self.high + self.low + self.close) / 3
+        volume = np.where(np.isnan(typical), 0.0, np.nan_to_num(self.volume))
+        weighted = _divide(np.nansum(typical * volume, axis=1), volume.sum(axis=1))
+        return np.where(np.isnan(weighted), self._reduce(np.nanmean, typical), weighted)
+
+    def gap_pct(self):
+        """Opening gap: the first bar's open against the previous close."""
+        return _divide(_first_valid(self.open) - self.previous_close, self.previous_close) * 100
+
+    def realized_volatility(self):
+        """Square root of the summed squared log returns between bars, in percent of the session."""
+        # Carry the last close over empty bars, so a gap isn't a missing return
+        valid = ~np.isnan(self.close)
+        last = np.maximum.accumulate(np.where(valid, np.arange(self.close.shape[1]), 0), axis=1)
+        close = self.close[np.arange(len(self.close))[:, None], last]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.diff(np.log(close), axis=1)
+        squared = np.where(np.isnan(returns), 0.0, returns ** 2)
+        counted = (~np.isnan(returns)).any(axis=1)
+        return np.where(counted, np.sqrt(squared.sum(axis=1)) * 100, np.nan)
+
+    def breadth(self, mask=None):
+        change = self.change_pct if mask is None else self.change_pct[np.asarray(mask)]
+        return breadth(change)
+
+    def sentiment(self):
+        """Sentiment of every symbol, judged against its own day's swings and its VWAP."""
+        return classify_sentiments(self.change_pct, self.realized_volatility(), self.price - self.vwap())
+
+    # ------------------ OUTPUT ------------------ #
+    def to_quotes(self):
+        """One quote dict per symbol, as get_yahoo_prices() returns them."""
+        columns = {
+            "price": np.round(self.price, 2),
+            "change_pts": np.round(self.change, 2),
+            "change_pct": np.round(self.change_pct, 2),
+            "day_high": np.round(self.day_high(), 2),
+            "day_low": np.round(self.day_low(), 2),
+            "day_range_pct": np.round(self.day_range_pct(), 2),
+            "vwap": np.round(self.vwap(), 2),
+            "gap_pct": np.round(self.gap_pct(), 2),
+            "volatility": np.round(self.realized_volatility(), 2)
+        }
+        arrows = np.select([self.change > 0, self.change < 0], ["▲", "▼"], "⏸")
+        sentiments = self.sentiment()
+        available = ~np.isnan(self.change_pct)
+        # NaN becomes None so quotes stay valid JSON for the run manifest
+        values = {name: np.where(np.isnan(column), None, column).tolist() for name, column in columns.items()}
+
+        quotes = []
+        for row, label in enumerate(self.labels):
+            if not available[row]:
+                quotes.append(_unavailable_quote(label))
+                continue
+            quote = {"label": label, "arrow": str(arrows[row]), "sentiment": sentiments[row]}
+            quote.update((name, column[row]) for name, column in values.items())
+            quotes.append(quote)
+        return quotes
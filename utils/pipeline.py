@@ -0,0 +1,206 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from utils.checkpoint import fingerprint, input_hash
+from utils.instrumentation import RECORDER
+
+MAX_THREAD_WORKERS = 8
+MAX_PROCESS_WORKERS = 2
+
+
+class PipelineAbort(Exception):
+    """Raised by a stage to stop the run without treating it as a crash."""
+
+
+class Stage:
+    __slots__ = ("name", "fn", "deps", "executor", "checkpoint")
+
+    def __init__(self, name, fn, deps=(), executor="thread", checkpoint=None):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor for stage {name!r}: {executor}")
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.executor = executor
+        self.checkpoint = checkpoint
+
+
+def _run_stage(stage, args, attrs):
+    # Thread stages run inside a span, so their external calls nest under it
+    with RECORDER.span(stage.name, kind="stage", **attrs):
+        return stage.fn(*args)
+
+
+class Pipeline:
+    """Runs named stages as a dependency graph.
+
+    Each stage is called with the results of its dependencies as positional
+    arguments, in the order they were declared. A stage starts as soon as all
+    of its dependencies have finished, so independent branches overlap on a
+    thread pool. Stages marked ``executor="process"`` go to a small process
+    pool instead; their function and arguments must be picklable.
+
+    If a stage raises, no new stages are started, the ones already running
+    are allowed to finish, and the exception is re-raised from run().
+
+    Every stage is recorded as a span in utils.instrumentation.RECORDER,
+    tagged with the job name when several jobs share the process.
+
+    With a utils.checkpoint.RunManifest, stages added with a Checkpoint
+    are saved as they finish. On the next run such a stage is restored
+    instead of run, as long as everything it was computed from is unchanged.
+    """
+
+    def __init__(self, max_workers=MAX_THREAD_WORKERS, process_workers=MAX_PROCESS_WORKERS, manifest=None, job=None):
+        self.stages = {}
+        self.job = job
+        self.max_workers = max_workers
+        self.process_workers = process_workers
+        self.manifest = manifest
+        self.timings = {}
+        self.wall_time = 0.0
+
+    def add(self, name, fn, deps=(), executor="thread", checkpoint=None):
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self.stages[name] = Stage(name, fn, deps, executor, checkpoint)
+        return fn
+
+    def stage(self, name, deps=(), executor="thread", checkpoint=None):
+        def decorator(fn):
+            return self.add(name, fn, deps, executor, checkpoint)
+        return decorator
+
+    def downstream(self, name):
+        """Names of every stage that depends on name, directly or not."""
+        found = set()
+        for other in self.order():
+            if any(dep == name or dep in found for dep in self.stages[other].deps):
+                found.add(other)
+        return found
+
+    def order(self):
+        """Return stage names in a valid execution order, checking the graph."""
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {stage.name!r} depends on unknown stage {dep!r}")
+
+        ordered = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError("Dependency cycle: " + " -> ".join(path + [name]))
+            state[name] = "visiting"
+            for dep in self.stages[name].deps:
+                visit(dep, path + [name])
+            state[name] = "done"
+            ordered.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return ordered
+
+    def _restore(self, stage, in_hash):
+        if self.manifest is None or stage.checkpoint is None:
+            return False, None, None
+        return self.manifest.restore(stage.name, in_hash, stage.checkpoint)
+
+    def _output_hash(self, stage, in_hash, result):
+        if self.manifest is not None and stage.checkpoint is not None:
+            return self.manifest.save(stage.name, in_hash, result, stage.checkpoint)
+        return fingerprint(result, in_hash)
+
+    def run(self):
+        order = self.order()
+        results = {}
+        hashes = {}
+        in_hashes = {}
+        self.timings = {}
+        pending = list(order)
+        running = {}
+        error = None
+
+        threads = ThreadPoolExecutor(max_workers=self.max_workers)
+        attrs = {"job": self.job} if self.job else {}
+        processes = None
+        if any(self.stages[name].executor == "process" for name in order):
+            # Spawn rather than fork: other stages' threads may be mid-request
+            processes = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        started_at = time.perf_counter()
+        try:
+            while pending or running:
+                # Restoring a stage can make more stages ready straight away
+                ready = error is None
+                while ready:
+                    ready = [n for n in pending if all(d in results for d in self.stages[n].deps)]
+                    for name in ready:
+                        stage = self.stages[name]
+                        pending.remove(name)
+                        in_hashes[name] = input_hash(name, [hashes[dep] for dep in stage.deps])
+                        restored, result, output_hash = self._restore(stage, in_hashes[name])
+                        if restored:
+                            results[name] = result
+                            hashes[name] = output_hash
+                            self.timings[name] = (time.perf_counter() - started_at, 0.0, "restored")
+                            RECORDER.record(name, "stage", time.perf_counter(), 0.0, "restored", **attrs)
+                            continue
+                        pool = processes if stage.executor == "process" else threads
+                        args = [results[dep] for dep in stage.deps]
+                        if stage.executor == "process":
+                            future = pool.submit(stage.fn, *args)
+                        else:
+                            future = pool.submit(_run_stage, stage, args, attrs)
+                        running[future] = (name, time.perf_counter())
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, start = running.pop(future)
+                    end = time.perf_counter()
+                    try:
+                        results[name] = future.result()
+                        hashes[name] = self._output_hash(self.stages[name], in_hashes[name], results[name])
+                        status = "ok"
+                    except PipelineAbort as e:
+                        status = "aborted"
+                        error = error or e
+                    except Exception as e:
+                        status = "failed"
+                        error = error or e
+                    self.timings[name] = (start - started_at, end - start, status)
+                    if self.stages[name].executor == "process":
+                        RECORDER.record(name, "stage", start, end - start, status, executor="process", **attrs)
+        finally:
+            threads.shutdown(wait=True)
+            if processes is not None:
+                processes.shutdown(wait=True)
+            self.wall_time = time.perf_counter() - started_at
+
+        for name in pending:
+            self.timings[name] = (None, None, "skipped")
+        if error is not None:
+            raise error
+        return results
+
+    def report(self):
+        lines = ["⏱️ Stage timings:"]
+        busy = 0.0
+        for name in self.order():
+            start, duration, status = self.timings.get(name, (None, None, "skipped"))
+            if duration is None:
+                lines.append(f"  {name:<22} {'':>8}  {'':>8}  {status}")
+                continue
+            busy += duration
+            lines.append(f"  {name:<22} {start:7.2f}s  {duration:7.2f}s  {status}")
+        lines.append(f"  {'total (wall clock)':<22} {'':>8}  {self.wall_time:7.2f}s  stage time {busy:.2f}s")
+        return "\n".join(lines)
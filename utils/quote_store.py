@@ -0,0 +1,211 @@
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+QUOTE_STORE_DIR = os.getenv("QUOTE_STORE_DIR", "output/quotes")
+SECONDS_PER_DAY = 86400
+EPOCH = date(1970, 1, 1)
+
+# One 2-minute bar, keyed by its UTC timestamp
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"), ("volume", "<f8")
+])
+# One session, keyed by its day number (days since 1970-01-01 on the exchange's calendar)
+DAY_DTYPE = np.dtype([
+    ("day", "<i4"), ("price", "<f8"), ("previous_close", "<f8"), ("day_high", "<f8"), ("day_low", "<f8"),
+    ("vwap", "<f8"), ("gap_pct", "<f8"), ("volatility", "<f8")
+])
+BARS_FILE = "bars.bin"
+DAYS_FILE = "days.bin"
+
+
+def day_number(value):
+    """Days since 1970-01-01 for a date; ints pass through."""
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return (value - EPOCH).days
+    return int(value)
+
+
+def to_date(number):
+    return EPOCH + timedelta(days=int(number))
+
+
+def _timestamp(value, end=False):
+    # A bare date covers the whole UTC day, so as an end bound it means midnight after it
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, date):
+        start = datetime.combine(value, datetime.min.time(), timezone.utc)
+        return int(start.timestamp()) + (SECONDS_PER_DAY - 1 if end else 0)
+    return int(value)
+
+
+def _between(rows, key, start, end):
+    # rows are sorted by key, so the range is two binary searches and a view
+    lo = 0 if start is None else int(np.searchsorted(rows[key], start, side="left"))
+    hi = len(rows) if end is None else int(np.searchsorted(rows[key], end, side="right"))
+    return rows[lo:max(lo, hi)]
+
+
+def _align(arrays, key, field):
+    """The union of keys across arrays and a (len(arrays), keys) matrix of field, NaN where absent."""
+    keys = np.unique(np.concatenate([rows[key] for rows in arrays])) if arrays else np.empty(0, np.int64)
+    matrix = np.full((len(arrays), len(keys)), np.nan)
+    for i, rows in enumerate(arrays):
+        matrix[i, np.searchsorted(keys, rows[key])] = rows[field]
+    return keys, matrix
+
+
+class QuoteStore:
+    """Local history of every symbol's intraday bars and daily quotes.
+
+    Each symbol gets a directory holding bars.bin and days.bin: packed
+    records of BAR_DTYPE and DAY_DTYPE kept sorted by their key. Reads
+    memory-map the file and binary-search the range, so a query over years
+    of 2-minute bars only pages in the rows it returns. Writes merge by key:
+    re-recording a day replaces its rows, and a value the new rows leave NaN
+    keeps the stored one. Files only ever grow, so a reader holding a view
+    never sees its pages disappear.
+    """
+
+    def __init__(self, directory=QUOTE_STORE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, name):
+        return os.path.join(self.directory, quote(symbol, safe=""), name)
+
+    def _map(self, symbol, name, dtype):
+        path = self._path(symbol, name)
+        try:
+            # A record cut short by a crash is ignored and overwritten by the next write
+            count = os.path.getsize(path) // dtype.itemsize
+        except OSError:
+            count = 0
+        if not count:
+            return np.empty(0, dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+    def _merge(self, symbol, name, dtype, key, rows):
+        rows = np.sort(np.asarray(rows, dtype=dtype), order=key)
+        if not len(rows):
+            return 0
+        path = self._path(symbol, name)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            stored = self._map(symbol, name, dtype)
+            # Everything before the first new key stays where it is
+            keep = int(np.searchsorted(stored[key], rows[key][0], side="left"))
+            tail = np.array(stored[keep:])
+            del stored
+
+            combined = np.concatenate([rows, tail])
+            # np.unique keeps the first occurrence, so the new rows win
+            _, first = np.unique(combined[key], return_index=True)
+            merged = combined[first]
+            positions = np.searchsorted(merged[key], tail[key])
+            for field in dtype.names:
+                if field != key:
+                    column = merged[field]
+                    column[positions] = np.where(np.isnan(column[positions]), tail[field], column[positions])
+
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.seek(keep * dtype.itemsize)
+                f.write(merged.tobytes())
+        return len(rows)
+
+    # ------------------ WRITES ------------------ #
+    def append_bars(self, symbol, bars):
+        """Store BAR_DTYPE rows for symbol; bars without a close are dropped."""
+        bars = np.asarray(bars, dtype=BAR_DTYPE)
+        return self._merge(symbol, BARS_FILE, BAR_DTYPE, "ts", bars[~np.isnan(bars["close"])])
+
+    def append_days(self, symbol, days):
+        """Store DAY_DTYPE rows for symbol; days without a price are dropped."""
+        days = np.asarray(days, dtype=DAY_DTYPE)
+        return self._merge(symbol, DAYS_FILE, DAY_DTYPE, "day", days[~np.isnan(days["price"])])
+
+    def append_closes(self, symbol, candles):
+        """Store (date, close) candles, as get_yahoo_daily_closes() returns them."""
+        days = np.zeros(len(candles), dtype=DAY_DTYPE)
+        for field in DAY_DTYPE.names[1:]:
+            days[field] = np.nan
+        days["day"] = [day_number(day) for day, _ in candles]
+        days["price"] = [close for _, close in candles]
+        return self.append_days(symbol, days)
+
+    def record(self, series):
+        """Store every symbol's bars and session quote from a MarketSeries; returns the symbols stored."""
+        columns = {
+            "day_high": series.day_high(),
+            "day_low": series.day_low(),
+            "vwap": series.vwap(),
+            "gap_pct": series.gap_pct(),
+            "volatility": series.realized_volatility()
+        }
+        stored = 0
+        for row, symbol in enumerate(series.symbols):
+            stamped = series.timestamps[row] > 0
+            if not stamped.any() or np.isnan(series.price[row]):
+                continue
+            bars = np.empty(int(stamped.sum()), dtype=BAR_DTYPE)
+            bars["ts"] = series.timestamps[row, stamped]
+            for field in ("open", "high", "low", "close", "volume"):
+                bars[field] = getattr(series, field)[row, stamped]
+            self.append_bars(symbol, bars)
+
+            # The session is the exchange's local date of its last bar
+            day = np.empty(1, dtype=DAY_DTYPE)
+            day["day"] = (bars["ts"].max() + series.gmtoffset[row]) // SECONDS_PER_DAY
+            day["price"] = series.price[row]
+            day["previous_close"] = series.previous_close[row]
+            for name, column in columns.items():
+                day[name] = column[row]
+            self.append_days(symbol, day)
+            stored += 1
+        return stored
+
+    # ------------------ READS ------------------ #
+    def bars(self, symbol, start=None, end=None):
+        """Bars for symbol between two datetimes, dates or epoch seconds, inclusive; a read-only view."""
+        start = None if start is None else _timestamp(start)
+        end = None if end is None else _timestamp(end, end=True)
+        return _between(self._map(symbol, BARS_FILE, BAR_DTYPE), "ts", start, end)
+
+    def days(self, symbol, start=None, end=None):
+        """Session rows for symbol between two dates (or day numbers), inclusive; a read-only view."""
+        start = None if start is None else day_number(start)
+        end = None if end is None else day_number(end)
+        return _between(self._map(symbol, DAYS_FILE, DAY_DTYPE), "day", start, end)
+
+    def daily_closes(self, symbol, start=None, end=None):
+        """(date, close) candles for symbol, oldest first, like get_yahoo_daily_closes()."""
+        days = self.days(symbol, start, end)
+        return [(to_date(day), float(price)) for day, price in zip(days["day"].tolist(), days["price"].tolist())]
+
+    def window(self, symbols, start=None, end=None, field="close"):
+        """Bars of many symbols side by side: (timestamps, matrix) with one row per symbol.
+
+        Timestamps are the union across symbols; a symbol without a bar at
+        one is NaN there.
+        """
+        return _align([self.bars(symbol, start, end) for symbol in symbols], "ts", field)
+
+    def daily(self, symbols, start=None, end=None, field="price"):
+        """Sessions of many symbols side by side: (dates, matrix) with one row per symbol."""
+        days, matrix = _align([self.days(symbol, start, end) for symbol in symbols], "day", field)
+        return [to_date(day) for day in days.tolist()], matrix
+
+    def symbols(self):
+        try:
+            return sorted(unquote(entry.name) for entry in os.scandir(self.directory) if entry.is_dir())
+        except OSError:
+            return []
+
+
+QUOTES = QuoteStore()
@@ -0,0 +1,99 @@
+from utils.sentiment import as_floats, classify_sentiments
+
+INDIAN_SYMBOLS = [
+    ("^NSEI", "NIFTY 50"),
+    ("^BSESN", "SENSEX"),
+    ("^NSEBANK", "BANK NIFTY")
+]
+GLOBAL_SYMBOLS = [
+    ("^DJI", "Dow Jones"),
+    ("^IXIC", "NASDAQ"),
+    ("^FTSE", "FTSE 100"),
+    ("^N225", "Nikkei 225")
+]
+TABLE_HEADER = ("Index", "Price", "Change", "%Change", "Sentiment")
+# Indian indices first, then global ones
+TABLE_SECTIONS = ("india", "global")
+
+class TableRow:
+    """One index in the report table: its numbers, its sentiment and the cells they format to."""
+
+    __slots__ = ("section", "label", "price", "change", "change_pct", "sentiment", "cells")
+
+    def __init__(self, section, label, price, change, change_pct, sentiment, cells):
+        self.section = section
+        self.label = label
+        self.price = price
+        self.change = change
+        self.change_pct = change_pct
+        self.sentiment = sentiment
+        self.cells = cells
+
+class MarketTable:
+    """The index table every layout draws from: typed rows in TABLE_SECTIONS order.
+
+    Layouts decide for themselves how sections are spaced and whether each
+    repeats TABLE_HEADER; the table only holds what is shown.
+    """
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def section(self, name):
+        return [row for row in self.rows if row.section == name]
+
+    def sections(self):
+        """(name, rows) for every section with rows, in TABLE_SECTIONS order."""
+        grouped = [(name, self.section(name)) for name in TABLE_SECTIONS]
+        return [(name, rows) for name, rows in grouped if rows]
+
+    def to_text(self):
+        """Tab-separated text of each section under its header, for the script prompt."""
+        return "\n\n".join(
+            "\n".join("\t".join(cells) for cells in [TABLE_HEADER] + [row.cells for row in rows])
+            for _, rows in self.sections()
+        )
+
+def _vwap_bias(item):
+    try:
+        return float(item["price"]) - float(item["vwap"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def build_table(quotes, indian_count=len(INDIAN_SYMBOLS)):
+    """The MarketTable for quotes, which come Indian symbols first, then global ones.
+
+    Every column is converted and every sentiment classified in one pass;
+    a quote without a price or change is left out.
+    """
+    import numpy as np
+
+    items = [item or {} for item in quotes]
+    price = as_floats([item.get("price") for item in items])
+    change = as_floats([item.get("change_pts") for item in items])
+    change_pct = as_floats([item.get("change_pct") for item in items])
+    sentiments = classify_sentiments(
+        change_pct,
+        [item.get("volatility") for item in items],
+        [_vwap_bias(item) for item in items]
+    )
+    available = np.flatnonzero(~(np.isnan(price) | np.isnan(change) | np.isnan(change_pct))).tolist()
+    # Prices and changes are shown as whole numbers, cut toward zero
+    prices = np.trunc(price).tolist()
+    changes = np.trunc(change).tolist()
+    percents = change_pct.tolist()
+
+    rows = []
+    for i in available:
+        cells = (items[i]["label"], f"{int(prices[i]):,}", f"{int(changes[i]):+}", f"{percents[i]:+.2f}%",
+                 sentiments[i])
+        section = TABLE_SECTIONS[0] if i < indian_count else TABLE_SECTIONS[1]
+        rows.append(TableRow(section, items[i]["label"], float(price[i]), float(change[i]), percents[i],
+                             sentiments[i], cells))
+    return MarketTable(rows)
@@ -0,0 +1,88 @@
+import threading
+import time
+from datetime import datetime
+
+from utils.editions import TIMEZONE
+
+
+def now_ist():
+    import pytz
+    return datetime.now(pytz.timezone(TIMEZONE))
+
+
+def next_due(editions, now):
+    """Return (start time, [edition names]) of the next scheduled runs after now."""
+    runs = {}
+    for edition in editions:
+        runs.setdefault(edition.next_run(now), []).append(edition.name)
+    first = min(runs)
+    return first, runs[first]
+
+
+class Scheduler:
+    """Starts each edition at its scheduled time, every edition on its own thread.
+
+    run_job(edition) does one run. An edition that is still running when it
+    comes due again is skipped rather than started twice. A run that raises
+    is logged and kept in failures, so the other editions carry on. on_idle()
+    is called whenever the last running job finishes, e.g. to write a report.
+    """
+
+    def __init__(self, editions, run_job, on_idle=None, clock=now_ist, sleep=time.sleep):
+        self.editions = {edition.name: edition for edition in editions}
+        self.run_job = run_job
+        self.on_idle = on_idle
+        self.clock = clock
+        self.sleep = sleep
+        self.running = {}
+        self.failures = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def start(self, name):
+        """Run an edition now in the background. Returns its thread, or None if it is already running."""
+        with self._lock:
+            if name in self.running:
+                print(f"⚠️ {name} is still running; skipping this start.")
+                return None
+            thread = threading.Thread(target=self._run, args=(name,), name=f"job-{name}")
+            self.running[name] = thread
+        thread.start()
+        return thread
+
+    def _run(self, name):
+        try:
+            self.run_job(self.editions[name])
+        except Exception as e:
+            print(f"❌ {name} run failed: {e}")
+            self.failures[name] = e
+        finally:
+            with self._lock:
+                self.running.pop(name, None)
+                idle = not self.running
+            if idle and self.on_idle:
+                self.on_idle()
+
+    def run_forever(self):
+        while not self._stopped.is_set():
+            due, names = next_due(self.editions.values(), self.clock())
+            print(f"⏰ Next run: {', '.join(names)} at {due:%a %d.%m.%Y %H:%M}")
+            # Sleep in short steps so a clock change or stop() is noticed
+            while not self._stopped.is_set():
+                remaining = (due - self.clock()).total_seconds()
+                if remaining <= 0:
+                    break
+                self.sleep(min(remaining, 60))
+            if self._stopped.is_set():
+                break
+            for name in names:
+                self.start(name)
+
+    def stop(self):
+        self._stopped.set()
+
+    def join(self):
+        with self._lock:
+            threads = list(self.running.values())
+        for thread in threads:
+            thread.join()
@@ -1,15 +1,126 @@
-from openai import OpenAI
+import hashlib
+import json
 import os
+import re
+import threading
+import time
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from utils.cache import DiskCache
+from utils.instrumentation import span
+from utils.limits import LIMITS
 
-def generate_youtube_script_from_report(report_text):
-    prompt = f"""You are a financial content creator writing for Indian retail traders. Based on the following pre-market report:
+SCRIPT_MODEL = "gpt-4"
+SCRIPT_TEMPERATURE = 0.8
+SCRIPT_BACKEND = os.getenv("SCRIPT_BACKEND", "openai")
+# A sentence is done once whitespace follows its closing punctuation
+SENTENCE_END_RE = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+# Replies are kept per prompt and variant, so reruns replay instead of paying again
+SCRIPT_CACHE = DiskCache("scripts", ttl=float(os.getenv("SCRIPT_CACHE_TTL", "inf")))
+# Latency and token usage of every script requested in this process
+SCRIPT_CALLS = []
+
+SYSTEM_PROMPT = "You are a professional content creator for Indian financial YouTube . Your tone is mostly english with simple, relatable words — no slang. Your goal is to sound human, helpful, and relevant."
+
+
+# ------------------ BACKENDS ------------------ #
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            # The openai package alone takes most of a second to import
+            from openai import OpenAI
+            _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+class OpenAIBackend:
+    def stream(self, messages, model, temperature, usage=None):
+        LIMITS["openai"].acquire()
+        response = get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        for chunk in response:
+            if chunk.usage and usage is not None:
+                usage["prompt_tokens"] = chunk.usage.prompt_tokens
+                usage["completion_tokens"] = chunk.usage.completion_tokens
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+FAKE_SCRIPT = (
+    "Good morning. Let’s get you ready for today's market session. "
+    "Nifty closed higher yesterday, led by banks and IT. "
+    "Global cues are mixed this morning, so expect a cautious open. "
+    "If this helped, like, share and subscribe for the daily report!"
+)
+
+
+class FakeLLMBackend:
+    """Offline stand-in for GPT: streams a fixed script in small pieces."""
+
+    def __init__(self, text=FAKE_SCRIPT, piece_chars=8, delay=0.0):
+        self.text = text
+        self.piece_chars = piece_chars
+        self.delay = delay
+        self.calls = []
+
+    def stream(self, messages, model, temperature, usage=None):
+        self.calls.append(messages)
+        pieces = 0
+        for i in range(0, len(self.text), self.piece_chars):
+            if self.delay:
+                time.sleep(self.delay)
+            pieces += 1
+            yield self.text[i:i + self.piece_chars]
+        if usage is not None:
+            usage["prompt_tokens"] = sum(len(m["content"].split()) for m in messages)
+            usage["completion_tokens"] = pieces
+
+
+LLM_BACKENDS = {"openai": OpenAIBackend, "fake": FakeLLMBackend}
+
+
+def get_llm_backend(name=None):
+    return LLM_BACKENDS[name or SCRIPT_BACKEND]()
+
+
+# ------------------ GENERATION ------------------ #
+def iter_sentences(pieces):
+    """Regroup streamed text pieces into whole sentences as soon as each ends."""
+    buffer = ""
+    for piece in pieces:
+        buffer += piece
+        *done, buffer = SENTENCE_END_RE.split(buffer)
+        for sentence in done:
+            if sentence.strip():
+                yield sentence.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+
+PROMPT_DEFAULTS = {
+    "report_type": "pre-market report",
+    "context": "mostly data is about yestewrday market performance and todays top news so talk in that context",
+    "opening": "Good morning. Let’s get you ready for today's market session"
+}
+
+
+def build_messages(report_text, report_type=PROMPT_DEFAULTS["report_type"], context=PROMPT_DEFAULTS["context"],
+                   opening=PROMPT_DEFAULTS["opening"]):
+    prompt = f"""You are a financial content creator writing for Indian retail traders. Based on the following {report_type}:
 
 \"\"\"{report_text}\"\"\"
 
-Write a short, clear, human-sounding YouTube script for pre market report in english that mostly data is about yestewrday market performance and todays top news so talk in that context:
-- Start with signature line, "Good morning. Let’s get you ready for today's market session". as it is. 
+Write a short, clear, human-sounding YouTube script for {report_type} in english that {context}:
+- Start with signature line, "{opening}". as it is. 
 - Includes only relevant and helpful info for a trader, about Indian market updates (NIFTY/SENSEX/BANK NIFTY if available).
 - See if out of any news can have impact on stock market, which is not related to stocks. 
 - Sounds like a human is speaking (not robotic)
@@ -24,13 +135,79 @@ The tone should feel helpful and energetic, like you're helping a fellow trader
 Respond with only the final script.
 """
 
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": "You are a professional content creator for Indian financial YouTube . Your tone is mostly english with simple, relatable words — no slang. Your goal is to sound human, helpful, and relevant."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.8
-    )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def script_cache_key(messages, model, temperature, backend, variant):
+    prompt_hash = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"script:{type(backend).__name__}:{model}:{temperature}:{variant}:{prompt_hash}"
+
+
+def _record_call(variant, cached, latency, first_sentence, usage):
+    call = {
+        "variant": variant,
+        "cached": cached,
+        "latency": round(latency, 3),
+        "first_sentence": round(first_sentence, 3) if first_sentence is not None else None,
+        "prompt_tokens": (usage or {}).get("prompt_tokens"),
+        "completion_tokens": (usage or {}).get("completion_tokens")
+    }
+    SCRIPT_CALLS.append(call)
+    return call
+
+
+def generate_youtube_script_from_report(report_text, on_sentence=None, backend=None, variant=0,
+                                        cache=SCRIPT_CACHE, prompt=None):
+    """Stream a script from the model and return its full text.
+
+    on_sentence(sentence) is called for every finished sentence while the
+    rest is still being generated, so previews and TTS can start early.
+    Replies are cached per prompt and variant: the same report and variant
+    replay the stored script, and a regeneration asks for the next variant.
+    prompt overrides build_messages() options (report_type, context, opening).
+    """
+    backend = backend or get_llm_backend()
+    messages = build_messages(report_text, **(prompt or {}))
+    key = script_cache_key(messages, SCRIPT_MODEL, SCRIPT_TEMPERATURE, backend, variant)
+
+    with span("gpt", model=SCRIPT_MODEL, variant=variant) as s:
+        entry = cache.get(key) if cache else None
+        if entry:
+            script_text = entry["body"].decode("utf-8")
+            for sentence in iter_sentences([script_text]):
+                if on_sentence:
+                    on_sentence(sentence)
+            _record_call(variant, True, 0.0, None, entry.get("usage"))
+            s.set(cached=True)
+            print(f"♻️ Script variant {variant} replayed from cache")
+            return script_text
+
+        pieces = []
+        usage = {}
+        start = time.perf_counter()
+        first_sentence = None
+
+        def collect():
+            for piece in backend.stream(messages, SCRIPT_MODEL, SCRIPT_TEMPERATURE, usage=usage):
+                pieces.append(piece)
+                yield piece
+
+        for sentence in iter_sentences(collect()):
+            if first_sentence is None:
+                first_sentence = time.perf_counter() - start
+            if on_sentence:
+                on_sentence(sentence)
+        script_text = "".join(pieces).strip()
+        latency = time.perf_counter() - start
 
-    return response.choices[0].message.content.strip()
+        if cache and script_text:
+            cache.set(key, script_text.encode("utf-8"), usage=usage, latency=latency, variant=variant)
+        call = _record_call(variant, False, latency, first_sentence, usage)
+        s.set(cached=False, first_sentence=call["first_sentence"], **usage)
+    print(f"🧠 Script variant {variant} generated in {call['latency']}s "
+          f"(first sentence {call['first_sentence']}s, "
+          f"{call['prompt_tokens']} prompt + {call['completion_tokens']} completion tokens)")
+    return script_text
@@ -0,0 +1,64 @@
+SENTIMENTS = ("Bearish", "Slight Bearish", "Neutral", "Slight Bullish", "Bullish")
+UNAVAILABLE = "Unavailable"
+
+# % change for a strong and a slight move on a calm day
+STRONG_MOVE = 0.7
+SLIGHT_MOVE = 0.3
+# On a choppy day a move must also stand out against the day's own swings
+# (realized volatility, in %)
+STRONG_VOLATILITY_RATIO = 0.5
+SLIGHT_VOLATILITY_RATIO = 0.2
+
+# (level, % move, share of realized volatility): a change beyond both, in the
+# level's direction, earns it. Checked in order; no match is Neutral (level 0).
+SENTIMENT_RULES = (
+    (2, STRONG_MOVE, STRONG_VOLATILITY_RATIO),
+    (1, SLIGHT_MOVE, SLIGHT_VOLATILITY_RATIO),
+    (-2, STRONG_MOVE, STRONG_VOLATILITY_RATIO),
+    (-1, SLIGHT_MOVE, SLIGHT_VOLATILITY_RATIO)
+)
+# A strong move that closed on the wrong side of VWAP had faded
+FADED_LEVELS = {2: 1, -2: -1}
+
+
+def as_floats(values):
+    """A float array of quote fields; None and placeholders such as "❌" become NaN."""
+    import numpy as np
+    return np.array([np.nan if v is None or isinstance(v, str) else v for v in values], dtype=float)
+
+
+def classify_sentiments(change_pct, volatility=None, vwap_bias=None):
+    """Sentiment labels for arrays of % changes, all at once, by SENTIMENT_RULES.
+
+    volatility raises the thresholds for symbols that swung a lot during
+    the day. vwap_bias is price minus VWAP, and moves a faded strong move
+    down to a slight one. Missing values are ignored; a missing change is
+    Neutral.
+    """
+    import numpy as np
+
+    change = as_floats(change_pct)
+    swings = np.zeros(change.shape) if volatility is None else np.nan_to_num(as_floats(volatility))
+    # NaN compares false everywhere, so it lands on Neutral
+    conditions = [
+        np.sign(level) * change > np.maximum(move, ratio * swings)
+        for level, move, ratio in SENTIMENT_RULES
+    ]
+    level = np.select(conditions, [level for level, _, _ in SENTIMENT_RULES], 0)
+    if vwap_bias is not None:
+        bias = as_floats(vwap_bias)
+        for strong, slight in FADED_LEVELS.items():
+            level = np.where((level == strong) & (np.sign(bias) == -np.sign(strong)), slight, level)
+    return np.array(SENTIMENTS)[level + 2].tolist()
+
+
+def classify_sentiment(change, volatility=None, vwap_bias=None):
+    try:
+        change = float(change)
+    except (ValueError, TypeError):
+        return "Neutral"
+    return classify_sentiments(
+        [change],
+        None if volatility is None else [volatility],
+        None if vwap_bias is None else [vwap_bias]
+    )[0]
@@ -0,0 +1,120 @@
+import os
+import re
+from functools import partial
+
+from utils.audio_generator import SENTENCE_RE, normalize_script
+
+# The narration runs intro -> market -> news -> outro, one slide per section
+SECTIONS = ("intro", "market", "news", "outro")
+MIN_SLIDE_SECONDS = float(os.getenv("MIN_SLIDE_SECONDS", "2"))
+
+# The sign-off asks viewers to like, share, subscribe or comment
+OUTRO_RE = re.compile(r"\bsubscrib\w*|\blike,? share\b|\bcomments?\b", re.I)
+WORD_RE = re.compile(r"[a-z][a-z'’]{3,}")
+# Words every part of a market script uses; they say nothing about the news
+COMMON_WORDS = {
+    "nifty", "sensex", "bank", "banks", "market", "markets", "stock", "stocks", "today", "global", "index",
+    "indices", "points", "trade", "traders", "with", "from", "that", "this", "after", "over", "into", "amid"
+}
+
+
+class Slide:
+    """One slide of the vertical video: what it shows and which part of the script it covers.
+
+    render() returns the PIL image; it is only called when the video is
+    composed, so slides render in parallel with the encode.
+    """
+
+    __slots__ = ("name", "section", "render", "text")
+
+    def __init__(self, name, section, render, text=None):
+        if section not in SECTIONS:
+            raise ValueError(f"Unknown section for slide {name!r}: {section}")
+        self.name = name
+        self.section = section
+        self.render = render
+        self.text = text
+
+
+def build_slides(date_text, table, news_text, templates):
+    """The date, report, news and thank-you slides for one report."""
+    from utils.image_templates import render_date_slide, render_news_slide, render_report_slide, render_thank_slide
+    return [
+        Slide("date", "intro", partial(render_date_slide, date_text, template_path=templates["date"])),
+        Slide("report", "market", partial(render_report_slide, table, template_path=templates["report"])),
+        Slide("news", "news", partial(render_news_slide, news_text, template_path=templates["news"]), text=news_text),
+        Slide("thank", "outro", partial(render_thank_slide, template_path=templates["thank"]))
+    ]
+
+
+def _words(text):
+    return set(WORD_RE.findall(text.lower())) - COMMON_WORDS
+
+
+def split_sections(script_text, news_text=""):
+    """Character count of the script spoken in each of SECTIONS.
+
+    The first sentence is the signature opening. The outro starts at the
+    first call to like, share or subscribe. In between, the news starts at
+    the first sentence that shares two words with a headline, or halfway
+    if none does.
+    """
+    sentences = [s for s in SENTENCE_RE.split(normalize_script(script_text)) if s]
+    outro = next((i for i in range(1, len(sentences)) if OUTRO_RE.search(sentences[i])), len(sentences))
+    headlines = [_words(line) for line in news_text.splitlines() if line.strip()]
+    news = next(
+        (i for i in range(1, outro) if any(len(_words(sentences[i]) & words) >= 2 for words in headlines)),
+        (1 + outro) // 2
+    )
+    bounds = [0, min(1, len(sentences)), min(news, outro), outro, len(sentences)]
+    # Sentences are joined back with single spaces
+    return {
+        section: sum(len(s) + 1 for s in sentences[start:end])
+        for section, start, end in zip(SECTIONS, bounds, bounds[1:])
+    }
+
+
+def _time_at(chars, timeline):
+    # Walk the chunks; within a chunk speech is taken to be evenly paced
+    elapsed = 0.0
+    for chunk_chars, seconds in timeline:
+        if chars <= chunk_chars:
+            return elapsed + seconds * chars / max(chunk_chars, 1)
+        chars -= chunk_chars
+        elapsed += seconds
+    return elapsed
+
+
+def slide_durations(slides, script_text, duration, timeline=None):
+    """Seconds each slide is shown, adding up to the audio's duration.
+
+    timeline is audio_generator.get_audio_timeline() for the narration; each
+    section's start is placed on it by character position. Without one the
+    whole narration is taken as evenly paced. Every slide gets at least
+    MIN_SLIDE_SECONDS, taken from the longest one.
+    """
+    news_text = next((slide.text for slide in slides if slide.section == "news" and slide.text), "")
+    lengths = split_sections(script_text, news_text)
+    total = sum(lengths.values())
+    spoken = sum(chars for chars, _ in timeline) if timeline else 0
+    if not timeline or not spoken:
+        timeline, spoken = [(total, duration)], total
+    scale = spoken / max(total, 1)
+
+    starts = {}
+    offset = 0
+    for section in SECTIONS:
+        starts[section] = _time_at(offset * scale, timeline)
+        offset += lengths[section]
+    # A section without a slide is shown on the slide before it
+    shown = [slide.section for slide in slides]
+    times = [0.0] + [starts[section] for section in shown[1:]] + [duration]
+    durations = [max(end - start, 0.0) for start, end in zip(times, times[1:])]
+
+    floor = min(MIN_SLIDE_SECONDS, duration / max(len(durations), 1))
+    for i, seconds in enumerate(durations):
+        if seconds < floor:
+            longest = max(range(len(durations)), key=durations.__getitem__)
+            durations[longest] -= floor - seconds
+            durations[i] = floor
+    return durations
@@ -0,0 +1,131 @@
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+SPECULATIVE_DIR = "output/speculative"
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculative")
+# Candidates whose work has not finished yet
+_running = set()
+_running_lock = threading.Lock()
+
+
+class Cancelled(Exception):
+    pass
+
+
+class SpeculativeRender:
+    """Synthesizes audio and renders the videos for a candidate script early.
+
+    The work runs in the background in its own directory while the script
+    (or the audio) is waiting for approval. take_audio() and take_videos()
+    wait for the results and copy them to their final paths. cancel()
+    discards the candidate: steps that have not started are skipped and the
+    directory is removed as soon as the running step finishes.
+
+    synthesize(script_text, audio_path, cancelled) returns the audio path or
+    None. render(audio_path, output_dir, cancelled) returns the main video
+    path or None and writes any other renditions next to it. cancelled is a
+    threading.Event both should check to stop early.
+    """
+
+    def __init__(self, script_text, synthesize, render, directory=SPECULATIVE_DIR, audio_path=None):
+        self.script_text = script_text
+        self.directory = os.path.join(directory, uuid.uuid4().hex[:12])
+        self.audio = Future()
+        self.video = Future()
+        self._synthesize = synthesize
+        self._render = render
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        self._lock = threading.RLock()
+        os.makedirs(self.directory, exist_ok=True)
+        with _running_lock:
+            _running.add(self)
+        self._job = _executor.submit(self._run, audio_path)
+
+    def _check(self):
+        if self._cancelled.is_set():
+            raise Cancelled()
+
+    def _run(self, audio_path):
+        try:
+            self._check()
+            if audio_path is None:
+                audio_path = self._synthesize(self.script_text, os.path.join(self.directory, "output_polly.mp3"),
+                                              self._cancelled)
+            self._check()
+            self.audio.set_result(audio_path)
+            video_path = self._render(audio_path, self.directory, self._cancelled) if audio_path else None
+            self._check()
+            self.video.set_result(video_path)
+        except Exception as e:
+            for future in (self.audio, self.video):
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Under the lock so a concurrent cancel() sees either a running
+            # candidate (cleaned up here) or a finished one (cleaned up there)
+            with self._lock:
+                if self._cancelled.is_set():
+                    self._remove()
+                self._finished.set()
+            with _running_lock:
+                _running.discard(self)
+
+    def take_audio(self, dest):
+        """Wait for the audio and copy it to dest. Returns dest, or None on failure."""
+        try:
+            path = self.audio.result()
+        except Exception as e:
+            print(f"❌ Speculative audio failed: {e}")
+            return None
+        if not path or not os.path.exists(path):
+            return None
+        from utils.audio_generator import copy_audio
+        # Copy rather than move: the video render may still be reading it
+        return copy_audio(path, dest)
+
+    def take_videos(self, output_dir="output"):
+        """Wait for the videos and move every rendition into output_dir."""
+        try:
+            path = self.video.result()
+        except Exception as e:
+            print(f"❌ Speculative video failed: {e}")
+            return None
+        if not path or not os.path.exists(path):
+            return None
+        for name in os.listdir(self.directory):
+            if name.endswith(".mp4"):
+                os.replace(os.path.join(self.directory, name), os.path.join(output_dir, name))
+        return os.path.join(output_dir, os.path.basename(path))
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled.set()
+            for future in (self.audio, self.video):
+                future.cancel()
+            if self._finished.is_set():
+                self._remove()
+
+    def cleanup(self):
+        """Remove the candidate's directory once its running step has finished."""
+        wait([self._job])
+        self._remove()
+
+    def _remove(self):
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def discard_all(directory=SPECULATIVE_DIR):
+    """Cancel every candidate under directory, wait for their running steps, then remove it."""
+    prefix = os.path.join(directory, "")
+    with _running_lock:
+        candidates = [candidate for candidate in _running if candidate.directory.startswith(prefix)]
+    for candidate in candidates:
+        candidate.cancel()
+    wait([candidate._job for candidate in candidates])
+    shutil.rmtree(directory, ignore_errors=True)
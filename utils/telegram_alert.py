@@ -1,45 +1,327 @@
+import json
+import mimetypes
 import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from utils.instrumentation import span
+from utils.limits import LIMITS
 
 BOT_TOKEN = os.getenv("TELEGRAM_TOKEN")
 CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+# Telegram rate-limits edits of one message; keep them at least this far apart
+EDIT_INTERVAL = float(os.getenv("TELEGRAM_EDIT_INTERVAL", "1.5"))
+UPLOAD_WORKERS = int(os.getenv("TELEGRAM_UPLOAD_WORKERS", "3"))
+MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "4"))
+MAX_RETRY_AFTER = 60
+# (connect, read) seconds; a read covers Telegram processing a whole video
+REQUEST_TIMEOUT = (10, 300)
+UPLOAD_BLOCK_SIZE = 256 * 1024
+
+FILE_FIELDS = {
+    "mp4": "video",
+    "png": "photo",
+    "jpg": "photo",
+    "jpeg": "photo",
+    "mp3": "audio"
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    # One keep-alive session for every send, sized for the upload workers
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UPLOAD_WORKERS + 2)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+    return _session
+
+
+class MultipartBody:
+    """A multipart/form-data body read from its files as it is sent.
+
+    requests builds `files=` uploads fully in memory; this streams each file
+    in UPLOAD_BLOCK_SIZE blocks instead, with a known Content-Length.
+    files is a list of (field, filename, file object) and rewind() starts
+    the body over for a retry.
+    """
+
+    def __init__(self, fields, files):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self._parts = []
+        for name, value in fields.items():
+            self._parts.append(self._header(name) + str(value).encode("utf-8") + b"\r\n")
+        for field, filename, f in files:
+            start = f.tell()
+            f.seek(0, os.SEEK_END)
+            size = f.tell() - start
+            mime = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            self._parts.append(self._header(field, filename, mime))
+            self._parts.append((f, start, size))
+            self._parts.append(b"\r\n")
+        self._parts.append(f"--{self.boundary}--\r\n".encode("ascii"))
+        self.length = sum(len(p) if isinstance(p, bytes) else p[2] for p in self._parts)
+        self.rewind()
+
+    def _header(self, name, filename=None, mime=None):
+        disposition = f'form-data; name="{name}"'
+        lines = [f"--{self.boundary}"]
+        if filename:
+            disposition += f'; filename="{os.path.basename(filename)}"'
+            lines += [f"Content-Disposition: {disposition}", f"Content-Type: {mime}"]
+        else:
+            lines.append(f"Content-Disposition: {disposition}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+
+    def rewind(self):
+        self._index = 0
+        self._offset = 0
+        for part in self._parts:
+            if not isinstance(part, bytes):
+                part[0].seek(part[1])
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length
+        out = []
+        while size > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, bytes):
+                chunk = part[self._offset:self._offset + size]
+                remaining = len(part) - self._offset - len(chunk)
+            else:
+                f, _, total = part
+                chunk = f.read(min(size, total - self._offset, UPLOAD_BLOCK_SIZE))
+                remaining = total - self._offset - len(chunk)
+                if not chunk and remaining:
+                    raise IOError("file shrank while uploading")
+            out.append(chunk)
+            size -= len(chunk)
+            self._offset += len(chunk)
+            if not remaining:
+                self._index += 1
+                self._offset = 0
+        return b"".join(out)
+
+
+def _retry_delay(response, attempt, backoff=1.0):
+    # Telegram tells a rate-limited client exactly how long to wait
+    if response is not None:
+        try:
+            retry_after = response.json().get("parameters", {}).get("retry_after")
+        except ValueError:
+            retry_after = None
+        if retry_after:
+            return min(float(retry_after), MAX_RETRY_AFTER)
+    return random.uniform(0, backoff * (2 ** attempt))
+
+
+def telegram_request(method, data=None, files=None, timeout=REQUEST_TIMEOUT, retries=None):
+    """Call a Bot API method and return its result, retrying 429s and 5xx.
+
+    files are streamed with MultipartBody. Raises requests.RequestException
+    once the retries are used up.
+    """
+    retries = MAX_RETRIES if retries is None else retries
+    url = f"{TELEGRAM_API_URL}/bot{BOT_TOKEN}/{method}"
+    body = MultipartBody(data or {}, files) if files else None
+    for attempt in range(retries + 1):
+        response = None
+        LIMITS["telegram"].acquire()
+        try:
+            if body is not None:
+                body.rewind()
+                response = get_session().post(url, data=body, headers={"Content-Type": body.content_type},
+                                              timeout=timeout)
+            else:
+                response = get_session().post(url, data=data, timeout=timeout)
+            if (response.status_code == 429 or response.status_code >= 500) and attempt < retries:
+                raise requests.HTTPError(f"{response.status_code} from {method}", response=response)
+            response.raise_for_status()
+            return response.json().get("result")
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            retryable = response is None or response.status_code == 429 or response.status_code >= 500
+            if attempt == retries or not retryable:
+                raise
+            delay = _retry_delay(response, attempt)
+            print(f"⚠️ Telegram {method} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
 
 def send_telegram_message(message):
+    """Send a text message. Returns its message_id, or None on failure."""
     if not BOT_TOKEN or not CHAT_ID:
         print("⚠️ Telegram credentials missing.")
         return
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
     payload = {"chat_id": CHAT_ID, "text": message}
-    try:
-        response = requests.post(url, data=payload)
-        response.raise_for_status()
-        print("📬 Telegram message sent.")
-    except Exception as e:
-        print(f"❌ Telegram message failed: {e}")
-
-def send_telegram_file(filepath, caption=None):
-    if not BOT_TOKEN or not CHAT_ID or not os.path.exists(filepath):
-        print(f"⚠️ File missing or Telegram credentials not set: {filepath}")
+    with span("telegram:sendMessage") as s:
+        try:
+            result = telegram_request("sendMessage", payload)
+            print("📬 Telegram message sent.")
+            return (result or {}).get("message_id")
+        except Exception as e:
+            s.status = "failed"
+            print(f"❌ Telegram message failed: {e}")
+
+def edit_telegram_message(message_id, message):
+    if not BOT_TOKEN or not CHAT_ID or message_id is None:
         return
+    payload = {"chat_id": CHAT_ID, "message_id": message_id, "text": message}
+    with span("telegram:editMessageText") as s:
+        try:
+            telegram_request("editMessageText", payload)
+        except Exception as e:
+            s.status = "failed"
+            print(f"❌ Telegram edit failed: {e}")
+
+class LiveMessage:
+    """A Telegram message edited in place while its text is still growing.
 
-    ext = filepath.split(".")[-1].lower()
-    file_field = {
-        "mp4": "video",
-        "png": "photo",
-        "jpg": "photo",
-        "jpeg": "photo",
-        "mp3": "audio"
-    }.get(ext, "document")
-
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/send{file_field.capitalize()}"
-    with open(filepath, "rb") as f:
-        files = {file_field: f}
+    update() sends the first text and then edits at most once per
+    min_interval seconds; finish() always pushes the final text.
+    """
+
+    def __init__(self, prefix="", min_interval=EDIT_INTERVAL):
+        self.prefix = prefix
+        self.min_interval = min_interval
+        self.message_id = None
+        self._sent = None
+        self._last = 0.0
+
+    def update(self, text, force=False):
+        message = self.prefix + text
+        now = time.monotonic()
+        if message == self._sent or (not force and now - self._last < self.min_interval):
+            return
+        if self.message_id is None:
+            self.message_id = send_telegram_message(message)
+        else:
+            edit_telegram_message(self.message_id, message)
+        self._sent = message
+        self._last = now
+
+    def finish(self, text):
+        self.update(text, force=True)
+
+def _body_size(f):
+    # Bytes from the current position to the end: what the upload will send
+    start = f.tell()
+    size = f.seek(0, os.SEEK_END) - start
+    f.seek(start)
+    return size
+
+def _open_upload(filepath, filename):
+    """Return (file object, filename, close?) for a path or a file-like object."""
+    if hasattr(filepath, "read"):
+        return filepath, filename or getattr(filepath, "name", None) or "file", False
+    return open(filepath, "rb"), filename or filepath, True
+
+def send_telegram_file(filepath, caption=None, filename=None):
+    """Send a file by path, or a file-like object such as io.BytesIO.
+
+    A file-like object needs a filename so the right send method is picked.
+    """
+    in_memory = hasattr(filepath, "read")
+    if not BOT_TOKEN or not CHAT_ID or not (in_memory or os.path.exists(filepath)):
+        print(f"⚠️ File missing or Telegram credentials not set: {filename or getattr(filepath, 'name', filepath)}")
+        return
+
+    f, filename, close = _open_upload(filepath, filename)
+    file_field = FILE_FIELDS.get(filename.split(".")[-1].lower(), "document")
+    method = f"send{file_field.capitalize()}"
+    try:
         data = {"chat_id": CHAT_ID}
         if caption:
             data["caption"] = caption
-        try:
-            r = requests.post(url, data=data, files=files)
-            r.raise_for_status()
-            print(f"📤 Sent {file_field}: {filepath}")
-        except Exception as e:
-            print(f"❌ Failed to send file: {e}")
+        with span(f"telegram:{method}", bytes=_body_size(f)) as s:
+            try:
+                telegram_request(method, data, files=[(file_field, filename, f)])
+                print(f"📤 Sent {file_field}: {filename}")
+            except Exception as e:
+                s.status = "failed"
+                print(f"❌ Failed to send file: {e}")
+    finally:
+        if close:
+            f.close()
+
+def send_telegram_media_group(items):
+    """Send several photos as one album. items are (file or path, filename, caption).
+
+    A single item is sent as a plain photo; Telegram albums need two to ten.
+    """
+    items = [item for item in items if item[0] is not None]
+    if len(items) < 2:
+        for filepath, filename, caption in items:
+            send_telegram_file(filepath, caption, filename)
+        return
+    if not BOT_TOKEN or not CHAT_ID:
+        print("⚠️ Telegram credentials missing.")
+        return
+
+    opened = [_open_upload(filepath, filename) for filepath, filename, _ in items]
+    try:
+        media = []
+        files = []
+        for i, ((f, filename, _), (_, _, caption)) in enumerate(zip(opened, items)):
+            entry = {"type": "photo", "media": f"attach://photo{i}"}
+            if caption:
+                entry["caption"] = caption
+            media.append(entry)
+            files.append((f"photo{i}", filename, f))
+        data = {"chat_id": CHAT_ID, "media": json.dumps(media)}
+        size = sum(_body_size(f) for f, _, _ in opened)
+        with span("telegram:sendMediaGroup", photos=len(files), bytes=size) as s:
+            try:
+                telegram_request("sendMediaGroup", data, files=files)
+                print(f"📤 Sent album of {len(files)} photos")
+            except Exception as e:
+                s.status = "failed"
+                print(f"❌ Failed to send album: {e}")
+    finally:
+        for f, _, close in opened:
+            if close:
+                f.close()
+
+def send_telegram_artifact(artifact, caption=None, fmt=None):
+    """Send an in-memory utils.artifacts.Artifact without touching disk."""
+    send_telegram_file(artifact.open(fmt), caption, filename=artifact.filename(fmt))
+
+
+class Uploader:
+    """Background queue for Telegram sends, so stages don't wait on uploads.
+
+    submit() hands a send to a small worker pool and returns its future.
+    flush() waits for everything submitted so far, e.g. before a prompt
+    that should arrive after the previews it refers to.
+    """
+
+    def __init__(self, max_workers=UPLOAD_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="telegram-upload")
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        future = self._pool.submit(fn, *args, **kwargs)
+        with self._lock:
+            self._futures = [f for f in self._futures if not f.done()] + [future]
+        return future
+
+    def flush(self, timeout=None):
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures, timeout)
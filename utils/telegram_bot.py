@@ -0,0 +1,208 @@
+import asyncio
+import os
+import threading
+
+import requests
+
+from utils.instrumentation import span
+
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+OFFSET_FILE = "output/last_update.txt"
+POLL_TIMEOUT = 30
+MAX_ERROR_BACKOFF = 30
+DECISIONS = {"yes": True, "no": False}
+
+
+class ApprovalBot:
+    """Long-polls Telegram once and hands yes/no replies to waiting stages.
+
+    A single getUpdates long-poll runs on one keep-alive session. The update
+    offset lives in memory and is only written to OFFSET_FILE at
+    checkpoints: after each delivered reply and on stop(). Each waiting
+    stage gets an asyncio queue keyed by (job, stage). A bare "yes"/"no" goes
+    to the only waiter. With several waiters the reply must name them, e.g.
+    "yes 2025-10-18 audio".
+    """
+
+    def __init__(self, token=None, chat_id=None, api_url=TELEGRAM_API_URL,
+                 offset_file=OFFSET_FILE, poll_timeout=POLL_TIMEOUT, session=None):
+        self.token = token or os.getenv("TELEGRAM_TOKEN")
+        self.chat_id = str(chat_id or os.getenv("TELEGRAM_CHAT_ID") or "")
+        self.base_url = f"{api_url}/bot{self.token}"
+        self.offset_file = offset_file
+        self.poll_timeout = poll_timeout
+        self.session = session or requests.Session()
+        self.offset = None
+        self.waiters = {}
+        self._loop = None
+        self._thread = None
+        self._poller = None
+        self._ready = None
+        self._start_lock = threading.Lock()
+
+    # ------------------ HTTP ------------------ #
+    def send_message(self, text):
+        with span("telegram:sendMessage") as s:
+            try:
+                res = self.session.post(f"{self.base_url}/sendMessage", data={"chat_id": self.chat_id, "text": text}, timeout=10)
+                res.raise_for_status()
+            except requests.RequestException as e:
+                s.status = "failed"
+                print(f"❌ Telegram message failed: {e}")
+
+    def get_updates(self, timeout):
+        params = {"timeout": timeout}
+        if self.offset is not None:
+            params["offset"] = self.offset + 1
+        res = self.session.get(f"{self.base_url}/getUpdates", params=params, timeout=timeout + 10)
+        res.raise_for_status()
+        return res.json().get("result", [])
+
+    def skip_backlog(self):
+        """Start after the newest update, fetching only that one update."""
+        try:
+            res = self.session.get(f"{self.base_url}/getUpdates", params={"offset": -1, "timeout": 0}, timeout=10)
+            res.raise_for_status()
+            result = res.json().get("result", [])
+            self.offset = result[-1]["update_id"] if result else 0
+        except (requests.RequestException, ValueError, KeyError):
+            self.offset = self.load_checkpoint()
+
+    def load_checkpoint(self):
+        try:
+            with open(self.offset_file, "r") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def checkpoint(self):
+        if self.offset is None:
+            return
+        os.makedirs(os.path.dirname(self.offset_file) or ".", exist_ok=True)
+        with open(self.offset_file, "w") as f:
+            f.write(str(self.offset))
+
+    # ------------------ DISPATCH ------------------ #
+    def dispatch(self, text):
+        """Route one reply to a waiter. Returns the key it went to, or None."""
+        tokens = text.strip().lower().split()
+        if not tokens or tokens[0] not in DECISIONS:
+            if self.waiters:
+                self.send_message("❌ Invalid reply. Type 'yes' or 'no'.")
+            return None
+
+        decision = DECISIONS[tokens[0]]
+        selectors = set(tokens[1:])
+        matches = [
+            key for key in self.waiters
+            if selectors <= {str(part).lower() for part in key if part is not None}
+        ]
+        if len(matches) == 1:
+            self.waiters[matches[0]].put_nowait(decision)
+            return matches[0]
+        if not matches:
+            if self.waiters:
+                self.send_message("❌ Nothing is waiting for that reply.")
+            return None
+
+        options = ", ".join(f"'{tokens[0]} {self.selector(key)}'" for key in matches)
+        self.send_message(f"❓ Several jobs are waiting. Reply with one of: {options}")
+        return None
+
+    @staticmethod
+    def selector(key):
+        return " ".join(str(part) for part in key if part is not None)
+
+    async def poll(self):
+        # Only replies sent after the first prompt count
+        if self.offset is None:
+            await asyncio.to_thread(self.skip_backlog)
+        self._ready.set()
+        # Without a known offset the first batch is old backlog: skip it
+        skip_batch = self.offset is None
+        backoff = 1
+        while True:
+            try:
+                updates = await asyncio.to_thread(self.get_updates, self.poll_timeout)
+                backoff = 1
+            except (requests.RequestException, ValueError) as e:
+                print(f"⚠️ Error waiting for reply: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, MAX_ERROR_BACKOFF)
+                continue
+
+            delivered = False
+            for update in updates:
+                self.offset = update["update_id"]
+                if skip_batch:
+                    continue
+                message = update.get("message") or {}
+                if self.chat_id and str(message.get("chat", {}).get("id", self.chat_id)) != self.chat_id:
+                    continue
+                if "text" in message and self.dispatch(message["text"]):
+                    delivered = True
+            skip_batch = False
+            if delivered:
+                self.checkpoint()
+
+    async def wait(self, prompt=None, job=None, stage=None):
+        key = (job, stage)
+        if key in self.waiters:
+            raise RuntimeError(f"Already waiting for a reply to {self.selector(key) or 'this job'}")
+        queue = self.waiters[key] = asyncio.Queue()
+        if self._poller is None or self._poller.done():
+            self._ready = asyncio.Event()
+            self._poller = asyncio.ensure_future(self.poll())
+        await self._ready.wait()
+        if prompt:
+            if job is not None or stage is not None:
+                prompt += f"\n(Reply 'yes {self.selector(key)}' or 'no {self.selector(key)}')"
+            await asyncio.to_thread(self.send_message, prompt)
+        try:
+            return await queue.get()
+        finally:
+            del self.waiters[key]
+
+    # ------------------ THREAD BRIDGE ------------------ #
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="telegram-approvals", daemon=True)
+                self._thread.start()
+        return self
+
+    def wait_sync(self, prompt=None, job=None, stage=None, timeout=None):
+        """Block the calling thread until a reply arrives for (job, stage)."""
+        self.start()
+        # Time spent waiting on a human, so it can be told apart from work
+        with span("telegram:approval", job=job, stage=stage) as s:
+            future = asyncio.run_coroutine_threadsafe(self.wait(prompt, job, stage), self._loop)
+            approved = future.result(timeout)
+            s.set(approved=approved)
+        return approved
+
+    def stop(self):
+        with self._start_lock:
+            if self._thread is None:
+                return
+            loop = self._loop
+
+            async def shutdown():
+                if self._poller is not None:
+                    self._poller.cancel()
+                    try:
+                        await self._poller
+                    except asyncio.CancelledError:
+                        pass
+                loop.call_soon(loop.stop)
+
+            asyncio.run_coroutine_threadsafe(shutdown(), loop)
+            self._thread.join(timeout=5)
+            if not self._thread.is_alive():
+                loop.close()
+            self._thread = None
+            self._poller = None
+        # Closing the pool aborts a long-poll still blocked in its worker thread
+        self.session.close()
+        self.checkpoint()
@@ -0,0 +1,144 @@
+import threading
+from collections import OrderedDict
+
+MAX_CACHED_WORDS = 50000
+MAX_CACHED_LAYOUTS = 256
+
+_widths = {}
+_layouts = OrderedDict()
+_lock = threading.Lock()
+
+
+def font_key(font):
+    return (getattr(font, "path", id(font)), font.size)
+
+
+def word_widths(font, words):
+    """Widths of words in font, measuring each distinct word only once."""
+    key = font_key(font)
+    with _lock:
+        cache = _widths.get(key)
+        if cache is None or len(cache) > MAX_CACHED_WORDS:
+            cache = _widths[key] = {}
+        missing = [w for w in set(words) if w not in cache]
+    measured = {w: font.getlength(w) for w in missing}
+    with _lock:
+        cache.update(measured)
+        return [cache[w] for w in words]
+
+
+class TextLayout:
+    """Wrapped lines of text for one font and box width, ready to draw."""
+
+    __slots__ = ("lines", "font", "line_spacing", "width")
+
+    def __init__(self, lines, font, line_spacing, width):
+        # Each line is its text, or None for a blank paragraph
+        self.lines = lines
+        self.font = font
+        self.line_spacing = line_spacing
+        self.width = width
+
+    @property
+    def line_height(self):
+        return self.font.size + self.line_spacing
+
+    @property
+    def height(self):
+        return len(self.lines) * self.line_height
+
+    def draw(self, draw, x, y, fill):
+        """Draw the lines from (x, y) and return the y below the last line."""
+        for line in self.lines:
+            if line:
+                draw.text((x, y), line, font=self.font, fill=fill)
+            y += self.line_height
+        return y
+
+
+def _break_lines(paragraph_words, widths, space, max_width):
+    lines = []
+    line = []
+    line_width = 0.0
+    for word, width in zip(paragraph_words, widths):
+        if line and line_width + space + width > max_width:
+            lines.append(" ".join(line))
+            line = [word]
+            line_width = width
+        else:
+            line_width += (space if line else 0.0) + width
+            line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return lines
+
+
+def layout_text(text, font, max_width, line_spacing=0):
+    """Greedy line breaking in one pass over cached word widths.
+
+    Layouts are memoized on (font, text, width, spacing), so laying out the
+    same text again is free.
+    """
+    key = (font_key(font), text, max_width, line_spacing)
+    with _lock:
+        layout = _layouts.get(key)
+        if layout is not None:
+            _layouts.move_to_end(key)
+            return layout
+
+    paragraphs = [p.split() for p in text.split("\n")]
+    space = word_widths(font, [" "])[0]
+    widths = word_widths(font, [w for words in paragraphs for w in words])
+
+    lines = []
+    i = 0
+    for words in paragraphs:
+        if not words:
+            lines.append(None)
+            continue
+        lines.extend(_break_lines(words, widths[i:i + len(words)], space, max_width))
+        i += len(words)
+
+    layout = TextLayout(lines, font, line_spacing, max_width)
+    with _lock:
+        _layouts[key] = layout
+        if len(_layouts) > MAX_CACHED_LAYOUTS:
+            _layouts.popitem(last=False)
+    return layout
+
+
+def fit_text(text, load_font, max_width, max_height, size, min_size=10, line_spacing=0):
+    """Lay out text at the largest font size up to size that fits the box.
+
+    load_font(size) returns a font. Word widths measured at the starting
+    size are scaled to estimate each smaller size, so candidate sizes are
+    tried without measuring anything; only the chosen size is measured,
+    and it is stepped down further if the estimate was a little short.
+    """
+    base = load_font(size)
+    paragraphs = [p.split() for p in text.split("\n")]
+    base_space = word_widths(base, [" "])[0]
+    base_widths = word_widths(base, [w for words in paragraphs for w in words])
+
+    def estimated_height(candidate):
+        scale = candidate / size
+        count = 0
+        i = 0
+        for words in paragraphs:
+            if not words:
+                count += 1
+                continue
+            widths = [w * scale for w in base_widths[i:i + len(words)]]
+            count += len(_break_lines(words, widths, base_space * scale, max_width))
+            i += len(words)
+        return count * (candidate + line_spacing)
+
+    candidate = size
+    while candidate > min_size and estimated_height(candidate) > max_height:
+        candidate -= 1
+
+    while True:
+        layout = layout_text(text, load_font(candidate), max_width, line_spacing)
+        if layout.height <= max_height or candidate <= min_size:
+            return layout
+        candidate -= 1
@@ -1,92 +1,393 @@
 import os
-from PIL import Image
-import ffmpeg
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.artifacts import save_image
+from utils.audio_generator import get_audio_duration, get_audio_timeline
+from utils.instrumentation import span
 
-def create_video_from_images_and_audio(output_video="output/final_video.mp4"):
-    os.makedirs("output", exist_ok=True)
+# x264 settings per speed/quality trade-off. Every video is a still frame
+# over narration, so all profiles tune for still images.
+VIDEO_PROFILES = {
+    "quality": {"preset": "slow", "crf": 18, "tune": "stillimage"},
+    "balanced": {"preset": "medium", "crf": 20, "tune": "stillimage"},
+    "fast": {"preset": "veryfast", "crf": 23, "tune": "stillimage"}
+}
+VIDEO_PROFILE = os.getenv("VIDEO_PROFILE", "quality")
 
-    # Step 1: Use the market image
-    image_path = "output/final_image.png"
-    if not os.path.exists(image_path):
-        print("❌ final_image.png not found.")
-        return None
+# still: the frame is piped in raw from memory and encoded once
+# single: one ffmpeg process writes every rendition
+# parallel: one ffmpeg process per rendition, run concurrently
+# sequential: one ffmpeg process per rendition, one after another
+VIDEO_MODES = ("still", "single", "parallel", "sequential")
+VIDEO_MODE = os.getenv("VIDEO_MODE", "still")
 
-    # Step 2: Convert to .jpg
-    img = Image.open(image_path).convert("RGB")
-    frame_path = "output/frame_000.jpg"
-    img.save(frame_path, quality=100)
+# 0 encodes a single frame that lasts the whole narration. A positive rate
+# clones the frame at that rate instead, for players that want a steady one.
+STILL_FPS = int(os.getenv("STILL_FPS", "0"))
+STILL_KEYINT_SECONDS = int(os.getenv("STILL_KEYINT_SECONDS", "10"))
 
-    # Step 3: Confirm audio
-    audio_path = "output/output_polly.mp3"
-    if not os.path.exists(audio_path):
-        print("❌ Audio file not found.")
-        return None
+# ffmpeg processes allowed at once across every job in the process; x264
+# already uses several cores per encode
+FFMPEG_WORKERS = int(os.getenv("FFMPEG_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+ENCODE_SLOTS = threading.BoundedSemaphore(FFMPEG_WORKERS)
 
-    # Step 4: Get audio duration
-    try:
-        probe = ffmpeg.probe(audio_path)
-        audio_duration = float(probe["format"]["duration"])
-    except Exception as e:
-        print(f"❌ Failed to probe audio duration: {e}")
-        return None
-
-    frame_duration = audio_duration
-
-    # Step 5: Create first video (with final_image)
-    try:
-        video_input = ffmpeg.input("output/frame_%03d.jpg", framerate=1 / frame_duration)
-        audio_input = ffmpeg.input(audio_path)
+# Vertical slide videos: frames per second piped to ffmpeg, crossfade
+# length, and how many slides render at once ahead of the encoder
+SLIDE_FPS = int(os.getenv("SLIDE_FPS", "15"))
+SLIDE_CROSSFADE = float(os.getenv("SLIDE_CROSSFADE", "0.5"))
+SLIDE_WORKERS = int(os.getenv("SLIDE_WORKERS", "4"))
 
+def encode_audio(audio_path, output_path="output/audio.m4a"):
+    """Encode the narration to AAC once so every rendition can stream-copy it."""
+    import ffmpeg
+    with ENCODE_SLOTS, span("ffmpeg:aac"):
         (
             ffmpeg
-            .output(
-                video_input, audio_input, output_video,
-                vcodec="libx264",
-                acodec="aac",
-                crf=18,
-                preset="slow",
-                pix_fmt="yuv420p",
-                shortest=None
-            )
-            .run(overwrite_output=True)
+            .input(audio_path)
+            .output(output_path, acodec="aac", audio_bitrate="192k", vn=None)
+            .run(overwrite_output=True, capture_stderr=True)
         )
+    return output_path
 
-        print(f"✅ Final video saved to: {output_video}")
-
-    except ffmpeg.Error as e:
-        print(f"❌ FFmpeg failed on final_video.mp4:\n{e.stderr.decode()}")
+def _video_output(frame_path, audio_input, frame_duration, output_path, profile):
+    import ffmpeg
+    video_input = ffmpeg.input(frame_path, framerate=1 / frame_duration)
+    return ffmpeg.output(
+        video_input, audio_input, output_path,
+        vcodec="libx264",
+        acodec="copy",
+        pix_fmt="yuv420p",
+        shortest=None,
+        **VIDEO_PROFILES[profile]
+    )
 
-    # Step 6: Create second video (with insta_image.jpg)
-    insta_image_path = "output/insta_image.jpg"
-    insta_frame_path = "output/frame_insta.jpg"
-    insta_video_output = "output/insta_video.mp4"
+def render_still_video(image, aac_path, duration, output_path, profile=None):
+    """Encode one in-memory PIL image over an already encoded audio track.
 
-    if os.path.exists(insta_image_path):
-        try:
-            Image.open(insta_image_path).convert("RGB").save(insta_frame_path, quality=100)
+    The frame goes to ffmpeg's stdin as raw RGB, so it is never re-saved to
+    disk. By default it is encoded exactly once, as a single frame lasting
+    the whole narration, so the encode does not grow with the audio. With
+    STILL_FPS set, ffmpeg clones it at that rate and the clones become
+    near-empty P frames inside a long GOP. The audio is stream-copied.
+    """
+    import ffmpeg
 
-            video_input = ffmpeg.input(insta_frame_path, framerate=1 / frame_duration)
-            audio_input = ffmpeg.input(audio_path)
+    profile = profile or VIDEO_PROFILE
+    image = image.convert("RGB")
+    width, height = image.size
 
+    if STILL_FPS > 0:
+        video_input = (
+            ffmpeg
+            .input("pipe:", format="rawvideo", pix_fmt="rgb24", s=f"{width}x{height}", framerate=STILL_FPS)
+            .filter("tpad", stop_mode="clone", stop_duration=duration)
+        )
+        rate = {"r": STILL_FPS, "g": STILL_FPS * STILL_KEYINT_SECONDS, "shortest": None}
+    else:
+        video_input = ffmpeg.input("pipe:", format="rawvideo", pix_fmt="rgb24", s=f"{width}x{height}", framerate=1 / duration)
+        # No -shortest: ffmpeg drops a lone frame that outlasts the audio,
+        # and the probed MP3 runs a few ms past its AAC encode
+        rate = {}
+    # yuv420p needs even dimensions
+    video_input = video_input.filter("pad", "ceil(iw/2)*2", "ceil(ih/2)*2")
+    audio_input = ffmpeg.input(aac_path)
+    with ENCODE_SLOTS, span("ffmpeg:still", output=os.path.basename(output_path)) as s:
+        try:
             (
                 ffmpeg
                 .output(
-                    video_input, audio_input, insta_video_output,
+                    video_input, audio_input, output_path,
                     vcodec="libx264",
-                    acodec="aac",
-                    crf=18,
-                    preset="slow",
+                    acodec="copy",
                     pix_fmt="yuv420p",
-                    shortest=None
+                    movflags="+faststart",
+                    **rate,
+                    **VIDEO_PROFILES[profile]
                 )
-                .run(overwrite_output=True)
+                .run(input=image.tobytes(), overwrite_output=True, capture_stderr=True)
             )
+            s.set(bytes=os.path.getsize(output_path))
+            return True
+        except ffmpeg.Error as e:
+            s.status = "failed"
+            print(f"❌ FFmpeg failed on {output_path}:\n{e.stderr.decode()}")
+            return False
+
+class SlideRenderError(Exception):
+    """A slide's render returned no image; index is its position in the sequence."""
+
+    def __init__(self, index):
+        super().__init__(f"slide {index} failed to render")
+        self.index = index
+
+def _slide_frames(images, frame_counts, fade_frames):
+    """Yield raw RGB frames: each slide held, then crossfaded into the next.
+
+    images are futures of PIL images, so a slide only has to be ready by
+    the time its frames are due. The fade takes its frames from the end of
+    the outgoing slide, so every slide still starts on time. A slide that
+    rendered as None raises SlideRenderError.
+    """
+    from PIL import Image
+
+    size = None
+    current = None
+    for i, count in enumerate(frame_counts):
+        if current is None:
+            current = images[i].result().convert("RGB")
+            size = current.size
+        following = None
+        fade = 0
+        if i + 1 < len(frame_counts):
+            fade = min(fade_frames, count // 2, frame_counts[i + 1] // 2)
+            following = images[i + 1].result()
+            if following is None:
+                raise SlideRenderError(i + 1)
+            following = following.convert("RGB")
+            if following.size != size:
+                following = following.resize(size)
+        held = current.tobytes()
+        for _ in range(count - fade):
+            yield held
+        for k in range(1, fade + 1):
+            yield Image.blend(current, following, k / (fade + 1)).tobytes()
+        current = following
+
+def _is_set(cancelled):
+    return cancelled is not None and cancelled.is_set()
+
+def render_slide_video(slides, durations, aac_path, output_path, fps=None, crossfade=None, profile=None,
+                       cancelled=None):
+    """Encode slides shown for the given durations into one video, with crossfades.
+
+    Each slide renders in a worker pool while the frames of the slides
+    before it are already streaming to ffmpeg's stdin as raw RGB, so
+    rendering and encoding overlap and no frame is written to disk.
+    Setting the optional cancelled Event stops the encode between frames.
+    """
+    import ffmpeg
+
+    fps = fps or SLIDE_FPS
+    crossfade = SLIDE_CROSSFADE if crossfade is None else crossfade
+    profile = profile or VIDEO_PROFILE
+
+    # Cumulative rounding, so the frames add up to the audio exactly
+    bounds = [0]
+    elapsed = 0.0
+    for seconds in durations:
+        elapsed += seconds
+        bounds.append(round(elapsed * fps))
+    frame_counts = [end - start for start, end in zip(bounds, bounds[1:])]
+
+    with ThreadPoolExecutor(max_workers=SLIDE_WORKERS, thread_name_prefix="slide-render") as pool:
+        images = [pool.submit(slide.render) for slide in slides]
+        first = images[0].result()
+        if first is None:
+            print(f"❌ Slide {slides[0].name} failed to render.")
+            return False
+        width, height = first.size
+        video_input = (
+            ffmpeg
+            .input("pipe:", format="rawvideo", pix_fmt="rgb24", s=f"{width}x{height}", framerate=fps)
+            .filter("pad", "ceil(iw/2)*2", "ceil(ih/2)*2")
+        )
+        stream = ffmpeg.output(
+            video_input, ffmpeg.input(aac_path), output_path,
+            vcodec="libx264",
+            acodec="copy",
+            pix_fmt="yuv420p",
+            shortest=None,
+            movflags="+faststart",
+            r=fps,
+            g=fps * STILL_KEYINT_SECONDS,
+            **VIDEO_PROFILES[profile]
+        )
+        with ENCODE_SLOTS, span("ffmpeg:slides", slides=len(slides), frames=bounds[-1]) as s:
+            process = stream.overwrite_output().run_async(pipe_stdin=True, pipe_stderr=True)
+            # Drain stderr as it comes so a chatty ffmpeg never blocks on it
+            stderr = []
+            reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+            reader.start()
+            missing = None
+            try:
+                for frame in _slide_frames(images, frame_counts, round(crossfade * fps)):
+                    if _is_set(cancelled):
+                        break
+                    process.stdin.write(frame)
+            except SlideRenderError as e:
+                missing = slides[e.index]
+            except BrokenPipeError as e:
+                print(f"❌ Slide video stopped early: {e}")
+            finally:
+                process.stdin.close()
+                process.wait()
+                reader.join()
+            if _is_set(cancelled):
+                s.status = "cancelled"
+                print(f"⏹️ Slide video cancelled: {output_path}")
+                return False
+            if missing is not None:
+                # ffmpeg finished cleanly on the frames it got, but the video is cut short
+                s.status = "failed"
+                print(f"❌ Slide {missing.name} failed to render.")
+                return False
+            if process.returncode != 0:
+                s.status = "failed"
+                print(f"❌ FFmpeg failed on {output_path}:\n{b''.join(stderr).decode(errors='replace')}")
+                return False
+            s.set(bytes=os.path.getsize(output_path))
+            return True
+
+def render_videos(renditions, audio_path, frame_duration, mode=None, profile=None, aac_path=None):
+    """Render (frame, output_path) pairs over one audio track.
 
-            print(f"✅ Instagram video saved to: {insta_video_output}")
+    A frame is a PIL image in still mode and an image path otherwise.
+    aac_path is the narration already encoded by encode_audio(), if it is.
+    Returns the output paths that were written successfully.
+    """
+    import ffmpeg
 
-        except Exception as e:
-            print(f"❌ Failed to create insta_video.mp4:\n{e}")
+    mode = mode or VIDEO_MODE
+    profile = profile or VIDEO_PROFILE
+    if mode not in VIDEO_MODES:
+        raise ValueError(f"Unknown video mode: {mode}")
+    if profile not in VIDEO_PROFILES:
+        raise ValueError(f"Unknown video profile: {profile}")
+    if not renditions:
+        return []
+
+    output_dir = os.path.dirname(renditions[0][1])
+    if aac_path is None:
+        try:
+            aac_path = encode_audio(audio_path, os.path.join(output_dir, "audio.m4a"))
+        except ffmpeg.Error as e:
+            print(f"❌ FFmpeg failed to encode audio:\n{e.stderr.decode()}")
+            return []
+
+    def run(outputs):
+        with ENCODE_SLOTS, span(f"ffmpeg:{mode}", outputs=len(outputs)) as s:
+            try:
+                ffmpeg.merge_outputs(*outputs).run(overwrite_output=True, capture_stderr=True)
+                return True
+            except ffmpeg.Error as e:
+                s.status = "failed"
+                print(f"❌ FFmpeg failed:\n{e.stderr.decode()}")
+                return False
+
+    if mode == "still":
+        with ThreadPoolExecutor(max_workers=len(renditions)) as pool:
+            ok = list(pool.map(
+                lambda rendition: render_still_video(rendition[0], aac_path, frame_duration, rendition[1], profile),
+                renditions
+            ))
+    elif mode == "single":
+        audio_input = ffmpeg.input(aac_path)
+        outputs = [
+            _video_output(frame_path, audio_input, frame_duration, output_path, profile)
+            for frame_path, output_path in renditions
+        ]
+        ok = [run(outputs)] * len(renditions)
     else:
+        jobs = [
+            [_video_output(frame_path, ffmpeg.input(aac_path), frame_duration, output_path, profile)]
+            for frame_path, output_path in renditions
+        ]
+        if mode == "parallel":
+            with ThreadPoolExecutor(max_workers=len(jobs) or 1) as pool:
+                ok = list(pool.map(run, jobs))
+        else:
+            ok = [run(job) for job in jobs]
+
+    return [output_path for (_, output_path), success in zip(renditions, ok) if success]
+
+def create_video_from_images_and_audio(output_video="output/final_video.mp4", mode=None, profile=None, images=None,
+                                       audio_path="output/output_polly.mp3", insta_video_output="output/insta_video.mp4",
+                                       slides=None, script_text=None, cancelled=None):
+    """Render the YouTube video and, if there is one, the Instagram video.
+
+    images is an optional (market, instagram) pair of PIL images already in
+    memory; without it the images are read from output/. With slides (see
+    utils.slides) and the narrated script_text, the Instagram video is a
+    slide sequence timed to the narration instead of the single image.
+    Once the optional cancelled Event is set, no further encode starts and
+    None is returned.
+    """
+    from PIL import Image
+
+    os.makedirs(os.path.dirname(output_video) or ".", exist_ok=True)
+    mode = mode or VIDEO_MODE
+
+    # Step 1: Use the market image
+    image, insta_image = images or (None, None)
+    image_path = "output/final_image.png"
+    if image is None:
+        if not os.path.exists(image_path):
+            print("❌ final_image.png not found.")
+            return None
+        image = Image.open(image_path)
+
+    insta_image_path = "output/insta_image.jpg"
+    if insta_image is None and images is None and os.path.exists(insta_image_path):
+        insta_image = Image.open(insta_image_path)
+
+    # Step 2: Confirm audio
+    if not audio_path or not os.path.exists(audio_path):
+        print("❌ Audio file not found.")
+        return None
+
+    # Step 3: Get audio duration
+    try:
+        # Known without probing when the audio was just synthesized or cached
+        audio_duration = get_audio_duration(audio_path)
+    except Exception as e:
+        print(f"❌ Failed to probe audio duration: {e}")
+        return None
+
+    frame_duration = audio_duration
+
+    # Step 4: Collect the renditions. Still mode pipes the images straight
+    # to ffmpeg; the other modes read JPEG frames from disk.
+    renditions = [(image, output_video)]
+    # With slides the Instagram video is composed from them in step 5
+    if insta_image is not None and not slides:
+        renditions.append((insta_image, insta_video_output))
+    elif not slides:
         print("⚠️ insta_image.jpg not found — skipping second video.")
 
+    if mode != "still":
+        output_dir = os.path.dirname(output_video) or "."
+        frame_paths = [os.path.join(output_dir, "frame_000.jpg"), os.path.join(output_dir, "frame_insta.jpg")]
+        renditions = [
+            (save_image(frame, frame_path), output_path)
+            for (frame, output_path), frame_path in zip(renditions, frame_paths)
+        ]
+
+    # Step 5: Encode every rendition, sharing one AAC encode of the audio
+    if _is_set(cancelled):
+        return None
+    if slides:
+        import ffmpeg
+        from utils.slides import slide_durations
+        try:
+            aac_path = encode_audio(audio_path, os.path.join(os.path.dirname(output_video) or ".", "audio.m4a"))
+        except ffmpeg.Error as e:
+            print(f"❌ FFmpeg failed to encode audio:\n{e.stderr.decode()}")
+            return None
+        if _is_set(cancelled):
+            return None
+        durations = slide_durations(slides, script_text or "", audio_duration, get_audio_timeline(audio_path))
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            slide_video = pool.submit(render_slide_video, slides, durations, aac_path, insta_video_output,
+                                      profile=profile, cancelled=cancelled)
+            written = render_videos(renditions, audio_path, frame_duration, mode=mode, profile=profile,
+                                    aac_path=aac_path)
+            if slide_video.result():
+                written.append(insta_video_output)
+    else:
+        written = render_videos(renditions, audio_path, frame_duration, mode=mode, profile=profile)
+    if _is_set(cancelled):
+        return None
+    for path in written:
+        print(f"✅ Video saved to: {path}")
+
     return output_video